@@ -8,6 +8,8 @@ import getpass
 import os
 from dotenv import load_dotenv
 
+from connection_strings import workload_warehouse
+
 def activate_pipeline():
     """Activate the customer profile pipeline."""
     load_dotenv()
@@ -25,7 +27,7 @@ def activate_pipeline():
             user='ALGORYTHMOS',
             password=password,
             role='ACCOUNTADMIN',
-            warehouse='COMPUTE_WH',
+            warehouse=workload_warehouse('pipeline'),
             database='TPCH_DASHBOARDS',
             schema='PUBLIC'
         )
@@ -46,14 +48,21 @@ def activate_pipeline():
             print(f"📋 Task: {task_name}")
             print(f"📊 Current State: {current_state}")
             
-            # Step 2: Resume the task if suspended
+            # Step 2: Resume the task graph (root, slice tasks and publish) if suspended
             if current_state == 'SUSPENDED':
-                print("\n🔄 Resuming automated task...")
-                cursor.execute("ALTER TASK CUSTOMER_PROFILE_TASK RESUME")
-                print("✅ Task resumed! Pipeline is now automated.")
+                print("\n🔄 Resuming automated task graph...")
+                cursor.execute("SELECT SYSTEM$TASK_DEPENDENTS_ENABLE('CUSTOMER_PROFILE_TASK')")
+                print("✅ Task graph resumed! Pipeline is now automated.")
             else:
                 print(f"✅ Task is already in {current_state} state")
         
+        # Step 2b: Resume the history collector (and the attribution rollup after it)
+        cursor.execute("SHOW TASKS LIKE 'PIPELINE_HISTORY_TASK'")
+        collector_info = cursor.fetchall()
+        if collector_info and collector_info[0][7] == 'SUSPENDED':
+            cursor.execute("SELECT SYSTEM$TASK_DEPENDENTS_ENABLE('PIPELINE_HISTORY_TASK')")
+            print("✅ History collector resumed (hourly at :30 UTC)")
+        
         print()
         
         # Step 3: Manual execution test
@@ -81,13 +90,12 @@ def activate_pipeline():
         print("⏰ Pipeline Schedule Information:")
         cursor.execute("""
             SELECT 
-                TASK_NAME,
+                NAME,
                 STATE,
-                SCHEDULE,
+                SCHEDULED_TIME,
                 NEXT_SCHEDULED_TIME
-            FROM TABLE(INFORMATION_SCHEMA.TASK_HISTORY(
-                TASK_NAME => 'CUSTOMER_PROFILE_TASK'
-            )) 
+            FROM V_TASK_HISTORY
+            WHERE NAME = 'CUSTOMER_PROFILE_TASK'
             ORDER BY SCHEDULED_TIME DESC 
             LIMIT 1
         """)
@@ -97,7 +105,7 @@ def activate_pipeline():
             for info in schedule_info:
                 print(f"   📅 Task: {info[0]}")
                 print(f"   🔄 State: {info[1]}")
-                print(f"   ⏰ Schedule: {info[2] or 'Manual trigger only'}")
+                print(f"   ⏰ Last Scheduled: {info[2] or 'Manual trigger only'}")
                 print(f"   ⏭️  Next Run: {info[3] or 'Manual trigger only'}")
         
         print()
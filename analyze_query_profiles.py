@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Dashboard Query Profile Analyzer
+Runs every query of the BI catalogs (bi_query_catalog.py) and the Power BI
+sample file, reads its profile with GET_QUERY_OPERATOR_STATS and explains
+where the time goes, without clicking through the query profile UI.
+
+For each query it reports the most expensive operators, bytes spilled to
+local and remote storage, partition pruning, joins that output more rows
+than they read, and COUNT(DISTINCT) aggregations that barely reduce their
+input. Queries are ranked by estimated gain: elapsed time x the share of it
+spent in flagged operators. The report is printed and saved as JSON under
+benchmark_results/query_profiles/.
+
+Usage:
+    python analyze_query_profiles.py
+    python analyze_query_profiles.py --catalog powerbi --query "Customer Segments"
+    python analyze_query_profiles.py --query-id 01b2c3d4-0000-...
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import re
+
+from benchmark_dashboard import RESULTS_DIR
+from bi_query_catalog import CATALOGS, load_sql_catalog
+from connection_strings import build_query_tag, get_snowflake_connection
+from result_stream import stream_query
+
+PROFILE_DIR = os.path.join(RESULTS_DIR, "query_profiles")
+TOP_OPERATORS = 3
+MIN_PRUNABLE_PARTITIONS = 10
+FULL_SCAN_RATIO = 0.8           # scanned/total partitions above this counts as unpruned
+DISTINCT_MIN_INPUT_ROWS = 100000
+DISTINCT_REDUCTION_RATIO = 0.5  # output/input rows above this barely aggregates
+
+
+def load_catalogs(names):
+    """Name -> [(query name, sql)] for the requested catalogs."""
+    catalogs = {name: list(CATALOGS[name].items()) for name in names if name in CATALOGS}
+    if 'powerbi_samples' in names:
+        catalogs['powerbi_samples'] = list(load_sql_catalog().items())
+    return catalogs
+
+
+def operator_stats(cursor, query_id):
+    """Operators of a finished query with their statistics parsed."""
+    cursor.execute("""
+        SELECT OPERATOR_ID, OPERATOR_TYPE, OPERATOR_STATISTICS,
+               EXECUTION_TIME_BREAKDOWN, OPERATOR_ATTRIBUTES
+        FROM TABLE(GET_QUERY_OPERATOR_STATS(%s))
+    """, (query_id,))
+    operators = []
+    for operator_id, operator_type, stats, breakdown, attributes in cursor.fetchall():
+        operators.append({
+            'id': operator_id,
+            'type': operator_type,
+            'stats': json.loads(stats) if stats else {},
+            'time': json.loads(breakdown) if breakdown else {},
+            'attributes': json.loads(attributes) if attributes else {},
+        })
+    return operators
+
+
+def time_share(operator):
+    return operator['time'].get('overall_percentage', 0.0) / 100
+
+
+def analyze_operators(operators, elapsed, sql):
+    """Summarize one query profile and estimate how many seconds are at stake."""
+    findings = []
+    flagged = set()
+    counts_distinct = bool(re.search(r"COUNT\s*\(\s*DISTINCT", sql or "", re.I))
+
+    spill_local = spill_remote = 0
+    for op in operators:
+        spilling = op['stats'].get('spilling', {})
+        local = spilling.get('bytes_spilled_local_storage', 0)
+        remote = spilling.get('bytes_spilled_remote_storage', 0)
+        spill_local += local
+        spill_remote += remote
+        if local or remote:
+            flagged.add(op['id'])
+            findings.append(f"{op['type']} #{op['id']} spills {local / 1024 ** 2:,.0f} MB local, "
+                            f"{remote / 1024 ** 2:,.0f} MB remote")
+
+    scanned = total = 0
+    for op in operators:
+        if op['type'] != 'TableScan':
+            continue
+        pruning = op['stats'].get('pruning', {})
+        op_scanned = pruning.get('partitions_scanned', 0)
+        op_total = pruning.get('partitions_total', 0)
+        scanned += op_scanned
+        total += op_total
+        if op_total >= MIN_PRUNABLE_PARTITIONS and op_scanned / op_total > FULL_SCAN_RATIO:
+            flagged.add(op['id'])
+            table = op['attributes'].get('table_name', '?')
+            findings.append(f"TableScan #{op['id']} on {table} reads {op_scanned:,} of {op_total:,} partitions")
+
+    for op in operators:
+        input_rows = op['stats'].get('input_rows', 0)
+        output_rows = op['stats'].get('output_rows', 0)
+        if op['type'] == 'Join' and input_rows and output_rows > input_rows:
+            flagged.add(op['id'])
+            condition = op['attributes'].get('equality_join_condition') or op['attributes'].get('additional_join_condition', '')
+            findings.append(f"Join #{op['id']} explodes {input_rows:,} -> {output_rows:,} rows ({condition})")
+        # COUNT(DISTINCT) is planned as a grouping on the distinct column first,
+        # so the operator itself does not mention DISTINCT
+        if (op['type'] == 'Aggregate' and counts_distinct
+                and input_rows >= DISTINCT_MIN_INPUT_ROWS
+                and output_rows / input_rows > DISTINCT_REDUCTION_RATIO):
+            flagged.add(op['id'])
+            findings.append(f"Aggregate #{op['id']} for COUNT(DISTINCT) keeps {output_rows:,} of {input_rows:,} rows")
+
+    top = sorted(operators, key=time_share, reverse=True)[:TOP_OPERATORS]
+    flagged_share = min(1.0, sum(time_share(op) for op in operators if op['id'] in flagged))
+    return {
+        'top_operators': [{'id': op['id'], 'type': op['type'], 'share': round(time_share(op), 3),
+                           'input_rows': op['stats'].get('input_rows'),
+                           'output_rows': op['stats'].get('output_rows')} for op in top],
+        'bytes_spilled_local': spill_local,
+        'bytes_spilled_remote': spill_remote,
+        'partitions_scanned': scanned,
+        'partitions_total': total,
+        'pruning_ratio': round(1 - scanned / total, 3) if total else None,
+        'findings': findings,
+        'flagged_share': round(flagged_share, 3),
+        'estimated_gain_s': round(elapsed * flagged_share, 3),
+    }
+
+
+def profile_query(cursor, catalog, name, sql):
+    """Run one catalog query and analyze its profile."""
+    cursor.execute("ALTER SESSION SET QUERY_TAG = %s",
+                   (build_query_tag(catalog.split('_')[0], dashboard=name, suite='analyze_query_profiles'),))
+    result = stream_query(cursor, sql)
+    query_id = cursor.sfqid
+    analysis = analyze_operators(operator_stats(cursor, query_id), result['query_time'], sql)
+    analysis.update({'query_id': query_id, 'elapsed_s': round(result['query_time'], 3),
+                     'rows_returned': result['rows_returned']})
+    return analysis
+
+
+def query_history(cursor, query_id):
+    """(elapsed seconds, query text) of an executed query; (0.0, None) if not found."""
+    # The collected store (09_observability.sql) first, then the last 7 days
+    for sql in ("SELECT TOTAL_ELAPSED_TIME, QUERY_TEXT FROM QUERY_RUN_HISTORY WHERE QUERY_ID = %s",
+                "SELECT TOTAL_ELAPSED_TIME, QUERY_TEXT FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY("
+                "RESULT_LIMIT => 10000)) WHERE QUERY_ID = %s"):
+        try:
+            cursor.execute(sql, (query_id,))
+            row = cursor.fetchone()
+        except Exception:
+            row = None
+        if row:
+            return row[0] / 1000, row[1]
+    return 0.0, None
+
+
+def print_analysis(a):
+    pruning = f"{a['pruning_ratio']:.0%} pruned" if a['pruning_ratio'] is not None else "no table scans"
+    print(f"🔬 [{a['catalog']}] {a['name']}: {a['elapsed_s']:.2f}s, ~{a['estimated_gain_s']:.2f}s to gain, "
+          f"{pruning}, spill {a['bytes_spilled_local'] / 1024 ** 2:,.0f}/{a['bytes_spilled_remote'] / 1024 ** 2:,.0f} MB")
+    for op in a['top_operators']:
+        print(f"   ⏱️  {op['type']} #{op['id']}: {op['share']:.0%} of time, "
+              f"{op['input_rows'] or 0:,} -> {op['output_rows'] or 0:,} rows")
+    for finding in a['findings']:
+        print(f"   ⚠️  {finding}")
+
+
+def save_report(entries, output_dir=PROFILE_DIR):
+    """Write the ranked analyses to a timestamped JSON file and return its path."""
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = dt.datetime.now(dt.timezone.utc)
+    path = os.path.join(output_dir, f"query_profiles_{timestamp:%Y%m%d_%H%M%S}.json")
+    with open(path, "w") as f:
+        json.dump({'started_at': timestamp.isoformat(), 'queries': entries}, f, indent=2, default=str)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explain where dashboard queries spend their time")
+    parser.add_argument("--catalog", nargs="+", choices=sorted(CATALOGS) + ['powerbi_samples'],
+                        default=sorted(CATALOGS) + ['powerbi_samples'], help="Catalogs to analyze (default: all)")
+    parser.add_argument("--query", help="Only analyze queries whose name contains this text")
+    parser.add_argument("--query-id", help="Analyze an already executed query instead of running the catalogs")
+    parser.add_argument("--warehouse", help="Warehouse to run on (default: the connection default)")
+    args = parser.parse_args()
+
+    print("🔬 Dashboard Query Profile Analysis")
+    print("=" * 60)
+
+    overrides = {'warehouse': args.warehouse} if args.warehouse else {}
+    conn = get_snowflake_connection(**overrides)
+    entries = []
+    try:
+        cursor = conn.cursor()
+        if args.query_id:
+            elapsed, sql = query_history(cursor, args.query_id)
+            analysis = analyze_operators(operator_stats(cursor, args.query_id), elapsed, sql)
+            analysis.update({'catalog': 'adhoc', 'name': args.query_id, 'query_id': args.query_id,
+                             'elapsed_s': elapsed, 'rows_returned': None})
+            entries.append(analysis)
+        else:
+            # Profiles of cached results are empty
+            cursor.execute("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+            for catalog, queries in load_catalogs(args.catalog).items():
+                for name, sql in queries:
+                    if args.query and args.query.lower() not in name.lower():
+                        continue
+                    try:
+                        analysis = profile_query(cursor, catalog, name, sql)
+                    except Exception as e:
+                        print(f"❌ [{catalog}] {name}: {e}")
+                        continue
+                    analysis.update({'catalog': catalog, 'name': name})
+                    entries.append(analysis)
+        cursor.close()
+    finally:
+        conn.close()
+
+    entries.sort(key=lambda e: e['estimated_gain_s'], reverse=True)
+    print(f"\n🏆 {len(entries)} queries ranked by estimated gain")
+    print("-" * 60)
+    for entry in entries:
+        print_analysis(entry)
+
+    path = save_report(entries)
+    print(f"\n💾 Report saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Customer Profile Backfill
+Replays a historical order-date range through CREATE_CUSTOMER_PROFILE_SP in
+independent chunks, running several chunks concurrently on the warehouse.
+
+Chunks whose date range is still empty in the target are insert-only
+(WRITE_MODE 'APPEND'), so they load in parallel without locking each other.
+Chunks that already have rows, e.g. re-runs or --force, replace their slice
+with DELETE + INSERT, and those serialize on the target's lock. Finished
+chunks are recorded in CUSTOMER_PROFILE_BACKFILL_LOG, so an interrupted
+backfill is resumed by running the same command again.
+"""
+
+import argparse
+import datetime as dt
+import time
+
+from snowflake.connector.errors import ProgrammingError
+
+from connection_strings import get_snowflake_connection
+
+DEFAULT_TARGET = "CUSTOMER_PROFILE_HISTORY"
+POLL_SECONDS = 2
+OBJECT_DOES_NOT_EXIST = 2003  # Snowflake error code
+
+
+def month_chunks(start, end, months):
+    """Split [start, end) into consecutive chunks of `months` calendar months."""
+    chunks = []
+    chunk_start = start
+    while chunk_start < end:
+        month_index = chunk_start.month - 1 + months
+        chunk_end = chunk_start.replace(
+            year=chunk_start.year + month_index // 12,
+            month=month_index % 12 + 1,
+            day=1,
+        )
+        chunks.append((chunk_start, min(chunk_end, end)))
+        chunk_start = chunk_end
+    return chunks
+
+
+def default_run_id(target, start, end, months):
+    """Derive a stable run ID so re-running the same command resumes it."""
+    return f"{target}_{start:%Y%m%d}_{end:%Y%m%d}_{months}M"
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def populated_chunks(cursor, target, chunks):
+    """Start dates of the chunks that already have rows in the target."""
+    try:
+        cursor.execute(
+            f"SELECT DISTINCT O_ORDERDATE FROM {target} WHERE O_ORDERDATE >= %s AND O_ORDERDATE < %s",
+            (chunks[0][0].isoformat(), chunks[-1][1].isoformat()),
+        )
+    except ProgrammingError as e:
+        # The procedure creates the target on first use. Any other failure must
+        # stop the backfill: treating populated chunks as empty would append
+        # duplicate rows.
+        if e.errno == OBJECT_DOES_NOT_EXIST:
+            return set()
+        raise
+    dates = {row[0] for row in cursor.fetchall()}
+    return {start for start, end in chunks if any(start <= day < end for day in dates)}
+
+
+def completed_chunks(cursor, run_id):
+    """Return the chunk start dates that already succeeded for this run."""
+    cursor.execute(
+        "SELECT CHUNK_START FROM V_PROFILE_BACKFILL_STATUS "
+        "WHERE RUN_ID = %s AND STATUS = 'SUCCEEDED'",
+        (run_id,),
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def log_chunk_start(cursor, run_id, target, chunk, query_id):
+    cursor.execute(
+        "INSERT INTO CUSTOMER_PROFILE_BACKFILL_LOG "
+        "(RUN_ID, TARGET_TABLE, CHUNK_START, CHUNK_END, STATUS, QUERY_ID, STARTED_AT) "
+        "SELECT %s, %s, %s, %s, 'RUNNING', %s, CURRENT_TIMESTAMP()",
+        (run_id, target, chunk[0], chunk[1], query_id),
+    )
+
+
+def log_chunk_end(cursor, query_id, status, message):
+    cursor.execute(
+        "UPDATE CUSTOMER_PROFILE_BACKFILL_LOG "
+        "SET STATUS = %s, MESSAGE = %s, FINISHED_AT = CURRENT_TIMESTAMP() "
+        "WHERE QUERY_ID = %s",
+        (status, message[:1000], query_id),
+    )
+
+
+def run_backfill(conn, chunks, target, run_id, parallelism, populated=frozenset()):
+    """Run chunks as async CALLs, keeping at most `parallelism` in flight.
+
+    Chunks in `populated` replace their slice; the others only insert.
+    """
+    cursor = conn.cursor()
+    pending = list(chunks)
+    in_flight = {}
+    failed = []
+
+    while pending or in_flight:
+        # Top up the in-flight set
+        while pending and len(in_flight) < parallelism:
+            chunk = pending.pop(0)
+            submit = conn.cursor()
+            submit.execute_async(
+                "CALL CREATE_CUSTOMER_PROFILE_SP(%s::DATE, %s::DATE, %s, %s)",
+                (chunk[0].isoformat(), chunk[1].isoformat(), target,
+                 'REPLACE' if chunk[0] in populated else 'APPEND'),
+            )
+            log_chunk_start(cursor, run_id, target, chunk, submit.sfqid)
+            in_flight[submit.sfqid] = (chunk, submit, time.time())
+            print(f"🚀 {chunk[0]} → {chunk[1]} submitted ({submit.sfqid})")
+
+        time.sleep(POLL_SECONDS)
+
+        for query_id in list(in_flight):
+            if conn.is_still_running(conn.get_query_status(query_id)):
+                continue
+
+            chunk, submit, started = in_flight.pop(query_id)
+            elapsed = time.time() - started
+            try:
+                submit.get_results_from_sfqid(query_id)
+                message = submit.fetchone()[0]
+                log_chunk_end(cursor, query_id, 'SUCCEEDED', message)
+                print(f"✅ {chunk[0]} → {chunk[1]} ({elapsed:.1f}s): {message}")
+            except Exception as e:
+                log_chunk_end(cursor, query_id, 'FAILED', str(e))
+                failed.append(chunk)
+                print(f"❌ {chunk[0]} → {chunk[1]} ({elapsed:.1f}s): {e}")
+
+    cursor.close()
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill the customer profile for a past order-date range")
+    parser.add_argument("--start", required=True, type=dt.date.fromisoformat, help="First order date (inclusive)")
+    parser.add_argument("--end", required=True, type=dt.date.fromisoformat, help="Last order date (exclusive)")
+    parser.add_argument("--chunk-months", type=positive_int, default=1, help="Calendar months per chunk (default: 1)")
+    parser.add_argument("--parallelism", type=positive_int, default=4, help="Chunks running at once (default: 4)")
+    parser.add_argument("--target", default=DEFAULT_TARGET, help=f"Table to replay into (default: {DEFAULT_TARGET})")
+    parser.add_argument("--run-id", help="Resume or name a specific run (default: derived from the arguments)")
+    parser.add_argument("--force", action="store_true", help="Reprocess chunks that already succeeded")
+    args = parser.parse_args()
+
+    if args.start >= args.end:
+        parser.error("--start must be before --end")
+
+    run_id = args.run_id or default_run_id(args.target, args.start, args.end, args.chunk_months)
+    chunks = month_chunks(args.start, args.end, args.chunk_months)
+
+    print("⏪ Customer Profile Backfill")
+    print("=" * 60)
+    print(f"🆔 Run: {run_id}")
+    print(f"🎯 Target: {args.target}")
+    print(f"📅 Range: {args.start} → {args.end} ({len(chunks)} chunks, {args.parallelism} at a time)")
+
+    conn = get_snowflake_connection()
+    try:
+        cursor = conn.cursor()
+        if not args.force:
+            done = completed_chunks(cursor, run_id)
+            chunks = [chunk for chunk in chunks if chunk[0] not in done]
+            if done:
+                print(f"⏭️  Skipping {len(done)} chunks that already succeeded")
+        populated = populated_chunks(cursor, args.target, chunks) if chunks else set()
+        if populated:
+            print(f"♻️  {len(populated)} chunks already have rows and will be replaced one at a time")
+        cursor.close()
+
+        started = time.time()
+        failed = run_backfill(conn, chunks, args.target, run_id, args.parallelism, populated)
+        elapsed = time.time() - started
+    finally:
+        conn.close()
+
+    print()
+    if failed:
+        print(f"⚠️  {len(failed)} chunks failed after {elapsed:.1f}s; re-run the same command to retry them")
+        return False
+
+    print(f"🎉 Backfill complete: {len(chunks)} chunks in {elapsed:.1f}s")
+    return True
+
+
+if __name__ == "__main__":
+    main()
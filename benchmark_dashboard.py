@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Dashboard Query Benchmark
+Times the queries dashboards send against the KPI views and inspects each
+query profile, so changes to the view layer can be compared run over run.
+
+Every case runs with the result cache disabled. Latency percentiles, query
+IDs and the sort operators found in the profile are printed and saved as
+JSON under benchmark_results/. Suites with accuracy checks also compare the
+approximate results against the exact ones and report the measured error.
+"""
+
+import argparse
+import datetime as dt
+import json
+import os
+import time
+
+from connection_strings import get_snowflake_connection
+
+RESULTS_DIR = "benchmark_results"
+SORT_OPERATORS = {"Sort", "SortWithLimit"}
+
+# Each suite is a list of (case, variant, sql). The variants of a case run in
+# the same session so they compare directly; "before" variants reproduce the
+# previous view definition and fetch as many rows as their "after" variant.
+SUITES = {
+    "ordering": [
+        ("Product count probe", "before", """
+            SELECT COUNT(*) FROM (
+                SELECT * FROM V_PRODUCT_PERFORMANCE ORDER BY NET_REVENUE DESC
+            )
+        """),
+        ("Product count probe", "after", "SELECT COUNT(*) FROM V_PRODUCT_PERFORMANCE"),
+        ("Product full read", "before", "SELECT * FROM V_PRODUCT_PERFORMANCE ORDER BY NET_REVENUE DESC"),
+        ("Product full read", "after", "SELECT * FROM V_PRODUCT_PERFORMANCE"),
+        ("Product top 100", "before", "SELECT * FROM V_PRODUCT_PERFORMANCE ORDER BY NET_REVENUE DESC LIMIT 100"),
+        ("Product top 100", "after", "SELECT * FROM V_PRODUCT_PERFORMANCE_TOP_100"),
+        ("Customer count probe", "before", """
+            SELECT COUNT(*) FROM (
+                SELECT * FROM V_TOP_CUSTOMERS ORDER BY TOTAL_REVENUE DESC
+            )
+        """),
+        ("Customer count probe", "after", "SELECT COUNT(*) FROM V_TOP_CUSTOMERS"),
+        ("Customer top 100", "before", "SELECT * FROM V_TOP_CUSTOMERS ORDER BY TOTAL_REVENUE DESC LIMIT 100"),
+        ("Customer top 100", "after", "SELECT * FROM V_TOP_CUSTOMERS_TOP_100"),
+        ("Supplier top 100", "before", "SELECT * FROM V_SUPPLIER_PERFORMANCE ORDER BY NET_REVENUE DESC LIMIT 100"),
+        ("Supplier top 100", "after", "SELECT * FROM V_SUPPLIER_PERFORMANCE_TOP_100"),
+    ],
+    "approx_distinct": [
+        ("Monthly revenue by region", "exact", "SELECT * FROM V_MONTHLY_REVENUE_BY_REGION"),
+        ("Monthly revenue by region", "approx", "SELECT * FROM V_MONTHLY_REVENUE_BY_REGION_APPROX"),
+        ("Market segments", "exact", "SELECT * FROM V_MARKET_SEGMENT_ANALYSIS"),
+        ("Market segments", "approx", "SELECT * FROM V_MARKET_SEGMENT_ANALYSIS_APPROX"),
+        ("Yearly customers by region", "exact", """
+            SELECT YEAR(O_ORDERDATE), REGION, COUNT(DISTINCT O_CUSTKEY)
+            FROM V_ORDER_DETAILS GROUP BY 1, 2
+        """),
+        ("Yearly customers by region", "approx", """
+            SELECT YEAR(ORDER_MONTH), REGION, HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH))
+            FROM ORDER_DISTINCT_SKETCHES GROUP BY 1, 2
+        """),
+        ("Profile monthly customers and orders", "exact", """
+            SELECT DATE_TRUNC('MONTH', O_ORDERDATE), COUNT(DISTINCT O_CUSTKEY), COUNT(DISTINCT O_ORDERKEY)
+            FROM CUSTOMER_LINEITEM_PROFILE GROUP BY 1
+        """),
+        ("Profile monthly customers and orders", "approx", """
+            SELECT DATE_TRUNC('MONTH', O_ORDERDATE), APPROX_COUNT_DISTINCT(O_CUSTKEY), APPROX_COUNT_DISTINCT(O_ORDERKEY)
+            FROM CUSTOMER_LINEITEM_PROFILE GROUP BY 1
+        """),
+    ],
+}
+
+# Each check is (metric, exact_sql, approx_sql). Both queries return the group
+# key columns first and the distinct count last.
+ACCURACY_CHECKS = {
+    "approx_distinct": [
+        ("Monthly customers by region",
+         "SELECT ORDER_MONTH, REGION, CUSTOMER_COUNT FROM V_MONTHLY_REVENUE_BY_REGION",
+         "SELECT ORDER_MONTH, REGION, CUSTOMER_COUNT FROM V_MONTHLY_REVENUE_BY_REGION_APPROX"),
+        ("Segment customers by region",
+         "SELECT MARKET_SEGMENT, REGION, CUSTOMER_COUNT FROM V_MARKET_SEGMENT_ANALYSIS",
+         "SELECT MARKET_SEGMENT, REGION, CUSTOMER_COUNT FROM V_MARKET_SEGMENT_ANALYSIS_APPROX"),
+        ("Yearly customers by region",
+         "SELECT YEAR(O_ORDERDATE), REGION, COUNT(DISTINCT O_CUSTKEY) FROM V_ORDER_DETAILS GROUP BY 1, 2",
+         "SELECT YEAR(ORDER_MONTH), REGION, HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH)) "
+         "FROM ORDER_DISTINCT_SKETCHES GROUP BY 1, 2"),
+        ("Profile monthly orders",
+         "SELECT DATE_TRUNC('MONTH', O_ORDERDATE), COUNT(DISTINCT O_ORDERKEY) FROM CUSTOMER_LINEITEM_PROFILE GROUP BY 1",
+         "SELECT DATE_TRUNC('MONTH', O_ORDERDATE), APPROX_COUNT_DISTINCT(O_ORDERKEY) "
+         "FROM CUSTOMER_LINEITEM_PROFILE GROUP BY 1"),
+    ],
+}
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def sort_operators(cursor, query_id):
+    """Return the sort operators Snowflake used for a finished query."""
+    cursor.execute(
+        "SELECT OPERATOR_TYPE FROM TABLE(GET_QUERY_OPERATOR_STATS(%s))",
+        (query_id,),
+    )
+    return sorted({row[0] for row in cursor.fetchall()} & SORT_OPERATORS)
+
+
+def run_case(cursor, sql, runs):
+    """Run one query `runs` times after a warm-up and collect timings."""
+    cursor.execute(sql)
+    cursor.fetchall()
+
+    timings = []
+    query_ids = []
+    for _ in range(runs):
+        start_time = time.time()
+        cursor.execute(sql)
+        rows = cursor.fetchall()
+        timings.append(time.time() - start_time)
+        query_ids.append(cursor.sfqid)
+
+    return {
+        'rows_returned': len(rows),
+        'timings': timings,
+        'p50': percentile(timings, 50),
+        'p95': percentile(timings, 95),
+        'query_ids': query_ids,
+        'sort_operators': sort_operators(cursor, query_ids[-1]),
+    }
+
+
+def run_suite(conn, suite, runs):
+    """Run every case of a suite and print one line per variant."""
+    cursor = conn.cursor()
+    cursor.execute("ALTER SESSION SET USE_CACHED_RESULT = FALSE")
+
+    results = []
+    for case, variant, sql in SUITES[suite]:
+        try:
+            result = run_case(cursor, sql, runs)
+            sorts = ", ".join(result['sort_operators']) or "none"
+            print(f"⏱️  {case} [{variant}]: p50 {result['p50']:.2f}s, "
+                  f"p95 {result['p95']:.2f}s, {result['rows_returned']:,} rows, sort: {sorts}")
+            result['status'] = 'success'
+        except Exception as e:
+            result = {'status': 'failed', 'error': str(e)}
+            print(f"❌ {case} [{variant}]: {e}")
+        result.update({'case': case, 'variant': variant, 'sql': " ".join(sql.split())})
+        results.append(result)
+
+    cursor.close()
+    return results
+
+
+def measure_error(cursor, exact_sql, approx_sql):
+    """Compare approximate counts with exact ones group by group."""
+    values = {}
+    for label, sql in (('exact', exact_sql), ('approx', approx_sql)):
+        cursor.execute(sql)
+        values[label] = {tuple(row[:-1]): row[-1] for row in cursor.fetchall()}
+
+    errors = [
+        abs(values['approx'].get(key, 0) - exact) / exact
+        for key, exact in values['exact'].items()
+        if exact
+    ]
+    return {
+        'groups': len(errors),
+        'missing_groups': len(values['exact'].keys() - values['approx'].keys()),
+        'mean_relative_error': sum(errors) / len(errors) if errors else 0.0,
+        'max_relative_error': max(errors, default=0.0),
+    }
+
+
+def run_accuracy_checks(conn, suite):
+    """Run the suite's accuracy checks and print the measured error bounds."""
+    checks = ACCURACY_CHECKS.get(suite, [])
+    if not checks:
+        return []
+
+    print("\n🎯 Accuracy")
+    print("-" * 60)
+    cursor = conn.cursor()
+    accuracy = []
+    for metric, exact_sql, approx_sql in checks:
+        try:
+            result = measure_error(cursor, exact_sql, approx_sql)
+            print(f"📏 {metric}: mean error {result['mean_relative_error']:.2%}, "
+                  f"max error {result['max_relative_error']:.2%} over {result['groups']} groups")
+            result['status'] = 'success'
+        except Exception as e:
+            result = {'status': 'failed', 'error': str(e)}
+            print(f"❌ {metric}: {e}")
+        result['metric'] = metric
+        accuracy.append(result)
+
+    cursor.close()
+    return accuracy
+
+
+def warehouse_info(conn):
+    """Name and size of the warehouse the benchmark runs on."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT CURRENT_WAREHOUSE()")
+    name = cursor.fetchone()[0]
+    cursor.execute(f"SHOW WAREHOUSES LIKE '{name}'")
+    columns = [column[0].lower() for column in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    cursor.close()
+    return {'warehouse': name, 'warehouse_size': rows[0]['size'] if rows else None}
+
+
+def save_results(suite, runs, results, accuracy=None, output_dir=RESULTS_DIR, warehouse=None):
+    """Write the run to a timestamped JSON file and return its path.
+
+    The warehouse size is recorded so recommend_warehouse.py can calibrate
+    how latency scales between sizes.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    timestamp = dt.datetime.now(dt.timezone.utc)
+    path = os.path.join(output_dir, f"{suite}_{timestamp:%Y%m%d_%H%M%S}.json")
+    with open(path, "w") as f:
+        json.dump({
+            'suite': suite,
+            'runs': runs,
+            'started_at': timestamp.isoformat(),
+            'results': results,
+            'accuracy': accuracy or [],
+            **(warehouse or {}),
+        }, f, indent=2, default=str)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard queries against the KPI views")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="ordering", help="Benchmark suite (default: ordering)")
+    parser.add_argument("--runs", type=int, default=5, help="Timed runs per query after one warm-up (default: 5)")
+    parser.add_argument("--warehouse", help="Warehouse to benchmark on (default: the connection default)")
+    args = parser.parse_args()
+
+    print(f"⚡ Dashboard Benchmark: {args.suite}")
+    print("=" * 60)
+
+    overrides = {'warehouse': args.warehouse} if args.warehouse else {}
+    conn = get_snowflake_connection(**overrides)
+    try:
+        warehouse = warehouse_info(conn)
+        results = run_suite(conn, args.suite, args.runs)
+        accuracy = run_accuracy_checks(conn, args.suite)
+    finally:
+        conn.close()
+
+    path = save_results(args.suite, args.runs, results, accuracy, warehouse=warehouse)
+    print(f"\n💾 Results saved to {path}")
+    return all(r['status'] == 'success' for r in results + accuracy)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+BI Query Catalog
+The dashboard queries each BI tool sends, shared by the test harnesses and
+the local mirror so every consumer runs the same SQL.
+
+Each catalog maps a query name to its SQL. The Power BI sample file
+(sql/powerbi_sample_queries.sql) can be added with load_sql_catalog().
+"""
+
+import os
+import re
+
+TABLEAU_QUERIES = {
+    "Monthly Revenue Trend": """
+        SELECT 
+            DATE_TRUNC('MONTH', O_ORDERDATE) as month,
+            SUM(PRICE_AFTER_DISCOUNT) as revenue,
+            COUNT(DISTINCT O_CUSTKEY) as customers
+        FROM CUSTOMER_LINEITEM_PROFILE
+        GROUP BY month
+        ORDER BY month DESC
+        LIMIT 12
+    """,
+    "Top Customers": """
+        SELECT 
+            O_CUSTKEY as customer_id,
+            COUNT(DISTINCT O_ORDERKEY) as orders,
+            SUM(PRICE_AFTER_DISCOUNT) as revenue
+        FROM CUSTOMER_LINEITEM_PROFILE
+        GROUP BY customer_id
+        ORDER BY revenue DESC
+        LIMIT 10
+    """,
+    "Order Status Summary": """
+        SELECT 
+            O_ORDERSTATUS,
+            COUNT(DISTINCT O_CUSTKEY) as customers,
+            COUNT(DISTINCT O_ORDERKEY) as orders,
+            SUM(PRICE_AFTER_DISCOUNT) as revenue
+        FROM CUSTOMER_LINEITEM_PROFILE
+        GROUP BY O_ORDERSTATUS
+    """
+}
+
+POWERBI_QUERIES = {
+    "Executive KPIs": """
+        SELECT 
+            COUNT(DISTINCT O_CUSTKEY) as total_customers,
+            COUNT(DISTINCT O_ORDERKEY) as total_orders,
+            SUM(PRICE_AFTER_DISCOUNT) as total_revenue,
+            AVG(PRICE_AFTER_DISCOUNT) as avg_order_value
+        FROM CUSTOMER_LINEITEM_PROFILE
+    """,
+    "Yearly Performance": """
+        SELECT 
+            YEAR(O_ORDERDATE) as order_year,
+            COUNT(DISTINCT O_CUSTKEY) as customers,
+            SUM(PRICE_AFTER_DISCOUNT) as revenue
+        FROM CUSTOMER_LINEITEM_PROFILE
+        GROUP BY order_year
+        ORDER BY order_year
+    """,
+    "Customer Segments": """
+        SELECT 
+            CASE 
+                WHEN order_count >= 10 THEN 'High Frequency'
+                WHEN order_count >= 5 THEN 'Medium Frequency'
+                ELSE 'Low Frequency'
+            END as customer_segment,
+            COUNT(*) as customer_count,
+            SUM(total_revenue) as segment_revenue
+        FROM (
+            SELECT 
+                O_CUSTKEY,
+                COUNT(DISTINCT O_ORDERKEY) as order_count,
+                SUM(PRICE_AFTER_DISCOUNT) as total_revenue
+            FROM CUSTOMER_LINEITEM_PROFILE
+            GROUP BY O_CUSTKEY
+        ) customer_summary
+        GROUP BY customer_segment
+    """
+}
+
+LOOKER_QUERIES = {
+    "Customer Analysis": """
+        SELECT 
+            O_CUSTKEY as customer_key,
+            COUNT(DISTINCT O_ORDERKEY) as orders,
+            SUM(PRICE_AFTER_DISCOUNT) as revenue,
+            AVG(PRICE_PER_QTY) as avg_price_per_qty,
+            MIN(O_ORDERDATE) as first_order,
+            MAX(O_ORDERDATE) as last_order
+        FROM CUSTOMER_LINEITEM_PROFILE
+        GROUP BY customer_key
+        ORDER BY revenue DESC
+        LIMIT 5
+    """,
+    "Monthly Metrics": """
+        SELECT 
+            DATE_TRUNC('MONTH', O_ORDERDATE) as month,
+            O_ORDERSTATUS as order_status,
+            COUNT(DISTINCT O_CUSTKEY) as customers,
+            SUM(PRICE_AFTER_DISCOUNT) as revenue
+        FROM CUSTOMER_LINEITEM_PROFILE
+        GROUP BY month, order_status
+        ORDER BY month DESC, revenue DESC
+        LIMIT 10
+    """,
+    "Performance Summary": """
+        SELECT 
+            'Performance Metrics' as metric_type,
+            COUNT(*) as total_line_items,
+            COUNT(DISTINCT O_ORDERKEY) as unique_orders,
+            COUNT(DISTINCT O_CUSTKEY) as unique_customers,
+            MIN(O_ORDERDATE) as earliest_date,
+            MAX(O_ORDERDATE) as latest_date
+        FROM CUSTOMER_LINEITEM_PROFILE
+    """
+}
+
+CATALOGS = {
+    'tableau': TABLEAU_QUERIES,
+    'powerbi': POWERBI_QUERIES,
+    'looker': LOOKER_QUERIES,
+}
+
+POWERBI_SAMPLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sql", "powerbi_sample_queries.sql")
+
+
+def load_sql_catalog(path=POWERBI_SAMPLE_FILE):
+    """Read a file of numbered, commented queries into a name -> SQL dict."""
+    from query_router import split_statements
+
+    with open(path) as f:
+        return {re.sub(r"^\d+\.\s*", "", title): sql for title, sql in split_statements(f.read())}
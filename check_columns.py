@@ -1,10 +1,12 @@
 import snowflake.connector
 import getpass
 
+from connection_strings import workload_warehouse
+
 password = getpass.getpass("Enter password: ")
 conn = snowflake.connector.connect(
     account='JHYWOUK-WA83239', user='ALGORYTHMOS', password=password,
-    role='DASHBOARD_ANALYST_ROLE', warehouse='COMPUTE_WH', 
+    role='DASHBOARD_ANALYST_ROLE', warehouse=workload_warehouse('validation'), 
     database='TPCH_DASHBOARDS', schema='PUBLIC'
 )
 cursor = conn.cursor()
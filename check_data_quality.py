@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Profile Data-Quality Check
+Prints the latest per-column statistics of CUSTOMER_LINEITEM_PROFILE from
+PROFILE_COLUMN_STATS (sql/18_data_quality.sql) against the previous run and
+exits with 1 when any column drifted, so it can gate CI or a deployment.
+CUSTOMER_PROFILE_DQ_TASK profiles every publish; --run profiles now.
+
+Usage:
+    python check_data_quality.py
+    python check_data_quality.py --run
+    python check_data_quality.py --column PRICE_PER_QTY DISCOUNT_AMOUNT --format json
+"""
+
+import argparse
+import json
+import sys
+
+from connection_strings import get_snowflake_connection
+
+PROFILE_TABLE = "CUSTOMER_LINEITEM_PROFILE"
+
+
+def rows_as_dicts(cursor):
+    columns = [column[0].lower() for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def latest_run(cursor, table, columns):
+    """Drift rows of the latest profiled run, one per column."""
+    cursor.execute("""
+        SELECT RUN_ID, PREV_RUN_ID, PROFILED_AT, COLUMN_NAME, DATA_TYPE, ROW_COUNT, PREV_ROW_COUNT, NULL_RATE,
+               PREV_NULL_RATE, DISTINCT_ESTIMATE, PREV_DISTINCT_ESTIMATE,
+               P01, P50, P99, PREV_P50, PREV_P99, MAX_VALUE, DRIFT
+        FROM V_PROFILE_DQ_DRIFT
+        WHERE TABLE_NAME = %s
+        QUALIFY PROFILED_AT = MAX(PROFILED_AT) OVER ()
+        ORDER BY COLUMN_NAME
+    """, (table,))
+    rows = rows_as_dicts(cursor)
+    for row in rows:
+        row['drift'] = json.loads(row['drift']) if row['drift'] else []
+    return [row for row in rows if not columns or row['column_name'] in columns]
+
+
+def change(current, previous):
+    if current is None or previous is None:
+        return ""
+    if not previous:
+        return " (prev 0)"
+    return f" ({(current - previous) / abs(previous):+.0%})"
+
+
+def print_table(rows):
+    if not rows:
+        print("ℹ️  No profiled runs yet (CALL PROFILE_DATA_QUALITY_SP())")
+        return
+    print(f"🆔 Run {rows[0]['run_id']} at {rows[0]['profiled_at']}, previous run {rows[0]['prev_run_id'] or '(none)'}")
+    print(f"📊 {rows[0]['row_count']:,} rows{change(rows[0]['row_count'], rows[0]['prev_row_count'])}")
+    print("-" * 60)
+    for row in rows:
+        icon = "⚠️ " if row['drift'] else "✅"
+        line = (f"{icon} {row['column_name']:<22} nulls {row['null_rate']:.2%}, "
+                f"~{row['distinct_estimate']:,} distinct{change(row['distinct_estimate'], row['prev_distinct_estimate'])}")
+        if row['p50'] is not None:
+            line += (f", p50 {row['p50']:,.2f}{change(row['p50'], row['prev_p50'])}"
+                     f", p99 {row['p99']:,.2f}{change(row['p99'], row['prev_p99'])}")
+        print(line)
+        if row['drift']:
+            print(f"      drift: {', '.join(row['drift'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check profile column statistics for drift")
+    parser.add_argument("--run", action="store_true", help="Profile the table now before checking")
+    parser.add_argument("--table", default=PROFILE_TABLE, help=f"Profiled table (default: {PROFILE_TABLE})")
+    parser.add_argument("--column", nargs="+", type=str.upper, default=[], help="Only these columns")
+    parser.add_argument("--format", choices=["table", "json"], default="table", help="Output format (default: table)")
+    args = parser.parse_args()
+
+    conn = get_snowflake_connection()
+    try:
+        cursor = conn.cursor()
+        message = None
+        if args.run:
+            cursor.execute("CALL PROFILE_DATA_QUALITY_SP(%s)", (args.table,))
+            message = cursor.fetchone()[0]
+        rows = latest_run(cursor, args.table.upper(), args.column)
+        cursor.close()
+    finally:
+        conn.close()
+
+    if args.format == "json":
+        json.dump({'table': args.table.upper(), 'message': message, 'columns': rows}, sys.stdout, indent=2, default=str)
+        print()
+    else:
+        print("🔬 Profile Data-Quality Check")
+        print("=" * 60)
+        if message:
+            print(message)
+        print_table(rows)
+
+    sys.exit(1 if any(row['drift'] for row in rows) or (message or "").startswith("❌") else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,10 @@ BI Connection String Generator
 Generates ready-to-use connection strings and configurations for all BI tools
 """
 
+from urllib.parse import quote
+
+from connection_strings import build_query_tag, odbc_value
+
 def generate_connection_strings():
     """Generate connection strings for different BI tools."""
     
@@ -16,7 +20,7 @@ def generate_connection_strings():
         'account': 'JHYWOUK-WA83239',
         'database': 'TPCH_DASHBOARDS',
         'schema': 'PUBLIC',
-        'warehouse': 'COMPUTE_WH',
+        'warehouse': 'ANALYTICS_WH',
         'username': 'ALGORYTHMOS',
         'role': 'DASHBOARD_ANALYST_ROLE'
     }
@@ -39,6 +43,7 @@ def generate_connection_strings():
     print(f"   Warehouse: {connection_params['warehouse']}")
     print(f"   Database: {connection_params['database']}")
     print(f"   Role: {connection_params['role']}")
+    print(f"   Initial SQL: ALTER SESSION SET QUERY_TAG = '{build_query_tag('tableau', dashboard='[WorkbookName]')}'")
     
     print("\n📊 Power BI Connection")
     print("-" * 40)
@@ -49,6 +54,7 @@ def generate_connection_strings():
     print(f"   Username: {connection_params['username']}")
     print("   Password: [Your Snowflake Password]")
     print(f"   Database: {connection_params['database']}")
+    print("   Query tag: use POWERBI_USER, whose default QUERY_TAG is set in sql/bi_security_setup.sql")
     
     print("\n🔍 Looker Studio Connection")
     print("-" * 40)
@@ -71,18 +77,18 @@ def generate_connection_strings():
     print("   Password: [Your Snowflake Password]")
     print(f"   Warehouse: {connection_params['warehouse']}")
     print(f"   Role: {connection_params['role']}")
-    print("   Additional JDBC: CLIENT_SESSION_KEEP_ALIVE=true")
+    print(f"   Additional JDBC: CLIENT_SESSION_KEEP_ALIVE=true&query_tag={quote(build_query_tag('looker'))}")
     
     print("\n🔌 JDBC Connection String")
     print("-" * 40)
-    jdbc_url = f"jdbc:snowflake://{connection_params['server']}/?warehouse={connection_params['warehouse']}&db={connection_params['database']}&schema={connection_params['schema']}&role={connection_params['role']}"
+    jdbc_url = f"jdbc:snowflake://{connection_params['server']}/?warehouse={connection_params['warehouse']}&db={connection_params['database']}&schema={connection_params['schema']}&role={connection_params['role']}&query_tag={quote(build_query_tag('jdbc'))}"
     print(f"   URL: {jdbc_url}")
     print(f"   Username: {connection_params['username']}")
     print("   Password: [Your Snowflake Password]")
     
     print("\n🔌 ODBC Connection String")  
     print("-" * 40)
-    odbc_string = f"Driver=SnowflakeDSIIDriver;Server={connection_params['server']};Database={connection_params['database']};Schema={connection_params['schema']};Warehouse={connection_params['warehouse']};Role={connection_params['role']};UID={connection_params['username']};PWD=[Your Password]"
+    odbc_string = f"Driver=SnowflakeDSIIDriver;Server={connection_params['server']};Database={connection_params['database']};Schema={connection_params['schema']};Warehouse={connection_params['warehouse']};Role={connection_params['role']};UID={connection_params['username']};PWD=[Your Password];query_tag=" + odbc_value(build_query_tag('odbc'))
     print(f"   Connection String:")
     print(f"   {odbc_string}")
     
@@ -96,7 +102,8 @@ def generate_connection_strings():
     print(f"       role='{connection_params['role']}',")
     print(f"       warehouse='{connection_params['warehouse']}',") 
     print(f"       database='{connection_params['database']}',")
-    print(f"       schema='{connection_params['schema']}'")
+    print(f"       schema='{connection_params['schema']}',")
+    print(f"       session_parameters={{'QUERY_TAG': '{build_query_tag('python', suite='[your script]')}'}}")
     print("   )")
     
     print("\n📊 Available Data Sources")
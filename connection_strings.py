@@ -2,8 +2,108 @@
 """
 BI Connection String Generator
 Generates ready-to-copy connection strings for all BI tools
+and opens Snowflake connections for the command-line utilities
 """
 
+import getpass
+import json
+import os
+import sys
+from urllib.parse import quote
+
+import snowflake.connector
+from dotenv import load_dotenv
+
+QUERY_TAG_APP = 'tpch_dashboards'
+
+# Workload classes and the warehouse each one runs on (created in
+# sql/01_schema.sql). SNOW_<CLASS>_WAREHOUSE overrides a class's warehouse.
+WORKLOADS = {
+    'pipeline': {'warehouse': 'PIPELINE_WH', 'statement_timeout': 7200},
+    'interactive': {'warehouse': 'ANALYTICS_WH', 'statement_timeout': 300},
+    'validation': {'warehouse': 'VALIDATION_WH', 'statement_timeout': 1800},
+}
+DEFAULT_WORKLOAD = 'validation'
+
+# Workload of each command-line script; anything else is validation
+SCRIPT_WORKLOADS = {
+    'activate_pipeline': 'pipeline',
+    'backfill_profile': 'pipeline',
+    'export_parquet': 'pipeline',
+    'sync_local_mirror': 'pipeline',
+    'explore_database': 'interactive',
+    'powerbi_assistant': 'interactive',
+    'warm_dashboard_cache': 'interactive',
+}
+
+
+def build_query_tag(tool, dashboard=None, suite=None, workload=None):
+    """Structured QUERY_TAG used to attribute warehouse load (sql/15_query_attribution.sql)."""
+    tag = {'app': QUERY_TAG_APP, 'tool': tool}
+    if dashboard:
+        tag['dashboard'] = dashboard
+    if suite:
+        tag['suite'] = suite
+    if workload:
+        tag['workload'] = workload
+    return json.dumps(tag, separators=(',', ':'))
+
+
+def odbc_value(value):
+    """Brace-quote an ODBC attribute value so ';', '{' and '}' in it survive parsing."""
+    return '{' + value.replace('}', '}}') + '}'
+
+
+def workload_for(script):
+    """Workload class of a script, unless SNOW_WORKLOAD forces one."""
+    workload = os.getenv('SNOW_WORKLOAD') or SCRIPT_WORKLOADS.get(script, DEFAULT_WORKLOAD)
+    if workload not in WORKLOADS:
+        raise ValueError(f"Unknown workload '{workload}'; expected one of {', '.join(WORKLOADS)}")
+    return workload
+
+
+def workload_warehouse(workload):
+    """Warehouse a workload class runs on."""
+    return os.getenv(f'SNOW_{workload.upper()}_WAREHOUSE', WORKLOADS[workload]['warehouse'])
+
+
+def get_snowflake_connection(password=None, query_tag=None, workload=None, **overrides):
+    """Open a Snowflake connection from SNOW_* environment settings.
+
+    The password is read from SNOW_PASSWORD and prompted for when unset.
+    The warehouse and statement timeout follow the workload class, which
+    defaults to the calling script's (SCRIPT_WORKLOADS). Keyword arguments
+    override any connect() parameter (role, warehouse, ...). Sessions are
+    tagged with the calling script as the suite unless `query_tag` or
+    SNOW_QUERY_TAG says otherwise.
+    """
+    load_dotenv()
+
+    if password is None:
+        password = os.getenv('SNOW_PASSWORD') or getpass.getpass("Enter your Snowflake password: ")
+
+    params = {
+        'account': os.getenv('SNOW_ACCOUNT', 'JHYWOUK-WA83239'),
+        'user': os.getenv('SNOW_USER', 'ALGORYTHMOS'),
+        'password': password,
+        'role': os.getenv('SNOW_ROLE', 'ACCOUNTADMIN'),
+        'database': os.getenv('SNOW_DATABASE', 'TPCH_DASHBOARDS'),
+        'schema': os.getenv('SNOW_SCHEMA', 'PUBLIC'),
+    }
+    script = os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0]
+    workload = workload or workload_for(script)
+    params['warehouse'] = workload_warehouse(workload)
+    session_parameters = {
+        'QUERY_TAG': query_tag or os.getenv('SNOW_QUERY_TAG') or build_query_tag('python', suite=script, workload=workload),
+        'STATEMENT_TIMEOUT_IN_SECONDS': WORKLOADS[workload]['statement_timeout'],
+    }
+    session_parameters.update(overrides.pop('session_parameters', {}))
+    params['session_parameters'] = session_parameters
+    params.update(overrides)
+
+    return snowflake.connector.connect(**params)
+
+
 def generate_connection_strings():
     """Generate connection strings for all BI tools"""
     
@@ -23,7 +123,7 @@ def generate_connection_strings():
     print("   Server: JHYWOUK-WA83239.snowflakecomputing.com")
     print("   Username: ALGORYTHMOS")
     print("   Password: [Your Snowflake Password]")
-    print("   Warehouse: COMPUTE_WH")
+    print("   Warehouse: ANALYTICS_WH")
     print("   Database: TPCH_DASHBOARDS")
     print("   Schema: PUBLIC")
     print("   Role: DASHBOARD_ANALYST_ROLE")
@@ -35,7 +135,7 @@ def generate_connection_strings():
     print("Connection Steps:")
     print("   1. Get Data → More → Database → Snowflake")
     print("   2. Server: JHYWOUK-WA83239.snowflakecomputing.com")
-    print("   3. Warehouse: COMPUTE_WH")
+    print("   3. Warehouse: ANALYTICS_WH")
     print("   4. Authentication: Database")
     print("   5. Username: ALGORYTHMOS")
     print("   6. Password: [Your Snowflake Password]")
@@ -49,7 +149,7 @@ def generate_connection_strings():
     print("Connection Details:")
     print("   Connector: Snowflake (or Partner Connector)")
     print("   Server: JHYWOUK-WA83239.snowflakecomputing.com")
-    print("   Warehouse: COMPUTE_WH")
+    print("   Warehouse: ANALYTICS_WH")
     print("   Database: TPCH_DASHBOARDS")
     print("   Schema: PUBLIC")
     print("   Username: ALGORYTHMOS")
@@ -67,8 +167,9 @@ def generate_connection_strings():
     print("   Schema: PUBLIC")
     print("   Username: LOOKER_USER (or ALGORYTHMOS)")
     print("   Password: [Your Snowflake Password]")
-    print("   Warehouse: COMPUTE_WH")
+    print("   Warehouse: ANALYTICS_WH")
     print("   Role: LOOKER_ROLE (or DASHBOARD_ANALYST_ROLE)")
+    print(f"   Additional JDBC: query_tag={quote(build_query_tag('looker'))}")
     print("   LookML Model: config/looker_model.lkml")
     print()
     
@@ -76,11 +177,12 @@ def generate_connection_strings():
     print("🔗 JDBC/ODBC CONNECTION (ANY BI TOOL)")
     print("-" * 40)
     print("JDBC URL:")
-    jdbc_url = "jdbc:snowflake://JHYWOUK-WA83239.snowflakecomputing.com/?warehouse=COMPUTE_WH&db=TPCH_DASHBOARDS&schema=PUBLIC&role=DASHBOARD_ANALYST_ROLE"
+    jdbc_tag = quote(build_query_tag('jdbc'))
+    jdbc_url = f"jdbc:snowflake://JHYWOUK-WA83239.snowflakecomputing.com/?warehouse=ANALYTICS_WH&db=TPCH_DASHBOARDS&schema=PUBLIC&role=DASHBOARD_ANALYST_ROLE&query_tag={jdbc_tag}"
     print(f"   {jdbc_url}")
     print()
     print("ODBC Connection String:")
-    odbc_str = "Driver={SnowflakeDSIIDriver};Server=JHYWOUK-WA83239.snowflakecomputing.com;Database=TPCH_DASHBOARDS;Schema=PUBLIC;Warehouse=COMPUTE_WH;Role=DASHBOARD_ANALYST_ROLE"
+    odbc_str = "Driver={SnowflakeDSIIDriver};Server=JHYWOUK-WA83239.snowflakecomputing.com;Database=TPCH_DASHBOARDS;Schema=PUBLIC;Warehouse=ANALYTICS_WH;Role=DASHBOARD_ANALYST_ROLE;query_tag=" + odbc_value(build_query_tag('odbc'))
     print(f"   {odbc_str}")
     print("   Username: ALGORYTHMOS")
     print("   Password: [Your Snowflake Password]")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Profile Snapshot Diff
+Shows what changed between two CUSTOMER_LINEITEM_PROFILE snapshots, or a
+snapshot and the current table, by calling DIFF_PROFILE_SNAPSHOTS_SP
+(sql/17_snapshot_diff.sql). The procedure compares hash aggregates over key
+ranges and only reads back the ranges that differ, so two 4.5M-row versions
+cost a couple of aggregate scans rather than a full outer join.
+
+Usage:
+    python diff_profile_snapshots.py --list
+    python diff_profile_snapshots.py                        # previous snapshot vs. current
+    python diff_profile_snapshots.py --from CUSTOMER_LINEITEM_PROFILE_20240101_100000 \\
+        --to CUSTOMER_LINEITEM_PROFILE_20240101_110000 --show 20
+"""
+
+import argparse
+import json
+import re
+import sys
+
+from connection_strings import get_snowflake_connection
+
+PROFILE_TABLE = "CUSTOMER_LINEITEM_PROFILE"
+
+
+def rows_as_dicts(cursor):
+    columns = [column[0].lower() for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def list_snapshots(cursor):
+    cursor.execute(f"SHOW TABLES LIKE '{PROFILE_TABLE}_%'")
+    snapshots = [t for t in rows_as_dicts(cursor) if t['name'][-6:].isdigit()]
+    print("📸 Profile snapshots")
+    print("-" * 60)
+    for t in sorted(snapshots, key=lambda t: t['name']):
+        print(f"   {t['name']}: {t['rows']:,} rows")
+
+
+def run_diff(cursor, from_table, to_table, key, buckets, max_row_diffs):
+    """Call the diff procedure; returns the diff ID."""
+    cursor.execute("CALL DIFF_PROFILE_SNAPSHOTS_SP(%s, %s, %s, %s, %s)",
+                   (from_table, to_table, key, buckets, max_row_diffs))
+    message = cursor.fetchone()[0]
+    print(message)
+    match = re.search(r"Diff ([0-9a-f-]{36})", message)
+    if not match:
+        sys.exit(1)
+    return match.group(1)
+
+
+def print_diff(cursor, diff_id, show):
+    cursor.execute("SELECT * FROM PROFILE_DIFF_LOG WHERE DIFF_ID = %s", (diff_id,))
+    log = rows_as_dicts(cursor)[0]
+    print(f"\n🔍 {log['from_table']} → {log['to_table']} (key {log['key_columns']}, {log['elapsed_s']:.1f}s)")
+    print("-" * 60)
+    print(f"   Buckets changed: {log['changed_buckets']:,} of {log['buckets']:,}")
+    print(f"   ➕ Inserted: {log['inserted_keys']:,}   ➖ Deleted: {log['deleted_keys']:,}   "
+          f"✏️  Updated: {log['updated_keys']:,}")
+    print(f"   Rows of changed keys: {log['rows_before']:,} before, {log['rows_after']:,} after")
+    for label, columns in (("Added columns", log['added_columns']), ("Dropped columns", log['dropped_columns'])):
+        if columns:
+            print(f"   ⚠️  {label}: {', '.join(json.loads(columns))}")
+    if log['row_diffs'] is None:
+        print("   ℹ️  Too many changed rows for a row-level diff; see PROFILE_DIFF_CHANGES")
+
+    if not show:
+        return
+    cursor.execute("""
+        SELECT CHANGE_TYPE, KEY, ROWS_BEFORE, ROWS_AFTER, CHANGED_COLUMNS
+        FROM PROFILE_DIFF_CHANGES
+        WHERE DIFF_ID = %s
+        ORDER BY CHANGE_TYPE, KEY::VARCHAR
+        LIMIT %s
+    """, (diff_id, show))
+    icons = {'INSERTED': '➕', 'DELETED': '➖', 'UPDATED': '✏️ '}
+    print(f"\n📋 First {show} changes")
+    for change_type, key, rows_before, rows_after, changed_columns in cursor.fetchall():
+        key = ", ".join(f"{k}={v}" for k, v in json.loads(key).items())
+        detail = f"{rows_before or 0} → {rows_after or 0} rows"
+        if changed_columns:
+            detail += f", changed: {', '.join(json.loads(changed_columns))}"
+        print(f"   {icons[change_type]} {key}: {detail}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff two customer profile snapshots")
+    parser.add_argument("--list", action="store_true", help="List the available snapshots")
+    parser.add_argument("--from", dest="from_table", help="Older snapshot (default: the previous one)")
+    parser.add_argument("--to", dest="to_table", default=PROFILE_TABLE, help=f"Newer version (default: {PROFILE_TABLE})")
+    parser.add_argument("--key", default="L_ORDERKEY", help="Comma-separated key columns (default: L_ORDERKEY)")
+    parser.add_argument("--buckets", type=int, default=1024, help="Key-range buckets (default: 1024)")
+    parser.add_argument("--max-row-diffs", type=int, default=100000,
+                        help="Skip the row-level diff above this many changed rows (default: 100000)")
+    parser.add_argument("--show", type=int, default=10, help="Changed keys to print (default: 10)")
+    args = parser.parse_args()
+
+    print("🔍 Profile Snapshot Diff")
+    print("=" * 60)
+
+    conn = get_snowflake_connection()
+    try:
+        cursor = conn.cursor()
+        if args.list:
+            list_snapshots(cursor)
+        else:
+            diff_id = run_diff(cursor, args.from_table, args.to_table, args.key, args.buckets, args.max_row_diffs)
+            print_diff(cursor, diff_id, args.show)
+        cursor.close()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,107 +1,287 @@
 #!/usr/bin/env python3
 """
-Quick database explorer to show all objects in TPCH_DASHBOARDS
+Database Explorer
+Crawls the tables, views, procedures and tasks of every schema in one or more
+databases. The metadata queries run as asynchronous Snowflake queries, with a
+bounded number in flight, and the results go to a local catalog cache.
+
+Each run lists objects with one INFORMATION_SCHEMA query per database, plus
+SHOW SCHEMAS and SHOW TASKS. It describes again only the tables and views whose
+LAST_ALTERED moved since the cached crawl, so re-exploring an account with
+dozens of schemas mostly reads the cache. Row counts and sizes come from
+metadata, so tables are not scanned.
+
+Usage:
+    python explore_database.py
+    python explore_database.py --database TPCH_DASHBOARDS 'ANALYTICS_*' --schema 'PUB*'
+    python explore_database.py --type table view --name '*PROFILE*' --columns
+    python explore_database.py --format json --cached      # no connection, cache only
 """
 
-import snowflake.connector
-import getpass
+import argparse
+import asyncio
+import fnmatch
+import json
 import os
-from dotenv import load_dotenv
-
-def explore_database():
-    load_dotenv()
-    
-    password = getpass.getpass("Enter your Snowflake password: ")
-    
-    conn = snowflake.connector.connect(
-        account='JHYWOUK-WA83239',
-        user='ALGORYTHMOS',
-        password=password,
-        role='ACCOUNTADMIN',
-        warehouse='COMPUTE_WH',
-        database='TPCH_DASHBOARDS',
-        schema='PUBLIC'
+import sys
+import time
+from datetime import datetime
+
+from connection_strings import get_snowflake_connection
+
+CATALOG_CACHE = os.getenv('SNOW_CATALOG_CACHE', '.catalog_cache.json')
+DEFAULT_DATABASE = os.getenv('SNOW_DATABASE', 'TPCH_DASHBOARDS')
+DEFAULT_CONCURRENCY = 8
+POLL_MIN_SECONDS = 0.1
+POLL_MAX_SECONDS = 1.0
+OBJECT_TYPES = ('table', 'view', 'procedure', 'task')
+SYSTEM_SCHEMAS = {'INFORMATION_SCHEMA'}
+
+
+def rows_as_dicts(cursor):
+    columns = [column[0].lower() for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def matches(name, patterns):
+    return not patterns or any(fnmatch.fnmatchcase(name, pattern.upper()) for pattern in patterns)
+
+
+async def run_query(conn, limit, sql, params=None):
+    """Run one statement as an async Snowflake query; `limit` bounds how many are in flight."""
+    async with limit:
+        cursor = conn.cursor()
+        try:
+            await asyncio.to_thread(cursor.execute_async, sql, params)
+            query_id = cursor.sfqid
+            delay = POLL_MIN_SECONDS
+            while conn.is_still_running(await asyncio.to_thread(conn.get_query_status_throw_if_error, query_id)):
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, POLL_MAX_SECONDS)
+            await asyncio.to_thread(cursor.get_results_from_sfqid, query_id)
+            return await asyncio.to_thread(rows_as_dicts, cursor)
+        finally:
+            cursor.close()
+
+
+def load_cache(path=CATALOG_CACHE):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'databases': {}}
+
+
+def save_cache(catalog, path=CATALOG_CACHE):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(catalog, f, indent=1, default=str)
+    os.replace(tmp, path)
+
+
+async def list_databases(conn, limit, patterns):
+    """Database names matching `patterns`; plain names are used as given."""
+    if not any(set(pattern) & set('*?[') for pattern in patterns):
+        return [pattern.upper() for pattern in patterns]
+    rows = await run_query(conn, limit, "SHOW DATABASES")
+    return sorted(row['name'] for row in rows if matches(row['name'], patterns))
+
+
+async def list_objects(conn, limit, database):
+    """Schemas, tables/views, procedures and tasks of one database, four queries at once."""
+    db = quote(database)
+    schemas, tables, procedures, tasks = await asyncio.gather(
+        run_query(conn, limit, f"SHOW SCHEMAS IN DATABASE {db}"),
+        run_query(conn, limit, f"""
+            SELECT TABLE_SCHEMA, TABLE_NAME, TABLE_TYPE, ROW_COUNT, BYTES, LAST_ALTERED, COMMENT
+            FROM {db}.INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA <> 'INFORMATION_SCHEMA'
+        """),
+        run_query(conn, limit, f"""
+            SELECT PROCEDURE_SCHEMA, PROCEDURE_NAME, ARGUMENT_SIGNATURE, PROCEDURE_LANGUAGE, LAST_ALTERED
+            FROM {db}.INFORMATION_SCHEMA.PROCEDURES
+        """),
+        run_query(conn, limit, f"SHOW TASKS IN DATABASE {db}"),
+    )
+    return schemas, tables, procedures, tasks
+
+
+async def describe_tables(conn, limit, database, schema, table_names):
+    """Column lists of `table_names` in one schema: {table: [columns]}."""
+    sql = f"""
+        SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE
+        FROM {quote(database)}.INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = %s AND TABLE_NAME IN ({', '.join(['%s'] * len(table_names))})
+        ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """
+    columns = {name: [] for name in table_names}
+    for row in await run_query(conn, limit, sql, [schema, *table_names]):
+        columns[row['table_name']].append({'name': row['column_name'], 'type': row['data_type'],
+                                           'nullable': row['is_nullable'] == 'YES'})
+    return columns
+
+
+async def crawl_database(conn, limit, database, cached, schema_patterns, full, stats):
+    """Fresh catalog entry for one database, reusing cached columns of unchanged tables."""
+    schemas, tables, procedures, tasks = await list_objects(conn, limit, database)
+    cached_schemas = {} if full else cached.get('schemas', {})
+
+    entry = {}
+    for row in schemas:
+        if row['name'] not in SYSTEM_SCHEMAS:
+            entry[row['name']] = {'tables': {}, 'procedures': [], 'tasks': []}
+
+    stale = {}
+    for row in tables:
+        schema, name = row['table_schema'], row['table_name']
+        last_altered = str(row['last_altered'])
+        previous = cached_schemas.get(schema, {}).get('tables', {}).get(name)
+        table = {'type': 'view' if 'VIEW' in row['table_type'] else 'table',
+                 'table_type': row['table_type'], 'rows': row['row_count'], 'bytes': row['bytes'],
+                 'last_altered': last_altered, 'comment': row['comment'], 'columns': None}
+        if previous and previous['last_altered'] == last_altered and previous.get('columns') is not None:
+            table['columns'] = previous['columns']
+            stats['cached'] += 1
+        elif matches(schema, schema_patterns):
+            stale.setdefault(schema, []).append(name)
+        entry.setdefault(schema, {'tables': {}, 'procedures': [], 'tasks': []})['tables'][name] = table
+
+    for row in procedures:
+        entry.setdefault(row['procedure_schema'], {'tables': {}, 'procedures': [], 'tasks': []})['procedures'].append({
+            'name': row['procedure_name'], 'signature': row['argument_signature'],
+            'language': row['procedure_language'], 'last_altered': str(row['last_altered'])})
+    for row in tasks:
+        entry.setdefault(row['schema_name'], {'tables': {}, 'procedures': [], 'tasks': []})['tasks'].append({
+            'name': row['name'], 'state': row['state'], 'schedule': row['schedule'],
+            'warehouse': row['warehouse'], 'predecessors': row['predecessors']})
+
+    # Only tables and views that changed since the cached crawl are described again
+    described = await asyncio.gather(*(describe_tables(conn, limit, database, schema, names)
+                                       for schema, names in stale.items()))
+    for schema, columns in zip(stale, described):
+        for name, table_columns in columns.items():
+            entry[schema]['tables'][name]['columns'] = table_columns
+        stats['described'] += len(columns)
+        stats['schemas_refreshed'] += 1
+
+    return {'crawled_at': datetime.now().isoformat(), 'schemas': entry}
+
+
+async def crawl(conn, database_patterns, schema_patterns, concurrency, full, cache):
+    """Crawl every matching database concurrently and merge the results into `cache`."""
+    limit = asyncio.Semaphore(concurrency)
+    stats = {'described': 0, 'cached': 0, 'schemas_refreshed': 0}
+    databases = await list_databases(conn, limit, database_patterns)
+    results = await asyncio.gather(
+        *(crawl_database(conn, limit, database, cache['databases'].get(database, {}), schema_patterns, full, stats)
+          for database in databases),
+        return_exceptions=True,
     )
-    
-    cursor = conn.cursor()
-    
-    print("🏢 TPCH_DASHBOARDS Database Explorer")
-    print("=" * 60)
-    print(f"📍 Location: JHYWOUK-WA83239.snowflakecomputing.com")
-    print(f"🗃️  Database: TPCH_DASHBOARDS")
-    print(f"📁 Schema: PUBLIC")
-    print(f"🏭 Warehouse: ANALYTICS_WH")
-    print()
-    
-    # Show database size and object counts
-    cursor.execute("SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA = 'PUBLIC'")
-    table_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM INFORMATION_SCHEMA.VIEWS WHERE TABLE_SCHEMA = 'PUBLIC'")
-    view_count = cursor.fetchone()[0]
-    
-    cursor.execute("SELECT COUNT(*) FROM INFORMATION_SCHEMA.PROCEDURES WHERE PROCEDURE_SCHEMA = 'PUBLIC'")
-    proc_count = cursor.fetchone()[0]
-    
-    print("📊 Object Summary:")
-    print(f"   Tables: {table_count}")
-    print(f"   Views: {view_count}")
-    print(f"   Procedures: {proc_count}")
-    print()
-    
-    # Show tables with row counts
-    print("📋 Tables:")
-    cursor.execute("SHOW TABLES")
-    tables = cursor.fetchall()
-    for table in tables:
-        table_name = table[1]
+    errors = {}
+    for database, result in zip(databases, results):
+        if isinstance(result, Exception):
+            errors[database] = str(result)
+        else:
+            cache['databases'][database] = result
+    return databases, stats, errors
+
+
+def select_objects(cache, databases, schema_patterns, types, name_patterns):
+    """Flat list of cached objects that pass the filters."""
+    selected = []
+    for database in databases:
+        for schema, content in sorted(cache['databases'].get(database, {}).get('schemas', {}).items()):
+            if not matches(schema, schema_patterns):
+                continue
+            objects = [dict(table, name=name) for name, table in sorted(content['tables'].items())]
+            objects += [dict(proc, type='procedure') for proc in content['procedures']]
+            objects += [dict(task, type='task') for task in content['tasks']]
+            for obj in objects:
+                if obj['type'] in types and matches(obj['name'], name_patterns):
+                    selected.append(dict(obj, database=database, schema=schema))
+    return selected
+
+
+def print_table(objects, show_columns):
+    icons = {'table': '📊', 'view': '📈', 'procedure': '⚙️ ', 'task': '🕐'}
+    location = None
+    for obj in objects:
+        if (obj['database'], obj['schema']) != location:
+            location = (obj['database'], obj['schema'])
+            print(f"\n📁 {obj['database']}.{obj['schema']}")
+        if obj['type'] == 'table':
+            size = f"{obj['rows']:,} rows, {(obj['bytes'] or 0) / 1024 ** 2:,.1f} MB" if obj['rows'] is not None else obj['table_type']
+            detail = f"{size}, altered {obj['last_altered'][:16]}"
+        elif obj['type'] == 'view':
+            detail = f"{obj['table_type'].lower()}, altered {obj['last_altered'][:16]}"
+        elif obj['type'] == 'procedure':
+            detail = f"{obj['signature']} {obj['language']}"
+        else:
+            detail = f"{obj['state']}, {obj['schedule'] or 'after ' + str(obj['predecessors'])}"
+        print(f"   {icons[obj['type']]} {obj['name']}: {detail}")
+        if show_columns and obj.get('columns'):
+            for column in obj['columns']:
+                print(f"      · {column['name']} {column['type']}{'' if column['nullable'] else ' NOT NULL'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl and explore database objects")
+    parser.add_argument("--database", nargs="+", default=[DEFAULT_DATABASE],
+                        help=f"Databases to crawl, glob patterns allowed (default: {DEFAULT_DATABASE})")
+    parser.add_argument("--schema", nargs="+", default=[], help="Only schemas matching these glob patterns")
+    parser.add_argument("--type", nargs="+", choices=OBJECT_TYPES, default=list(OBJECT_TYPES),
+                        help="Object types to show (default: all)")
+    parser.add_argument("--name", nargs="+", default=[], help="Only objects matching these glob patterns")
+    parser.add_argument("--columns", action="store_true", help="Show table and view columns (table format)")
+    parser.add_argument("--format", choices=["table", "json"], default="table", help="Output format (default: table)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Metadata queries in flight at once (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--full", action="store_true", help="Ignore the cache and describe every table again")
+    parser.add_argument("--cached", action="store_true", help="Only read the local catalog cache")
+    args = parser.parse_args()
+
+    cache = load_cache()
+    errors = {}
+    if args.cached:
+        databases = sorted(name for name in cache['databases'] if matches(name, args.database))
+        stats = None
+    else:
+        started = time.time()
+        conn = get_snowflake_connection()
         try:
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            row_count = cursor.fetchone()[0]
-            print(f"   📊 {table_name}: {row_count:,} rows")
-        except:
-            print(f"   📊 {table_name}: (unable to count)")
-    
-    print()
-    
-    # Show views
-    print("👁️  Views:")
-    cursor.execute("SHOW VIEWS")
-    views = cursor.fetchall()
-    for view in views:
-        view_name = view[1]
-        print(f"   📈 {view_name}")
-    
-    print()
-    
-    # Show procedures
-    print("🐍 Stored Procedures:")
-    cursor.execute("SHOW PROCEDURES")
-    procedures = cursor.fetchall()
-    for proc in procedures:
-        proc_name = proc[1]
-        language = proc[6] if len(proc) > 6 else "SQL"
-        print(f"   ⚙️  {proc_name} ({language})")
-    
-    print()
-    
-    # Show tasks
-    print("⏰ Scheduled Tasks:")
-    cursor.execute("SHOW TASKS")
-    tasks = cursor.fetchall()
-    for task in tasks:
-        task_name = task[1]
-        state = task[7] if len(task) > 7 else "Unknown"
-        print(f"   🕐 {task_name} (Status: {state})")
-    
-    print()
-    print("💡 Access Methods:")
-    print(f"   🌐 Web UI: https://app.snowflake.com/")
-    print(f"   🔗 Direct URL: https://app.snowflake.com/JHYWOUK-WA83239/#/data/databases/TPCH_DASHBOARDS")
-    print(f"   💻 SQL: USE DATABASE TPCH_DASHBOARDS; USE SCHEMA PUBLIC;")
-    
-    cursor.close()
-    conn.close()
+            databases, stats, errors = asyncio.run(
+                crawl(conn, args.database, args.schema, args.concurrency, args.full, cache))
+        finally:
+            conn.close()
+        stats['elapsed_s'] = round(time.time() - started, 2)
+        save_cache(cache)
+
+    objects = select_objects(cache, databases, args.schema, set(args.type), args.name)
+
+    if args.format == "json":
+        json.dump({'databases': databases, 'crawl': stats, 'errors': errors, 'objects': objects},
+                  sys.stdout, indent=2, default=str)
+        print()
+    else:
+        print("🏢 Database Explorer")
+        print("=" * 60)
+        if stats:
+            print(f"🔄 Crawled {len(databases)} database(s) in {stats['elapsed_s']:.1f}s: "
+                  f"{stats['described']} tables/views described, {stats['cached']} from cache "
+                  f"({stats['schemas_refreshed']} schemas refreshed)")
+        counts = {kind: sum(1 for obj in objects if obj['type'] == kind) for kind in OBJECT_TYPES}
+        print("📊 " + ", ".join(f"{count} {kind}s" for kind, count in counts.items()))
+        print_table(objects, args.columns)
+        for database, error in errors.items():
+            print(f"\n❌ {database}: {error}")
+        print(f"\n💾 Catalog cache: {CATALOG_CACHE}")
+
+    sys.exit(1 if errors else 0)
+
 
 if __name__ == "__main__":
-    explore_database()
\ No newline at end of file
+    main()
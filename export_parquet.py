@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Streaming Parquet Export
+Exports the customer profile and the TPCH views to Hive-partitioned Parquet
+for offline analysis and local BI extracts.
+
+Two export paths produce the same layout:
+  * fetch: results are read with fetch_arrow_batches() and each Arrow batch
+    is split by partition and buffered for that partition's open Parquet
+    writer, which writes a row group every 128k rows, so memory stays at
+    roughly one row group per open partition no matter how large the table is
+  * unload: COPY INTO a temporary stage writes compressed Parquet files in
+    parallel on the warehouse, then the files are downloaded with concurrent
+    GETs. The result-set fetch is a single stream, so this is much faster for
+    large extracts (SF10 and up)
+
+By default the path is picked from the bytes the query will scan, as
+estimated by EXPLAIN. Throughput is reported in rows and MB per second.
+
+Usage:
+    python export_parquet.py --source profile
+    python export_parquet.py --source orders --output exports --where "O_ORDERDATE >= '1997-01-01'"
+    python export_parquet.py --source lineitems --method unload --threads 16
+"""
+
+import argparse
+import os
+import shutil
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from connection_strings import get_snowflake_connection
+
+OUTPUT_DIR = "exports"
+PARTITION_COLUMN = "ORDER_YEAR"
+EXPORT_STAGE = "PARQUET_EXPORT_STAGE"
+UNLOAD_THRESHOLD_MB = 1024
+MAX_FILE_SIZE_MB = 256
+ROW_GROUP_ROWS = 128 * 1024
+DEFAULT_THREADS = 8
+
+# Each source is the relation to export and the expression for its partition key
+SOURCES = {
+    'profile': {'relation': 'CUSTOMER_LINEITEM_PROFILE', 'partition': 'YEAR(O_ORDERDATE)'},
+    'orders': {'relation': 'V_ORDER_DETAILS', 'partition': 'YEAR(O_ORDERDATE)'},
+    'lineitems': {'relation': 'V_LINEITEM_DETAILS', 'partition': 'YEAR(L_SHIPDATE)'},
+    'customers': {'relation': 'V_CUSTOMER_DETAILS', 'partition': None},
+}
+
+
+def export_query(source, where=None, partition_column=True):
+    """SELECT for a source, optionally with the partition key as an extra column."""
+    spec = SOURCES[source]
+    partition = f", {spec['partition']} as {PARTITION_COLUMN}" if spec['partition'] and partition_column else ""
+    sql = f"SELECT *{partition} FROM {spec['relation']}"
+    if where:
+        sql += f" WHERE {where}"
+    return sql
+
+
+def estimate_scan_bytes(cursor, sql):
+    """Bytes the query will scan after pruning, from EXPLAIN; None if unavailable."""
+    try:
+        cursor.execute(f"EXPLAIN USING TABULAR {sql}")
+        columns = [column[0].lower() for column in cursor.description]
+        for row in cursor.fetchall():
+            record = dict(zip(columns, row))
+            if record.get('operation') == 'GlobalStats':
+                return int(record['bytesassigned'])
+    except Exception:
+        pass
+    return None
+
+
+def choose_method(estimated_bytes, threshold_mb=UNLOAD_THRESHOLD_MB):
+    """Unload through a stage once the scan is larger than the threshold."""
+    if estimated_bytes is None:
+        return 'fetch'
+    return 'unload' if estimated_bytes > threshold_mb * 1024 * 1024 else 'fetch'
+
+
+def widen_integers(table):
+    """Cast integer columns to int64.
+
+    Snowflake picks the narrowest integer type that fits each batch, but every
+    batch appended to a Parquet file must share the file's schema.
+    """
+    schema = pa.schema([
+        field.with_type(pa.int64()) if pa.types.is_integer(field.type) else field
+        for field in table.schema
+    ])
+    return table if schema.equals(table.schema) else table.cast(schema)
+
+
+class PartitionedWriter:
+    """One open ParquetWriter per partition value, created on first flush.
+
+    Each batch only holds a slice of each partition, so slices are buffered
+    per partition and written as one row group once ROW_GROUP_ROWS are
+    pending; close() flushes the remainder.
+    """
+
+    def __init__(self, output_dir, partition_column=None, compression="snappy", row_group_rows=ROW_GROUP_ROWS):
+        self.output_dir = output_dir
+        self.partition_column = partition_column
+        self.compression = compression
+        self.row_group_rows = row_group_rows
+        self.writers = {}
+        self.rows = {}
+        self.pending = {}
+
+    def _write(self, value, table):
+        self.pending.setdefault(value, []).append(table)
+        self.rows[value] = self.rows.get(value, 0) + table.num_rows
+        if sum(t.num_rows for t in self.pending[value]) >= self.row_group_rows:
+            self._flush(value)
+
+    def _flush(self, value):
+        tables = self.pending.pop(value, [])
+        if not tables:
+            return
+        table = pa.concat_tables(tables)
+        self._writer(value, table.schema).write_table(table, row_group_size=self.row_group_rows)
+
+    def _writer(self, value, schema):
+        if value not in self.writers:
+            directory = self.output_dir
+            if self.partition_column:
+                directory = os.path.join(directory, f"{self.partition_column}={value}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, "part-0.parquet")
+            self.writers[value] = pq.ParquetWriter(path, schema, compression=self.compression)
+        return self.writers[value]
+
+    def write(self, batch):
+        """Append an Arrow table to the partitions it covers."""
+        batch = widen_integers(batch)
+        if not self.partition_column:
+            self._write(None, batch)
+            return
+
+        keys = batch.column(self.partition_column)
+        # The partition value lives in the directory name, not in the files
+        data = batch.remove_column(batch.schema.get_field_index(self.partition_column))
+        for value in pc.unique(keys).to_pylist():
+            mask = pc.equal(keys, value) if value is not None else pc.is_null(keys)
+            self._write(value, data.filter(mask))
+
+    def close(self):
+        for value in list(self.pending):
+            self._flush(value)
+        for writer in self.writers.values():
+            writer.close()
+
+
+def stream_export(cursor, sql, output_dir, partition_column=None):
+    """Stream a query into Parquet batch by batch and return export statistics."""
+    start_time = time.time()
+    cursor.execute(sql)
+    query_id = cursor.sfqid
+
+    writer = PartitionedWriter(output_dir, partition_column)
+    rows = 0
+    nbytes = 0
+    batches = 0
+    try:
+        for batch in cursor.fetch_arrow_batches():
+            writer.write(batch)
+            rows += batch.num_rows
+            nbytes += batch.nbytes
+            batches += 1
+            elapsed = time.time() - start_time
+            print(f"\r📦 {rows:,} rows, {nbytes / 1e6:,.1f} MB in {elapsed:.1f}s "
+                  f"({rows / elapsed:,.0f} rows/s, {nbytes / 1e6 / elapsed:,.1f} MB/s)", end="", flush=True)
+    finally:
+        writer.close()
+    print()
+
+    elapsed = time.time() - start_time
+    file_bytes = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(output_dir) for name in names
+    )
+    return {
+        'query_id': query_id,
+        'rows': rows,
+        'batches': batches,
+        'arrow_mb': nbytes / 1e6,
+        'parquet_mb': file_bytes / 1e6,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed else 0.0,
+        'mb_per_second': nbytes / 1e6 / elapsed if elapsed else 0.0,
+        'partitions': dict(sorted(writer.rows.items(), key=lambda item: str(item[0]))),
+    }
+
+
+def stage_unload(conn, source, where, output_dir, threads=DEFAULT_THREADS):
+    """Unload to a temporary stage as Parquet and download the files concurrently."""
+    start_time = time.time()
+    spec = SOURCES[source]
+    prefix = f"{spec['relation'].lower()}/{uuid.uuid4().hex}"
+
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE TEMPORARY STAGE IF NOT EXISTS {EXPORT_STAGE}")
+    # Same layout as the fetch path: the partition key only lives in the path
+    partition_by = f"PARTITION BY ('{PARTITION_COLUMN}=' || {spec['partition']})" if spec['partition'] else ""
+    cursor.execute(f"""
+        COPY INTO @{EXPORT_STAGE}/{prefix}/
+        FROM ({export_query(source, where, partition_column=False)})
+        {partition_by}
+        FILE_FORMAT = (TYPE = PARQUET COMPRESSION = SNAPPY)
+        HEADER = TRUE
+        MAX_FILE_SIZE = {MAX_FILE_SIZE_MB * 1024 * 1024}
+    """)
+    query_id = cursor.sfqid
+    columns = [column[0].lower() for column in cursor.description]
+    unloaded = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    rows = sum(r.get('rows_unloaded', 0) for r in unloaded)
+    unload_seconds = time.time() - start_time
+    print(f"🏭 Unloaded {rows:,} rows on the warehouse in {unload_seconds:.1f}s")
+
+    # LIST names are relative to the stage root, lower-cased stage name first
+    cursor.execute(f"LIST @{EXPORT_STAGE}/{prefix}/")
+    files = [row[0].split("/", 1)[1] for row in cursor.fetchall()]
+    directories = sorted({os.path.dirname(path[len(prefix) + 1:]) for path in files})
+    cursor.close()
+
+    def download(directory):
+        local_dir = os.path.abspath(os.path.join(output_dir, directory))
+        os.makedirs(local_dir, exist_ok=True)
+        stage_path = f"{prefix}/{directory}/" if directory else f"{prefix}/"
+        get_cursor = conn.cursor()
+        try:
+            get_cursor.execute(
+                f"GET '@{EXPORT_STAGE}/{stage_path}' 'file://{local_dir}/' PARALLEL = {threads}"
+            )
+            return len(get_cursor.fetchall())
+        finally:
+            get_cursor.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, min(threads, len(directories)))) as pool:
+        downloaded = sum(pool.map(download, directories))
+
+    cursor = conn.cursor()
+    cursor.execute(f"REMOVE @{EXPORT_STAGE}/{prefix}/")
+    cursor.close()
+
+    elapsed = time.time() - start_time
+    file_bytes = sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(output_dir) for name in names
+    )
+    partitions = {}
+    for path in files:
+        directory = os.path.dirname(path[len(prefix) + 1:])
+        value = directory.split("=", 1)[1] if "=" in directory else None
+        partitions[value] = partitions.get(value, 0) + 1
+    return {
+        'query_id': query_id,
+        'rows': rows,
+        'files': downloaded,
+        'parquet_mb': file_bytes / 1e6,
+        'unload_seconds': unload_seconds,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed else 0.0,
+        'mb_per_second': file_bytes / 1e6 / elapsed if elapsed else 0.0,
+        'partition_files': dict(sorted(partitions.items(), key=lambda item: str(item[0]))),
+    }
+
+
+def replace_directory(source_dir, target_dir):
+    """Move a finished export over the previous one; re-runs replace, never append."""
+    os.makedirs(source_dir, exist_ok=True)  # an empty result writes no files
+    retired_dir = None
+    if os.path.isdir(target_dir):
+        # os.replace cannot overwrite a non-empty directory, so move it aside first
+        retired_dir = f"{target_dir}.old-{uuid.uuid4().hex[:8]}"
+        os.replace(target_dir, retired_dir)
+    os.replace(source_dir, target_dir)
+    if retired_dir:
+        shutil.rmtree(retired_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a profile or view export to partitioned Parquet")
+    parser.add_argument("--source", choices=sorted(SOURCES), default="profile", help="What to export (default: profile)")
+    parser.add_argument("--output", default=OUTPUT_DIR, help=f"Output root directory (default: {OUTPUT_DIR})")
+    parser.add_argument("--where", help="Optional filter, e.g. \"O_ORDERDATE >= '1997-01-01'\"")
+    parser.add_argument("--warehouse", help="Warehouse to export with (default: the connection default)")
+    parser.add_argument("--method", choices=["auto", "fetch", "unload"], default="auto",
+                        help="Client fetch, stage unload, or pick by estimated size (default: auto)")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS,
+                        help=f"Concurrent downloads for the unload path (default: {DEFAULT_THREADS})")
+    parser.add_argument("--unload-threshold-mb", type=int, default=UNLOAD_THRESHOLD_MB,
+                        help=f"Scan size above which auto uses the unload path (default: {UNLOAD_THRESHOLD_MB})")
+    args = parser.parse_args()
+
+    relation = SOURCES[args.source]['relation']
+    output_dir = os.path.join(args.output, relation.lower())
+    partition_column = PARTITION_COLUMN if SOURCES[args.source]['partition'] else None
+
+    print(f"📤 Parquet Export: {relation}")
+    print("=" * 60)
+    # Write next to the previous export and swap it in only once complete, so
+    # a failed run leaves the previous export untouched
+    staging_dir = f"{output_dir}.tmp-{uuid.uuid4().hex[:8]}"
+
+    overrides = {'warehouse': args.warehouse} if args.warehouse else {}
+    conn = get_snowflake_connection(**overrides)
+    try:
+        cursor = conn.cursor()
+        sql = export_query(args.source, args.where)
+        method = args.method
+        if method == "auto":
+            estimated = estimate_scan_bytes(cursor, sql)
+            method = choose_method(estimated, args.unload_threshold_mb)
+            size = f"{estimated / 1e6:,.0f} MB" if estimated is not None else "unknown size"
+            print(f"📐 Estimated scan: {size} -> {method}")
+
+        if method == "unload":
+            stats = stage_unload(conn, args.source, args.where, staging_dir, args.threads)
+        else:
+            stats = stream_export(cursor, sql, staging_dir, partition_column)
+        cursor.close()
+        replace_directory(staging_dir, output_dir)
+    except Exception as e:
+        print(f"\n❌ Export failed: {e}")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        return False
+    finally:
+        conn.close()
+
+    if method == "unload":
+        for value, count in stats['partition_files'].items():
+            label = f"{partition_column}={value}" if partition_column else "(unpartitioned)"
+            print(f"   📁 {label}: {count} files")
+        print(f"\n✅ Exported {stats['rows']:,} rows as {stats['files']} files to {output_dir}")
+        print(f"⚡ {stats['seconds']:.1f}s ({stats['unload_seconds']:.1f}s unload), "
+              f"{stats['rows_per_second']:,.0f} rows/s, {stats['mb_per_second']:,.1f} MB/s "
+              f"(Parquet {stats['parquet_mb']:,.1f} MB)")
+        return True
+
+    for value, count in stats['partitions'].items():
+        label = f"{partition_column}={value}" if partition_column else "(unpartitioned)"
+        print(f"   📁 {label}: {count:,} rows")
+    print(f"\n✅ Exported {stats['rows']:,} rows in {stats['batches']} batches to {output_dir}")
+    print(f"⚡ {stats['seconds']:.1f}s, {stats['rows_per_second']:,.0f} rows/s, "
+          f"{stats['mb_per_second']:,.1f} MB/s (Arrow {stats['arrow_mb']:,.1f} MB -> Parquet {stats['parquet_mb']:,.1f} MB)")
+    return True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Pipeline Metrics Exporter
+Serves pipeline and dashboard query health in the OpenMetrics text format so
+Prometheus can scrape it and alert on pipeline lag and dashboard latency.
+
+Metrics are computed by a background loop every --interval seconds from the
+observability tables (PIPELINE_FRESHNESS, TASK_RUN_HISTORY,
+INFORMATION_SCHEMA.TABLES), the live query history of the BI warehouse
+(QUERY_HISTORY_BY_WAREHOUSE, which needs MONITOR on it) and the latest
+benchmark_dashboard.py results. A scrape only returns the last rendered
+page; it never runs a warehouse query. When a source fails, its previous
+samples are kept and tpch_exporter_source_up drops to 0.
+
+Usage:
+    python metrics_exporter.py                        # http://127.0.0.1:9188/metrics
+    python metrics_exporter.py --interval 300 --port 9188 --host 0.0.0.0
+"""
+
+import argparse
+import datetime as dt
+import glob
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from benchmark_dashboard import RESULTS_DIR
+from connection_strings import get_snowflake_connection, workload_warehouse
+
+DEFAULT_PORT = 9188
+DEFAULT_INTERVAL = 300
+LATENCY_WINDOW_MINUTES = 60
+PROFILE_TABLE = 'CUSTOMER_LINEITEM_PROFILE'
+SNAPSHOT_PATTERN = re.compile(rf"^{PROFILE_TABLE}_\d{{8}}_\d{{6}}$")
+OPENMETRICS_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PROMETHEUS_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# name: help text. Every metric is a gauge.
+METRICS = {
+    'tpch_pipeline_last_publish_timestamp_seconds': 'Time of the last customer profile publish',
+    'tpch_pipeline_cube_refresh_timestamp_seconds': 'Time the KPI cube was last rebuilt',
+    'tpch_pipeline_rows_written': 'Rows in the last published customer profile',
+    'tpch_task_last_run_duration_seconds': 'Duration of the last completed run of each task',
+    'tpch_task_last_run_success': 'Whether the last completed run of each task succeeded',
+    'tpch_task_last_run_timestamp_seconds': 'Completion time of the last run of each task',
+    'tpch_task_failed_runs_24h': 'Failed runs of each task over the last 24 hours',
+    'tpch_profile_snapshots': 'Timestamped customer profile snapshots',
+    'tpch_table_storage_bytes': 'Active storage bytes of each table in the schema',
+    'tpch_table_rows': 'Row count of each table in the schema',
+    'tpch_dashboard_query_latency_seconds': f'Query elapsed time per BI tool over the last {LATENCY_WINDOW_MINUTES} minutes',
+    'tpch_dashboard_queries': f'Queries per BI tool over the last {LATENCY_WINDOW_MINUTES} minutes',
+    'tpch_benchmark_latency_seconds': 'Latency percentiles of the latest benchmark_dashboard.py run per suite',
+    'tpch_benchmark_run_timestamp_seconds': 'Start time of the latest benchmark run per suite',
+    'tpch_exporter_source_up': 'Whether the last refresh of each metrics source succeeded',
+    'tpch_exporter_last_refresh_timestamp_seconds': 'Time of the last refresh loop',
+    'tpch_exporter_refresh_duration_seconds': 'Duration of the last refresh loop',
+}
+
+
+def epoch(value):
+    return value.timestamp() if value is not None else None
+
+
+def freshness_samples(cursor):
+    cursor.execute("""
+        SELECT PUBLISHED_AT, CUBE_REFRESHED_AT, ROW_COUNT
+        FROM PIPELINE_FRESHNESS
+        WHERE PIPELINE = 'CUSTOMER_PROFILE'
+    """)
+    row = cursor.fetchone()
+    if not row:
+        return []
+    published_at, cube_refreshed_at, row_count = row
+    return [
+        ('tpch_pipeline_last_publish_timestamp_seconds', {}, epoch(published_at)),
+        ('tpch_pipeline_cube_refresh_timestamp_seconds', {}, epoch(cube_refreshed_at)),
+        ('tpch_pipeline_rows_written', {}, row_count),
+    ]
+
+
+def task_samples(cursor):
+    # Reads the clustered history store (09_observability.sql), two days only
+    cursor.execute("""
+        SELECT
+            NAME,
+            MAX_BY(DATEDIFF('millisecond', QUERY_START_TIME, COMPLETED_TIME), COMPLETED_TIME) / 1000,
+            MAX_BY(IFF(STATE = 'SUCCEEDED', 1, 0), COMPLETED_TIME),
+            MAX(COMPLETED_TIME),
+            COUNT_IF(STATE = 'FAILED' AND SCHEDULED_TIME >= DATEADD('hour', -24, CURRENT_TIMESTAMP()))
+        FROM TASK_RUN_HISTORY
+        WHERE SCHEDULED_TIME >= DATEADD('day', -2, CURRENT_TIMESTAMP())
+        GROUP BY NAME
+    """)
+    samples = []
+    for name, duration, success, completed, failed in cursor.fetchall():
+        labels = {'task': name}
+        samples += [
+            ('tpch_task_last_run_duration_seconds', labels, duration),
+            ('tpch_task_last_run_success', labels, success),
+            ('tpch_task_last_run_timestamp_seconds', labels, epoch(completed)),
+            ('tpch_task_failed_runs_24h', labels, failed),
+        ]
+    return samples
+
+
+def storage_samples(cursor):
+    cursor.execute("""
+        SELECT TABLE_NAME, ROW_COUNT, BYTES
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = CURRENT_SCHEMA() AND TABLE_TYPE = 'BASE TABLE'
+    """)
+    tables = cursor.fetchall()
+    snapshots = sum(1 for name, _, _ in tables if SNAPSHOT_PATTERN.match(name))
+    samples = [('tpch_profile_snapshots', {}, snapshots)]
+    for name, row_count, size in tables:
+        samples.append(('tpch_table_storage_bytes', {'table': name}, size))
+        samples.append(('tpch_table_rows', {'table': name}, row_count))
+    return samples
+
+
+def dashboard_latency_samples(cursor):
+    # Live history of the BI warehouse: the collected store (V_QUERY_ATTRIBUTION)
+    # lags by up to an hour, longer while PIPELINE_HISTORY_TASK is suspended.
+    # TOOL is derived as in V_QUERY_ATTRIBUTION (15_query_attribution.sql).
+    cursor.execute(f"""
+        SELECT
+            COALESCE(
+                TRY_PARSE_JSON(QUERY_TAG):tool::VARCHAR,
+                CASE ROLE_NAME
+                    WHEN 'LOOKER_ROLE' THEN 'looker'
+                    WHEN 'POWERBI_ROLE' THEN 'powerbi'
+                    WHEN 'TABLEAU_ROLE' THEN 'tableau'
+                    WHEN 'BI_ROLE' THEN 'bi'
+                END,
+                'untagged'
+            ) as TOOL,
+            COUNT(*),
+            APPROX_PERCENTILE(TOTAL_ELAPSED_TIME, 0.5) / 1000,
+            APPROX_PERCENTILE(TOTAL_ELAPSED_TIME, 0.95) / 1000,
+            APPROX_PERCENTILE(TOTAL_ELAPSED_TIME, 0.99) / 1000
+        FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_WAREHOUSE(
+            WAREHOUSE_NAME => %s,
+            END_TIME_RANGE_START => DATEADD('minute', -{LATENCY_WINDOW_MINUTES}, CURRENT_TIMESTAMP()),
+            RESULT_LIMIT => 10000))
+        WHERE DATABASE_NAME = CURRENT_DATABASE()
+          AND QUERY_TYPE = 'SELECT'
+          AND EXECUTION_STATUS = 'SUCCESS'
+        GROUP BY TOOL
+    """, (workload_warehouse('interactive'),))
+    samples = []
+    for tool, count, p50, p95, p99 in cursor.fetchall():
+        samples.append(('tpch_dashboard_queries', {'tool': tool}, count))
+        for quantile, value in (('0.5', p50), ('0.95', p95), ('0.99', p99)):
+            samples.append(('tpch_dashboard_query_latency_seconds', {'tool': tool, 'quantile': quantile}, value))
+    return samples
+
+
+def benchmark_samples(results_dir=RESULTS_DIR):
+    """Percentiles from the newest saved run of each benchmark suite."""
+    latest = {}
+    for path in sorted(glob.glob(os.path.join(results_dir, "*.json"))):
+        with open(path) as f:
+            run = json.load(f)
+        suite = run.get('suite')
+        if suite and 'results' in run and run.get('started_at', '') >= latest.get(suite, {}).get('started_at', ''):
+            latest[suite] = run
+
+    samples = []
+    for suite, run in latest.items():
+        started_at = dt.datetime.fromisoformat(run['started_at']).timestamp()
+        samples.append(('tpch_benchmark_run_timestamp_seconds', {'suite': suite}, started_at))
+        for result in run['results']:
+            if result.get('status') != 'success':
+                continue
+            for quantile, key in (('0.5', 'p50'), ('0.95', 'p95')):
+                labels = {'suite': suite, 'case': result['case'], 'variant': result['variant'], 'quantile': quantile}
+                samples.append(('tpch_benchmark_latency_seconds', labels, result[key]))
+    return samples
+
+
+# Sources that query the warehouse; each takes a cursor and returns samples
+WAREHOUSE_SOURCES = {
+    'freshness': freshness_samples,
+    'tasks': task_samples,
+    'storage': storage_samples,
+    'dashboard_latency': dashboard_latency_samples,
+}
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render(samples):
+    """Render (name, labels, value) samples as an OpenMetrics page."""
+    by_name = {}
+    for name, labels, value in samples:
+        if value is not None:
+            by_name.setdefault(name, []).append((labels, value))
+
+    lines = []
+    for name, help_text in METRICS.items():
+        if name not in by_name:
+            continue
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"# HELP {name} {help_text}")
+        for labels, value in by_name[name]:
+            label_text = ",".join(f'{key}="{escape_label(val)}"' for key, val in labels.items())
+            lines.append(f"{name}{{{label_text}}} {float(value)}" if label_text else f"{name} {float(value)}")
+    lines.append("# EOF")
+    return ("\n".join(lines) + "\n").encode()
+
+
+class MetricsCache:
+    """Refreshes the metrics on a background thread and holds the rendered page."""
+
+    def __init__(self, interval=DEFAULT_INTERVAL, warehouse=None):
+        self.interval = interval
+        self.warehouse = warehouse
+        self.conn = None
+        self.samples = {}   # source -> last successful samples
+        self.up = {}        # source -> 1/0
+        self.page = render([])
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+
+    def connect(self):
+        if self.conn is None or self.conn.is_closed():
+            overrides = {'warehouse': self.warehouse} if self.warehouse else {}
+            self.conn = get_snowflake_connection(client_session_keep_alive=True, **overrides)
+        return self.conn
+
+    def refresh(self):
+        start_time = time.time()
+        try:
+            cursor = self.connect().cursor()
+        except Exception as e:
+            print(f"❌ Connection failed: {e}")
+            cursor = None
+
+        for source, collect in WAREHOUSE_SOURCES.items():
+            if cursor is None:
+                self.up[source] = 0
+                continue
+            try:
+                self.samples[source] = collect(cursor)
+                self.up[source] = 1
+            except Exception as e:
+                print(f"⚠️  {source}: {e}")
+                self.up[source] = 0
+        if cursor is not None:
+            cursor.close()
+
+        try:
+            self.samples['benchmark'] = benchmark_samples()
+            self.up['benchmark'] = 1
+        except Exception as e:
+            print(f"⚠️  benchmark: {e}")
+            self.up['benchmark'] = 0
+
+        samples = [sample for source_samples in self.samples.values() for sample in source_samples]
+        samples += [('tpch_exporter_source_up', {'source': source}, up) for source, up in self.up.items()]
+        samples += [
+            ('tpch_exporter_last_refresh_timestamp_seconds', {}, time.time()),
+            ('tpch_exporter_refresh_duration_seconds', {}, time.time() - start_time),
+        ]
+        page = render(samples)
+        with self.lock:
+            self.page = page
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.refresh()
+            self.stop_event.wait(self.interval)
+
+    def start(self):
+        threading.Thread(target=self.run, name="metrics-refresh", daemon=True).start()
+
+    def close(self):
+        self.stop_event.set()
+        if self.conn is not None:
+            self.conn.close()
+
+
+def make_handler(cache):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            with cache.lock:
+                body = cache.page
+            accept = self.headers.get('Accept', '')
+            self.send_response(200)
+            self.send_header('Content-Type', OPENMETRICS_TYPE if 'openmetrics' in accept else PROMETHEUS_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes every few seconds would flood the console
+
+    return MetricsHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve pipeline and dashboard health as OpenMetrics")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL,
+                        help=f"Seconds between metric refreshes (default: {DEFAULT_INTERVAL})")
+    parser.add_argument("--warehouse", help="Warehouse for the refresh queries (default: the connection default)")
+    args = parser.parse_args()
+
+    cache = MetricsCache(args.interval, args.warehouse)
+    cache.connect()  # prompt for the password before the refresh thread starts
+    cache.start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(cache))
+    print(f"📈 Serving metrics on http://{args.host}:{args.port}/metrics (refresh every {args.interval}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,8 @@ import snowflake.connector
 import getpass
 from datetime import datetime
 
+from connection_strings import workload_warehouse
+
 def powerbi_connection_assistant():
     """Interactive assistant for Power BI connection to Snowflake."""
     
@@ -28,7 +30,7 @@ def powerbi_connection_assistant():
             user='ALGORYTHMOS',
             password=password,
             role='DASHBOARD_ANALYST_ROLE',
-            warehouse='COMPUTE_WH',
+            warehouse=workload_warehouse('interactive'),
             database='TPCH_DASHBOARDS',
             schema='PUBLIC'
         )
@@ -69,7 +71,7 @@ def powerbi_connection_assistant():
     print()
     print("┌─────────────────────────────────────────────────────┐")
     print("│ Server: JHYWOUK-WA83239.snowflakecomputing.com     │")
-    print("│ Warehouse: COMPUTE_WH                              │")
+    print("│ Warehouse: ANALYTICS_WH                            │")
     print("└─────────────────────────────────────────────────────┘")
     print()
     print("⚠️  IMPORTANT: Leave 'Database' field EMPTY for now")
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Client-Side Query Result Cache
+Lets the test suites, validators and assistants re-run the same read-only
+queries without going back to the warehouse unless their inputs changed.
+
+Results are keyed by normalized SQL text, the session's account, role,
+database and schema (so different roles or schemas never share entries), and
+a data-version token. For the
+profile pipeline's tables the token is the single row of PIPELINE_FRESHNESS,
+which each publish rewrites, so polling for new data is a one-row read. Other
+tables use their LAST_ALTERED time, re-read every few seconds; the catalog is
+re-read only every few minutes when a query reads nothing but pipeline
+tables. Views are resolved to the tables their definitions name, so appends
+to unrelated log tables do not invalidate them. Without PIPELINE_FRESHNESS
+every table falls back to LAST_ALTERED. Entries live in an in-memory LRU and as compressed
+files on disk, both with a TTL.
+
+Usage:
+    cursor = CachedCursor(conn.cursor())
+    cursor.execute("SELECT COUNT(*) FROM CUSTOMER_LINEITEM_PROFILE")
+    cursor.fetchone(), cursor.cache_hit
+
+    python query_cache.py --stats   # show what is cached on disk
+    python query_cache.py --clear   # drop the disk cache
+"""
+
+import argparse
+import hashlib
+import os
+import pickle
+import re
+import time
+import zlib
+from collections import OrderedDict
+
+CACHE_DIR = os.getenv('SNOW_QUERY_CACHE_DIR', '.query_cache')
+TTL_SECONDS = 3600
+MEMORY_ENTRIES = 256
+DISK_ENTRIES = 2048
+VERSION_TTL_SECONDS = 30
+CATALOG_TTL_SECONDS = 600
+
+# Written by PUBLISH_CUSTOMER_PROFILE_SP() and REFRESH_PROFILE_KPI_CUBE_SP()
+FRESHNESS_TABLE = 'PIPELINE_FRESHNESS'
+FRESHNESS_COLUMNS = {
+    'CUSTOMER_LINEITEM_PROFILE': 'RUN_ID',
+    'CUSTOMER_PROFILE_KPI_CUBE': 'CUBE_REFRESHED_AT',
+}
+
+# Queries whose answer changes without any table changing are never cached
+UNCACHEABLE = re.compile(
+    r"\b(CURRENT_TIMESTAMP|CURRENT_DATE|CURRENT_TIME|SYSDATE|GETDATE|LOCALTIMESTAMP|RANDOM|UUID_STRING|SEQ[1248]"
+    r"|INFORMATION_SCHEMA|ACCOUNT_USAGE|TASK_HISTORY|QUERY_HISTORY|RESULT_SCAN|SYSTEM\$|PIPELINE_FRESHNESS)\b"
+)
+
+
+def normalize_sql(sql):
+    """Collapse comments, whitespace and keyword case; keep string literals as written."""
+    sql = re.sub(r"/\*.*?\*/|--[^\n]*", " ", sql, flags=re.S)
+    parts = sql.split("'")
+    # Even parts are outside string literals
+    for i in range(0, len(parts), 2):
+        parts[i] = re.sub(r"\s+", " ", parts[i]).upper()
+    return "'".join(parts).strip().rstrip(";").strip()
+
+
+class ResultCache:
+    """Two-level (memory LRU + compressed disk) store for query results."""
+
+    def __init__(self, cache_dir=CACHE_DIR, ttl=TTL_SECONDS,
+                 memory_entries=MEMORY_ENTRIES, disk_entries=DISK_ENTRIES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.memory = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.zlib")
+
+    def get(self, key):
+        """Return (description, rows) for a live entry, or None."""
+        entry = self.memory.get(key)
+        if entry and time.time() - entry[0] < self.ttl:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        if self.cache_dir:
+            path = self._path(key)
+            try:
+                if time.time() - os.path.getmtime(path) < self.ttl:
+                    with open(path, "rb") as f:
+                        value = pickle.loads(zlib.decompress(f.read()))
+                    os.utime(path)  # keep recently used files on disk
+                    self._remember(key, value)
+                    self.hits += 1
+                    return value
+                os.remove(path)
+            except (OSError, pickle.PickleError, zlib.error):
+                pass
+
+        self.memory.pop(key, None)
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if not self.cache_dir:
+            return
+        with open(self._path(key), "wb") as f:
+            f.write(zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)))
+        self._evict_disk()
+
+    def _remember(self, key, value):
+        self.memory[key] = (time.time(), value)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict_disk(self):
+        files = self.entries()
+        now = time.time()
+        expired = [path for path, mtime, _ in files if now - mtime >= self.ttl]
+        live = [path for path, mtime, _ in files if now - mtime < self.ttl]
+        for path in expired + live[:max(0, len(live) - self.disk_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def entries(self):
+        """Disk entries as (path, mtime, size), least recently used first."""
+        if not self.cache_dir or not os.path.isdir(self.cache_dir):
+            return []
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".zlib"):
+                path = os.path.join(self.cache_dir, name)
+                stat = os.stat(path)
+                files.append((path, stat.st_mtime, stat.st_size))
+        return sorted(files, key=lambda f: f[1])
+
+    def clear(self):
+        self.memory.clear()
+        for path, _, _ in self.entries():
+            os.remove(path)
+
+
+class CachedCursor:
+    """Cursor wrapper that answers repeated read-only queries from the cache.
+
+    Only SELECT/WITH statements that read at least one table of the current
+    schema are cached; everything else goes straight to the wrapped cursor.
+    """
+
+    def __init__(self, cursor, cache=None, version_ttl=VERSION_TTL_SECONDS,
+                 catalog_ttl=CATALOG_TTL_SECONDS):
+        self.cursor = cursor
+        self.cache = cache or ResultCache()
+        self.version_ttl = version_ttl
+        self.catalog_ttl = catalog_ttl
+        self.cache_hit = False
+        self._versions = None
+        self._versions_at = 0
+        self._definitions = {}
+        self._freshness = None
+        self._freshness_at = 0
+        self._rows = None
+        self._description = None
+        self._identity = None
+
+    def _session_identity(self):
+        """Account, role, database and schema of the session, read once unless a USE changes them."""
+        if self._identity is None:
+            self.cursor.execute("SELECT CURRENT_ACCOUNT(), CURRENT_ROLE(), CURRENT_DATABASE(), CURRENT_SCHEMA()")
+            self._identity = "/".join(str(value) for value in self.cursor.fetchone())
+        return self._identity
+
+    def _pipeline_freshness(self):
+        """The PIPELINE_FRESHNESS row as a dict, re-read every few seconds; {} if absent."""
+        if self._freshness is None or time.time() - self._freshness_at > self.version_ttl:
+            try:
+                self.cursor.execute(
+                    f"SELECT RUN_ID, PUBLISHED_AT, CUBE_REFRESHED_AT FROM {FRESHNESS_TABLE} "
+                    "WHERE PIPELINE = 'CUSTOMER_PROFILE'"
+                )
+                row = self.cursor.fetchone()
+            except Exception:
+                row = None  # pipeline not deployed; rely on LAST_ALTERED only
+            columns = ('RUN_ID', 'PUBLISHED_AT', 'CUBE_REFRESHED_AT')
+            self._freshness = {c: str(v) for c, v in zip(columns, row)} if row else {}
+            self._freshness_at = time.time()
+        return self._freshness
+
+    def _object_versions(self, ttl):
+        """LAST_ALTERED of every table and view in the schema, re-read after `ttl` seconds.
+
+        View definitions are read alongside, normalized, or None when the
+        role cannot see them.
+        """
+        if self._versions is None or time.time() - self._versions_at > ttl:
+            self.cursor.execute(
+                "SELECT TABLE_NAME, TABLE_TYPE, LAST_ALTERED FROM INFORMATION_SCHEMA.TABLES "
+                "WHERE TABLE_SCHEMA = CURRENT_SCHEMA()"
+            )
+            self._versions = {name: (table_type, str(altered)) for name, table_type, altered in self.cursor.fetchall()}
+            self.cursor.execute(
+                "SELECT TABLE_NAME, VIEW_DEFINITION FROM INFORMATION_SCHEMA.VIEWS "
+                "WHERE TABLE_SCHEMA = CURRENT_SCHEMA()"
+            )
+            self._definitions = {name: normalize_sql(text) if text else None for name, text in self.cursor.fetchall()}
+            self._versions_at = time.time()
+        return self._versions
+
+    def _dependencies(self, names, versions):
+        """Tables read by `names`, following views; None when a view must not be cached."""
+        tables, seen, pending = set(), set(), list(names)
+        while pending:
+            name = pending.pop()
+            if name in seen:
+                continue
+            seen.add(name)
+            if versions[name][0] != 'VIEW':
+                tables.add(name)
+                continue
+            definition = self._definitions.get(name)
+            if definition is None:
+                # Definition not visible to this role: depend on every table
+                tables |= {n for n, (t, _) in versions.items() if t != 'VIEW'}
+                continue
+            if UNCACHEABLE.search(definition):
+                return None
+            references = (set(re.findall(r"[A-Z_][A-Z0-9_$]*", definition)) & versions.keys()) - {name}
+            if not references:
+                tables.add(name)  # reads only other databases (sample data); its own LAST_ALTERED
+            pending += references
+        return tables
+
+    def version_token(self, normalized):
+        """Data-version token for a query, or None when it should not be cached."""
+        if not re.match(r"^(SELECT|WITH)\b", normalized) or UNCACHEABLE.search(normalized):
+            return None
+
+        freshness = self._pipeline_freshness()
+        # Pipeline tables are versioned by PIPELINE_FRESHNESS, so the catalog
+        # only needs the long TTL when those are all the query reads
+        versions = self._object_versions(self.catalog_ttl if freshness else self.version_ttl)
+        names = set(re.findall(r"[A-Z_][A-Z0-9_$]*", normalized)) & versions.keys()
+        tables = self._dependencies(names, versions) if names else None
+        if not tables:
+            return None
+        if freshness and not tables <= FRESHNESS_COLUMNS.keys():
+            versions = self._object_versions(self.version_ttl)
+            tables = self._dependencies(names & versions.keys(), versions)
+            if not tables:
+                return None
+
+        parts = []
+        for name in sorted(tables):
+            altered = versions[name][1]
+            if freshness and name in FRESHNESS_COLUMNS:
+                altered = freshness[FRESHNESS_COLUMNS[name]]
+            parts.append(f"{name}@{altered}")
+        return ";".join(parts)
+
+    def execute(self, sql, params=None, **kwargs):
+        self.cache_hit = False
+        self._rows = None
+        normalized = normalize_sql(sql)
+        token = self.version_token(normalized)
+        if token is None:
+            if re.match(r"^USE\b", normalized):
+                # Another role or schema sees other data and other objects
+                self._identity = self._versions = self._freshness = None
+            self.cursor.execute(sql, params, **kwargs)
+            return self
+
+        identity = self._session_identity()
+        key = hashlib.sha256(f"{identity}\n{normalized}\n{params!r}\n{token}".encode()).hexdigest()
+        cached = self.cache.get(key)
+        if cached is None:
+            self.cursor.execute(sql, params, **kwargs)
+            cached = ([tuple(column[:2]) for column in self.cursor.description], self.cursor.fetchall())
+            self.cache.put(key, cached)
+        else:
+            self.cache_hit = True
+
+        self._description, rows = cached
+        self._rows = list(rows)
+        return self
+
+    @property
+    def description(self):
+        return self._description if self._rows is not None else self.cursor.description
+
+    @property
+    def rowcount(self):
+        return len(self._rows) if self._rows is not None else self.cursor.rowcount
+
+    def fetchone(self):
+        if self._rows is None:
+            return self.cursor.fetchone()
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size=None):
+        if self._rows is None:
+            return self.cursor.fetchmany(size)
+        size = size or self.cursor.arraysize
+        batch, self._rows = self._rows[:size], self._rows[size:]
+        return batch
+
+    def fetchall(self):
+        if self._rows is None:
+            return self.cursor.fetchall()
+        rows, self._rows = self._rows, []
+        return rows
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the client-side query result cache")
+    parser.add_argument("--clear", action="store_true", help="Delete every cached result")
+    parser.add_argument("--stats", action="store_true", help="Show entry count and disk usage")
+    args = parser.parse_args()
+
+    cache = ResultCache()
+    if args.clear:
+        count = len(cache.entries())
+        cache.clear()
+        print(f"🧹 Removed {count} cached results from {cache.cache_dir}")
+    else:
+        entries = cache.entries()
+        live = [e for e in entries if time.time() - e[1] < cache.ttl]
+        size = sum(e[2] for e in entries)
+        print(f"🗄️  {cache.cache_dir}: {len(live)} live / {len(entries)} entries, {size / 1024:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
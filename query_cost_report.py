@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Query Cost Report
+Shows which BI tool, dashboard and test suite drive warehouse load, from the
+QUERY_TAG attribution in sql/15_query_attribution.sql.
+
+Prints totals per tool from QUERY_ATTRIBUTION_DAILY, then the most expensive
+individual queries of each tool from V_QUERY_ATTRIBUTION.
+
+Usage:
+    python query_cost_report.py --days 7
+    python query_cost_report.py --tool tableau --top 20 --by elapsed
+"""
+
+import argparse
+import json
+
+from connection_strings import get_snowflake_connection
+
+# Report orderings and the V_QUERY_ATTRIBUTION column each one ranks by
+RANKINGS = {
+    'credits': 'ESTIMATED_CREDITS',
+    'elapsed': 'TOTAL_ELAPSED_TIME',
+    'bytes': 'BYTES_SCANNED',
+}
+
+
+def tool_totals(cursor, days, tool=None):
+    """Per-tool totals over the last `days` days."""
+    cursor.execute(f"""
+        SELECT
+            TOOL,
+            SUM(QUERY_COUNT) as QUERIES,
+            SUM(FAILED_COUNT) as FAILED,
+            SUM(TOTAL_ELAPSED_S) as ELAPSED_S,
+            MAX(P95_ELAPSED_S) as WORST_DAILY_P95_S,
+            SUM(QUEUED_S) as QUEUED_S,
+            SUM(BYTES_SCANNED) as BYTES_SCANNED,
+            SUM(ESTIMATED_CREDITS) as CREDITS
+        FROM QUERY_ATTRIBUTION_DAILY
+        WHERE QUERY_DATE >= DATEADD('day', -%s, CURRENT_DATE())
+          {"AND TOOL = %s" if tool else ""}
+        GROUP BY TOOL
+        ORDER BY CREDITS DESC
+    """, (days, tool) if tool else (days,))
+    columns = [column[0].lower() for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def top_queries(cursor, days, top, ranking, tool=None):
+    """The `top` most expensive queries of each tool."""
+    column = RANKINGS[ranking]
+    cursor.execute(f"""
+        SELECT TOOL, DASHBOARD, SUITE, ROLE_NAME, WAREHOUSE_NAME, QUERY_ID, START_TIME,
+               TOTAL_ELAPSED_TIME / 1000 as ELAPSED_S, BYTES_SCANNED, ESTIMATED_CREDITS,
+               LEFT(REGEXP_REPLACE(QUERY_TEXT, '\\\\s+', ' '), 120) as QUERY_TEXT
+        FROM V_QUERY_ATTRIBUTION
+        WHERE START_TIME >= DATEADD('day', -%s, CURRENT_TIMESTAMP())
+          {"AND TOOL = %s" if tool else ""}
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY TOOL ORDER BY {column} DESC NULLS LAST) <= %s
+        ORDER BY TOOL, {column} DESC NULLS LAST
+    """, (days, tool, top) if tool else (days, top))
+    columns = [column[0].lower() for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def print_report(totals, queries):
+    print("💰 COST BY TOOL")
+    print("-" * 60)
+    for t in totals:
+        print(f"🧰 {t['tool']}: {t['queries']:,} queries ({t['failed']:,} failed), "
+              f"{t['elapsed_s'] or 0:,.0f}s elapsed, {t['queued_s'] or 0:,.0f}s queued, "
+              f"{(t['bytes_scanned'] or 0) / 1024 ** 3:,.2f} GB scanned, ~{t['credits'] or 0:,.3f} credits")
+
+    current_tool = None
+    for q in queries:
+        if q['tool'] != current_tool:
+            current_tool = q['tool']
+            print(f"\n🔥 MOST EXPENSIVE: {current_tool}")
+            print("-" * 60)
+        source = q['dashboard'] if q['dashboard'] != '(none)' else q['suite']
+        print(f"   {q['elapsed_s']:,.2f}s, {(q['bytes_scanned'] or 0) / 1024 ** 2:,.1f} MB, "
+              f"~{q['estimated_credits'] or 0:.4f} cr | {source} | {q['role_name']} | {q['query_id']}")
+        print(f"      {q['query_text']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report warehouse cost and latency by BI tool, dashboard and role")
+    parser.add_argument("--days", type=int, default=7, help="Look-back window in days (default: 7)")
+    parser.add_argument("--top", type=int, default=5, help="Queries to list per tool (default: 5)")
+    parser.add_argument("--by", choices=sorted(RANKINGS), default="credits", help="Rank queries by (default: credits)")
+    parser.add_argument("--tool", help="Only report one tool (tableau, powerbi, looker, python, ...)")
+    parser.add_argument("--format", choices=["table", "json"], default="table", help="Output format (default: table)")
+    args = parser.parse_args()
+
+    conn = get_snowflake_connection()
+    try:
+        cursor = conn.cursor()
+        totals = tool_totals(cursor, args.days, args.tool)
+        queries = top_queries(cursor, args.days, args.top, args.by, args.tool)
+        cursor.close()
+    finally:
+        conn.close()
+
+    if args.format == "json":
+        print(json.dumps({'days': args.days, 'tools': totals, 'top_queries': queries}, indent=2, default=str))
+    else:
+        print(f"📊 Query Cost Report: last {args.days} days")
+        print("=" * 60)
+        print_report(totals, queries)
+
+
+if __name__ == "__main__":
+    main()
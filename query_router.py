@@ -0,0 +1,508 @@
+#!/usr/bin/env python3
+"""
+Aggregate-Aware Query Router
+Rewrites dashboard SQL against CUSTOMER_LINEITEM_PROFILE or V_ORDER_DETAILS
+to read a pre-built rollup (the KPI cube, the HLL sketch table or the
+materialized KPI tables) whenever the rollup covers every dimension, filter
+and measure of the query. Anything else runs unchanged on the base table,
+and the routing decision says why.
+
+Only single-table aggregate queries are rewritten:
+    SELECT <dimensions and aggregates> FROM <base> [WHERE a AND b ...]
+    [GROUP BY ...] [ORDER BY ...] [LIMIT n]
+
+Usage:
+    python query_router.py --file sql/powerbi_sample_queries.sql
+    python query_router.py --sql "SELECT O_ORDERSTATUS, COUNT(*) FROM CUSTOMER_LINEITEM_PROFILE GROUP BY 1"
+
+In code, wrap a connector cursor so every execute() is routed:
+    cursor = RoutedCursor(conn.cursor())
+"""
+
+import argparse
+import re
+
+# Rollups in preference order per base table (smallest first).
+#
+# dimensions: base expression -> (rollup expression, rollup column it needs,
+#             True when several rollup rows merge into one value, e.g. YEAR)
+# measures:   base aggregate -> rollup expression (additive or ratio of sums)
+# distinct:   base column -> (exact expression or None, HLL expression or None,
+#             rollup columns the distinct count is additive across)
+# cube:       GROUPING bit per column for GROUP BY CUBE tables
+# grain:      key columns of a plain rollup table
+# date_column: base date column that can be filtered on whole months
+AGGREGATES = [
+    {
+        'name': 'CUSTOMER_PROFILE_KPI_CUBE',
+        'base': 'CUSTOMER_LINEITEM_PROFILE',
+        'cube': {'ORDER_MONTH': 8, 'REGION': 4, 'MARKET_SEGMENT': 2, 'O_ORDERSTATUS': 1},
+        'dimensions': {
+            "DATE_TRUNC('MONTH',O_ORDERDATE)": ('ORDER_MONTH', 'ORDER_MONTH', False),
+            "DATE_TRUNC('YEAR',O_ORDERDATE)": ("DATE_TRUNC('YEAR', ORDER_MONTH)", 'ORDER_MONTH', True),
+            "YEAR(O_ORDERDATE)": ('YEAR(ORDER_MONTH)', 'ORDER_MONTH', True),
+            "O_ORDERSTATUS": ('O_ORDERSTATUS', 'O_ORDERSTATUS', False),
+        },
+        'measures': {
+            'COUNT(*)': 'SUM(LINE_COUNT)',
+            'SUM(L_QUANTITY)': 'SUM(TOTAL_QUANTITY)',
+            'SUM(PRICE_AFTER_DISCOUNT)': 'SUM(TOTAL_REVENUE)',
+            'AVG(PRICE_AFTER_DISCOUNT)': 'SUM(TOTAL_REVENUE) / SUM(LINE_COUNT)',
+            'AVG(PRICE_PER_QTY)': 'SUM(PRICE_PER_QTY_SUM) / SUM(LINE_COUNT)',
+        },
+        'distinct': {
+            # An order has one month, customer and status, so orders never span cells
+            'O_ORDERKEY': ('SUM(ORDER_COUNT)', None, {'ORDER_MONTH', 'REGION', 'MARKET_SEGMENT', 'O_ORDERSTATUS'}),
+            # A customer has one region and segment but orders across months and statuses
+            'O_CUSTKEY': ('SUM(CUSTOMER_COUNT)', 'HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH))', {'REGION', 'MARKET_SEGMENT'}),
+        },
+        'date_column': ('O_ORDERDATE', 'ORDER_MONTH'),
+    },
+    {
+        'name': 'DT_MARKET_SEGMENT_ANALYSIS',
+        'base': 'V_ORDER_DETAILS',
+        'grain': {'MARKET_SEGMENT', 'REGION'},
+        'dimensions': {
+            'MARKET_SEGMENT': ('MARKET_SEGMENT', 'MARKET_SEGMENT', False),
+            'REGION': ('REGION', 'REGION', False),
+        },
+        'measures': {
+            'COUNT(*)': 'SUM(ORDER_COUNT)',
+            'SUM(O_TOTALPRICE)': 'SUM(TOTAL_REVENUE)',
+            'AVG(O_TOTALPRICE)': 'SUM(TOTAL_REVENUE) / SUM(ORDER_COUNT)',
+        },
+        'distinct': {
+            'O_ORDERKEY': ('SUM(ORDER_COUNT)', None, {'MARKET_SEGMENT', 'REGION'}),
+            'O_CUSTKEY': ('SUM(CUSTOMER_COUNT)', None, {'MARKET_SEGMENT', 'REGION'}),
+        },
+    },
+    {
+        'name': 'DT_MONTHLY_REVENUE_BY_REGION',
+        'base': 'V_ORDER_DETAILS',
+        'grain': {'ORDER_MONTH', 'REGION'},
+        'dimensions': {
+            "DATE_TRUNC('MONTH',O_ORDERDATE)": ('ORDER_MONTH', 'ORDER_MONTH', False),
+            "DATE_TRUNC('YEAR',O_ORDERDATE)": ("DATE_TRUNC('YEAR', ORDER_MONTH)", 'ORDER_MONTH', True),
+            "YEAR(O_ORDERDATE)": ('YEAR(ORDER_MONTH)', 'ORDER_MONTH', True),
+            'REGION': ('REGION', 'REGION', False),
+        },
+        'measures': {
+            'COUNT(*)': 'SUM(ORDER_COUNT)',
+            'SUM(O_TOTALPRICE)': 'SUM(TOTAL_REVENUE)',
+            'AVG(O_TOTALPRICE)': 'SUM(TOTAL_REVENUE) / SUM(ORDER_COUNT)',
+        },
+        'distinct': {
+            'O_ORDERKEY': ('SUM(ORDER_COUNT)', None, {'ORDER_MONTH', 'REGION'}),
+            'O_CUSTKEY': ('SUM(CUSTOMER_COUNT)', None, {'REGION'}),
+        },
+        'date_column': ('O_ORDERDATE', 'ORDER_MONTH'),
+    },
+    {
+        'name': 'ORDER_DISTINCT_SKETCHES',
+        'base': 'V_ORDER_DETAILS',
+        'grain': {'ORDER_MONTH', 'REGION', 'MARKET_SEGMENT', 'O_ORDERSTATUS'},
+        'dimensions': {
+            "DATE_TRUNC('MONTH',O_ORDERDATE)": ('ORDER_MONTH', 'ORDER_MONTH', False),
+            "DATE_TRUNC('YEAR',O_ORDERDATE)": ("DATE_TRUNC('YEAR', ORDER_MONTH)", 'ORDER_MONTH', True),
+            "YEAR(O_ORDERDATE)": ('YEAR(ORDER_MONTH)', 'ORDER_MONTH', True),
+            'REGION': ('REGION', 'REGION', False),
+            'MARKET_SEGMENT': ('MARKET_SEGMENT', 'MARKET_SEGMENT', False),
+            'O_ORDERSTATUS': ('O_ORDERSTATUS', 'O_ORDERSTATUS', False),
+        },
+        'measures': {
+            'COUNT(*)': 'SUM(ORDER_COUNT)',
+            'SUM(O_TOTALPRICE)': 'SUM(TOTAL_REVENUE)',
+            'AVG(O_TOTALPRICE)': 'SUM(TOTAL_REVENUE) / SUM(ORDER_COUNT)',
+        },
+        'distinct': {
+            'O_ORDERKEY': ('SUM(ORDER_COUNT)', None, {'ORDER_MONTH', 'REGION', 'MARKET_SEGMENT', 'O_ORDERSTATUS'}),
+            'O_CUSTKEY': (None, 'HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH))', set()),
+        },
+        'date_column': ('O_ORDERDATE', 'ORDER_MONTH'),
+    },
+]
+
+CLAUSES = [
+    ('select', r"^\s*SELECT\b"),
+    ('from', r"\bFROM\b"),
+    ('where', r"\bWHERE\b"),
+    ('group_by', r"\bGROUP\s+BY\b"),
+    ('having', r"\bHAVING\b"),
+    ('order_by', r"\bORDER\s+BY\b"),
+    ('limit', r"\bLIMIT\b"),
+]
+UNSUPPORTED = [
+    (r"^\s*WITH\b", "common table expressions"),
+    (r"\bJOIN\b", "joins"),
+    (r"\bUNION\b|\bINTERSECT\b|\bEXCEPT\b|\bMINUS\b", "set operations"),
+    (r"\bOVER\b", "window functions"),
+    (r"\bQUALIFY\b", "QUALIFY"),
+    (r"\bSELECT\s+DISTINCT\b", "SELECT DISTINCT"),
+]
+MEASURE_PATTERN = re.compile(r"^(SUM|AVG|MIN|MAX|COUNT|APPROX_COUNT_DISTINCT)\((DISTINCT )?(.+)\)$")
+MONTH_START = re.compile(r"^(?:DATE\s*)?'(\d{4}-\d{2})-01'(?:::DATE)?$", re.I)
+
+
+class UnsupportedQuery(ValueError):
+    """Raised when a query cannot be answered from a given rollup."""
+
+
+def strip_comments(sql):
+    sql = re.sub(r"/\*.*?\*/", " ", sql, flags=re.S)
+    return re.sub(r"--[^\n]*", " ", sql)
+
+
+def mask_nested(text):
+    """Blank out string literals and parenthesised text, keeping offsets."""
+    out, depth, quoted = [], 0, False
+    for ch in text:
+        if quoted:
+            out.append("'" if ch == "'" else " ")
+            quoted = ch != "'"
+        elif ch == "'":
+            out.append("'" if depth == 0 else " ")
+            quoted = True
+        elif ch == "(":
+            depth += 1
+            out.append("(" if depth == 1 else " ")
+        elif ch == ")":
+            depth -= 1
+            out.append(")" if depth == 0 else " ")
+        else:
+            out.append(ch if depth == 0 else " ")
+    return "".join(out)
+
+
+def split_top_level(text, pattern):
+    """Split on a regex that only matches outside literals and parentheses."""
+    masked = mask_nested(text)
+    parts, start = [], 0
+    for match in re.finditer(pattern, masked, flags=re.I):
+        parts.append(text[start:match.start()].strip())
+        start = match.end()
+    parts.append(text[start:].strip())
+    return [part for part in parts if part]
+
+
+def canonical(expr):
+    """Uppercase an expression and drop optional whitespace for matching."""
+    expr = re.sub(r"\s+", " ", expr.strip()).upper()
+    return re.sub(r"\s*([(),])\s*", r"\1", expr)
+
+
+def parse_query(sql):
+    """Split a single-table aggregate query into its clauses."""
+    text = strip_comments(sql).strip().rstrip(";").strip()
+    masked = mask_nested(text).upper()
+
+    for pattern, label in UNSUPPORTED:
+        if re.search(pattern, masked):
+            raise UnsupportedQuery(f"{label} are not routed")
+
+    found = []
+    for name, pattern in CLAUSES:
+        match = re.search(pattern, masked)
+        if match:
+            found.append((match.start(), match.end(), name))
+    found.sort()
+    if not found or found[0][2] != 'select':
+        raise UnsupportedQuery("not a SELECT statement")
+
+    clauses = {}
+    for i, (_, end, name) in enumerate(found):
+        stop = found[i + 1][0] if i + 1 < len(found) else len(text)
+        clauses[name] = text[end:stop].strip()
+
+    if 'from' not in clauses:
+        raise UnsupportedQuery("no FROM clause")
+    if 'having' in clauses:
+        raise UnsupportedQuery("HAVING is not routed")
+
+    source = re.match(r"^(?:[\w$]+\.){0,2}([\w$]+)(?:\s+(?:AS\s+)?([\w$]+))?$", clauses['from'], re.I)
+    if not source:
+        raise UnsupportedQuery("FROM is not a single table")
+    table, alias = source.group(1).upper(), source.group(2)
+
+    # Drop the table alias so expressions match the registry
+    if alias:
+        for name in clauses:
+            clauses[name] = re.sub(rf"\b{re.escape(alias)}\.", "", clauses[name], flags=re.I)
+
+    items = []
+    for item in split_top_level(clauses['select'], r","):
+        match = re.match(r"^(.+?)\s+(?:AS\s+)?([A-Za-z_][\w$]*|\"[^\"]+\")$", item, re.S | re.I)
+        if match and not re.search(r"[-+*/,(]$", match.group(1).strip()):
+            items.append((match.group(1).strip(), match.group(2)))
+        else:
+            items.append((item, None))
+
+    return {
+        'table': table,
+        'items': items,
+        'where': split_top_level(clauses.get('where', ''), r"\bAND\b"),
+        'group_by': split_top_level(clauses.get('group_by', ''), r","),
+        'order_by': split_top_level(clauses.get('order_by', ''), r","),
+        'limit': clauses.get('limit'),
+    }
+
+
+def resolve_group_by(query):
+    """Turn GROUP BY aliases and ordinals into canonical select expressions."""
+    aliases = {alias.strip('"').upper(): expr for expr, alias in query['items'] if alias}
+    exprs = []
+    for item in query['group_by']:
+        if item.isdigit():
+            position = int(item) - 1
+            if position >= len(query['items']):
+                raise UnsupportedQuery(f"GROUP BY {item} is out of range")
+            item = query['items'][position][0]
+        else:
+            item = aliases.get(item.strip('"').upper(), item)
+        exprs.append(canonical(item))
+    return exprs
+
+
+def rewrite_measure(expr, aggregate, pinned, allow_approx):
+    """Map one base aggregate onto the rollup; returns (sql, approximate)."""
+    match = MEASURE_PATTERN.match(expr)
+    if not match:
+        raise UnsupportedQuery(f"{expr} is not a dimension or supported aggregate")
+    func, distinct, arg = match.groups()
+
+    if func == 'COUNT' and not distinct and arg in ('*', '1'):
+        expr = 'COUNT(*)'
+    if func == 'APPROX_COUNT_DISTINCT' or (func == 'COUNT' and distinct):
+        if arg not in aggregate['distinct']:
+            raise UnsupportedQuery(f"no distinct count of {arg}")
+        exact_sql, approx_sql, additive_over = aggregate['distinct'][arg]
+        cell_dims = aggregate['cell_dims']
+        if exact_sql and (cell_dims - additive_over) <= pinned:
+            return exact_sql, False
+        if approx_sql and (allow_approx or func == 'APPROX_COUNT_DISTINCT'):
+            return approx_sql, True
+        raise UnsupportedQuery(
+            f"COUNT(DISTINCT {arg}) would merge several rollup rows "
+            f"(allow approximate counts to route it)"
+        )
+
+    if expr not in aggregate['measures']:
+        raise UnsupportedQuery(f"{expr} is not stored")
+    return aggregate['measures'][expr], False
+
+
+def rewrite_filter(conjunct, aggregate):
+    """Map one WHERE conjunct; returns (sql, rollup column, is_equality)."""
+    match = re.match(r"^(.+?)\s*(<>|!=|>=|<=|=|>|<|\bNOT\s+IN\b|\bIN\b)\s*(.+)$", conjunct, re.S | re.I)
+    if not match or re.search(r"\bOR\b", mask_nested(conjunct), re.I):
+        raise UnsupportedQuery(f"filter {conjunct!r} is not a simple comparison")
+    lhs, op, rhs = canonical(match.group(1)), match.group(2).upper(), match.group(3).strip()
+
+    date_column = aggregate.get('date_column')
+    if date_column and lhs == date_column[0]:
+        # Whole-month boundaries map exactly onto the month column
+        if op in ('>=', '<') and MONTH_START.match(rhs):
+            return f"{date_column[1]} {op} {rhs}", date_column[1], False
+        raise UnsupportedQuery(f"{lhs} filter is not aligned to month boundaries")
+
+    if lhs not in aggregate['dimensions']:
+        raise UnsupportedQuery(f"cannot filter on {lhs}")
+    column_sql, column, merges = aggregate['dimensions'][lhs]
+    # YEAR(...) = 1995 still spans twelve month rows, so it does not pin the column
+    return f"{column_sql} {op} {rhs}", column, op == '=' and not merges
+
+
+def rewrite_for(query, aggregate, allow_approx):
+    """Rewrite a parsed query onto one rollup or raise UnsupportedQuery."""
+    dimensions = aggregate['dimensions']
+    group_exprs = resolve_group_by(query)
+    for expr in group_exprs:
+        if expr not in dimensions:
+            raise UnsupportedQuery(f"cannot group by {expr}")
+
+    filters = [rewrite_filter(conjunct, aggregate) for conjunct in query['where']]
+
+    # Rollup columns that must be kept apart, and those fixed to one value per group
+    needed = {dimensions[expr][1] for expr in group_exprs} | {column for _, column, _ in filters}
+    pinned = {dimensions[expr][1] for expr in group_exprs if not dimensions[expr][2]}
+    pinned |= {column for _, column, equality in filters if equality}
+    cube = aggregate.get('cube')
+    aggregate = dict(aggregate, cell_dims=needed if cube else aggregate['grain'])
+
+    select_sql, rewritten, approximate = [], {}, False
+    for expr, alias in query['items']:
+        key = canonical(expr)
+        if key in dimensions:
+            if key not in group_exprs:
+                raise UnsupportedQuery(f"{expr} is selected but not grouped")
+            item_sql = dimensions[key][0]
+        else:
+            item_sql, approx = rewrite_measure(key, aggregate, pinned, allow_approx)
+            approximate = approximate or approx
+        rewritten[key] = item_sql
+        if alias is None:
+            alias = expr if re.match(r"^[A-Za-z_][\w$]*$", expr) else '"' + key.replace('"', '""') + '"'
+        select_sql.append(f"{item_sql} as {alias}")
+
+    where_sql = [f"{column_sql}" for column_sql, _, _ in filters]
+    if cube:
+        rolled_up = sum(bit for column, bit in cube.items() if column not in needed)
+        where_sql.insert(0, f"GROUPING_ID = {rolled_up}")
+
+    order_sql = []
+    aliases = {alias.strip('"').upper() for _, alias in query['items'] if alias}
+    for item in query['order_by']:
+        match = re.match(r"^(.+?)((?:\s+(?:ASC|DESC))?(?:\s+NULLS\s+(?:FIRST|LAST))?)$", item, re.S | re.I)
+        expr, direction = match.group(1), match.group(2)
+        key = canonical(expr)
+        if expr.isdigit() or expr.strip('"').upper() in aliases:
+            order_sql.append(item)
+        elif key in rewritten:
+            order_sql.append(rewritten[key] + direction)
+        elif key in dimensions:
+            order_sql.append(dimensions[key][0] + direction)
+        else:
+            order_sql.append(rewrite_measure(key, aggregate, pinned, allow_approx)[0] + direction)
+
+    sql = "SELECT " + ",\n       ".join(select_sql) + f"\nFROM {aggregate['name']}"
+    if where_sql:
+        sql += "\nWHERE " + "\n  AND ".join(where_sql)
+    if group_exprs:
+        sql += "\nGROUP BY " + ", ".join(dimensions[expr][0] for expr in group_exprs)
+    if order_sql:
+        sql += "\nORDER BY " + ", ".join(order_sql)
+    if query['limit']:
+        sql += f"\nLIMIT {query['limit']}"
+    return sql, approximate
+
+
+def route(sql, allow_approx=False, available=None):
+    """Route a query to the first rollup that covers it.
+
+    Returns a dict with the SQL to run, the chosen target, whether the result
+    is approximate, and the reason for the decision. `available` restricts
+    routing to rollups known to exist (see load_available()).
+    """
+    try:
+        query = parse_query(sql)
+    except UnsupportedQuery as e:
+        return {'routed': False, 'sql': sql, 'target': None, 'approximate': False, 'reason': str(e)}
+
+    if query['table'] in {a['name'] for a in AGGREGATES}:
+        return {'routed': False, 'sql': sql, 'target': query['table'], 'approximate': False,
+                'reason': f"already reads the {query['table']} rollup"}
+
+    candidates = [a for a in AGGREGATES if a['base'] == query['table']]
+    if available is not None:
+        candidates = [a for a in candidates if a['name'] in available]
+    if not candidates:
+        return {'routed': False, 'sql': sql, 'target': query['table'], 'approximate': False,
+                'reason': f"no rollups available for {query['table']}"}
+
+    reasons = []
+    for aggregate in candidates:
+        try:
+            routed_sql, approximate = rewrite_for(query, aggregate, allow_approx)
+        except UnsupportedQuery as e:
+            reasons.append(f"{aggregate['name']}: {e}")
+            continue
+        return {'routed': True, 'sql': routed_sql, 'target': aggregate['name'], 'approximate': approximate,
+                'reason': f"covered by {aggregate['name']}"}
+
+    return {'routed': False, 'sql': sql, 'target': query['table'], 'approximate': False,
+            'reason': "; ".join(reasons)}
+
+
+def load_available(cursor):
+    """Return the rollups from the registry that exist in the current schema."""
+    names = sorted({a['name'] for a in AGGREGATES})
+    cursor.execute(
+        "SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES "
+        "WHERE TABLE_SCHEMA = CURRENT_SCHEMA() AND TABLE_NAME IN (" + ", ".join(["%s"] * len(names)) + ")",
+        names,
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+class RoutedCursor:
+    """Cursor wrapper that routes every parameterless execute() call."""
+
+    def __init__(self, cursor, allow_approx=False, available=None):
+        self.cursor = cursor
+        self.allow_approx = allow_approx
+        self.available = load_available(cursor) if available is None else available
+        self.last_route = None
+
+    def execute(self, sql, params=None, **kwargs):
+        if params is None:
+            self.last_route = route(sql, self.allow_approx, self.available)
+            sql = self.last_route['sql']
+        else:
+            self.last_route = None
+        return self.cursor.execute(sql, params, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+def split_statements(text):
+    """Split a SQL file into (title, statement) pairs titled by their comments."""
+    # Blank comments first so apostrophes in them do not open string literals
+    blanked = re.sub(r"--[^\n]*|/\*.*?\*/", lambda m: " " * len(m.group()), text, flags=re.S)
+    cuts = [m.start() for m in re.finditer(r";", mask_nested(blanked))]
+    chunks = [text[start + 1:end] for start, end in zip([-1] + cuts, cuts + [len(text)])]
+
+    statements = []
+    for chunk in chunks:
+        titles = re.findall(r"^\s*--\s*(\S.*)$", chunk, re.M)
+        numbered = [title for title in titles if re.match(r"\d+\.", title)]
+        body = strip_comments(chunk).strip()
+        if body:
+            title = numbered[-1] if numbered else titles[0] if titles else body.split("\n")[0]
+            statements.append((title, body))
+    return statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show how dashboard SQL is routed to pre-built rollups")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--sql", help="A single query to route")
+    source.add_argument("--file", help="A .sql file of dashboard queries to route")
+    parser.add_argument("--approx", action="store_true", help="Allow HLL estimates for distinct counts")
+    parser.add_argument("--connect", action="store_true", help="Only route to rollups that exist in Snowflake")
+    args = parser.parse_args()
+
+    available = None
+    if args.connect:
+        from connection_strings import get_snowflake_connection
+        conn = get_snowflake_connection()
+        try:
+            available = load_available(conn.cursor())
+        finally:
+            conn.close()
+        print(f"📦 Available rollups: {', '.join(sorted(available)) or 'none'}")
+
+    if args.sql:
+        statements = [("query", args.sql)]
+    else:
+        with open(args.file) as f:
+            statements = split_statements(f.read())
+
+    print("🧭 Query Routing")
+    print("=" * 60)
+    routed = 0
+    for title, sql in statements:
+        decision = route(sql, args.approx, available)
+        if decision['routed']:
+            routed += 1
+            note = " (approximate)" if decision['approximate'] else ""
+            print(f"✅ {title} → {decision['target']}{note}")
+            if args.sql:
+                print(decision['sql'])
+        else:
+            print(f"↩️  {title} → base table: {decision['reason']}")
+
+    print(f"\n📊 {routed}/{len(statements)} queries routed to rollups")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,8 @@ import getpass
 import json
 import os
 
+from connection_strings import workload_warehouse
+
 def test_tableau_quick():
     """Quick Tableau connection test"""
     print("🎨 TABLEAU CONNECTION TEST")
@@ -63,7 +65,7 @@ def test_powerbi_quick():
     print("1. Open Power BI Desktop")
     print("2. Get Data → More → Database → Snowflake")
     print("3. Server: JHYWOUK-WA83239.snowflakecomputing.com")
-    print("4. Warehouse: COMPUTE_WH")
+    print("4. Warehouse: ANALYTICS_WH")
     print("5. Enter credentials and connect")
     
     return True
@@ -118,7 +120,7 @@ def test_snowflake_connection():
             user='ALGORYTHMOS',
             password=password,
             role='DASHBOARD_ANALYST_ROLE',
-            warehouse='COMPUTE_WH',
+            warehouse=workload_warehouse('validation'),
             database='TPCH_DASHBOARDS',
             schema='PUBLIC'
         )
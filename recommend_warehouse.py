@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+"""
+Warehouse Sizing Recommender
+Replays the collected query history (QUERY_RUN_HISTORY, 09_observability.sql)
+against candidate warehouse sizes, cluster counts and auto-suspend values,
+and recommends the cheapest setting that meets a latency target. The BI and
+pipeline workloads are analyzed separately.
+
+The replay keeps each query's arrival time, scales its execution time to the
+candidate size and queues it when every cluster is busy. Billing follows the
+warehouse state: a resume starts a billed segment (60 second minimum) that
+ends auto-suspend seconds after the last query. How execution time scales
+with size is calibrated from benchmark_dashboard.py runs saved on different
+warehouse sizes; without them it defaults to SCALING_EXPONENT.
+
+This is a model: concurrent queries are treated as independent slots and
+cache warm-up after a resume is ignored, so compare candidates with each
+other rather than reading the credits as a forecast of the bill.
+
+Usage:
+    python recommend_warehouse.py --days 14
+    python recommend_warehouse.py --workload bi --p95-target 2.5
+"""
+
+import argparse
+import glob
+import heapq
+import json
+import math
+import os
+import statistics
+
+from benchmark_dashboard import RESULTS_DIR
+from connection_strings import get_snowflake_connection
+
+CREDITS_PER_HOUR = {'X-Small': 1, 'Small': 2, 'Medium': 4, 'Large': 8, 'X-Large': 16}
+SIZE_ALIASES = {name.upper().replace('-', ''): name for name in CREDITS_PER_HOUR}
+CANDIDATE_CLUSTERS = [1, 2, 3]
+CANDIDATE_AUTO_SUSPEND = [60, 120, 300, 600]
+MAX_CONCURRENCY = 8          # MAX_CONCURRENCY_LEVEL default
+RESUME_SECONDS = 1.0         # provisioning delay of a suspended warehouse or new cluster
+SCALE_IN_SECONDS = 120       # idle time before an extra cluster shuts down
+MIN_BILLED_SECONDS = 60
+MIN_EXECUTION_MS = 50        # below this, queries do not get faster on bigger warehouses
+SCALING_EXPONENT = 0.7       # execution time ~ (credits/hour) ** -exponent
+
+# Workload of each collected query, from its attribution (15_query_attribution.sql):
+# the tagged workload class when present, otherwise the tool and query type
+WORKLOADS = {
+    'bi': "COALESCE(WORKLOAD = 'interactive', TOOL IN ('tableau', 'powerbi', 'looker', 'bi'))",
+    'pipeline': "COALESCE(WORKLOAD = 'pipeline', TOOL NOT IN ('tableau', 'powerbi', 'looker', 'bi') AND "
+                "(TOOL = 'untagged' OR QUERY_TYPE IN "
+                "('INSERT', 'MERGE', 'UPDATE', 'DELETE', 'CREATE_TABLE_AS_SELECT', 'UNLOAD', 'CALL')))",
+}
+DEFAULT_P95_TARGETS = {'bi': 3.0, 'pipeline': None}   # None: no slower than today
+
+
+def normalize_size(size):
+    return SIZE_ALIASES.get((size or '').upper().replace('-', '').replace('_', ''))
+
+
+def load_queries(cursor, workload, days):
+    """Arrival offsets and timings of a workload's warehouse queries, oldest first."""
+    cursor.execute(f"""
+        SELECT
+            DATEDIFF('millisecond', MIN(START_TIME) OVER (), START_TIME) / 1000 as ARRIVAL_S,
+            TOTAL_ELAPSED_TIME - EXECUTION_TIME - QUEUED_TIME as COMPILATION_TIME,
+            EXECUTION_TIME,
+            QUEUED_TIME,
+            WAREHOUSE_NAME,
+            WAREHOUSE_SIZE
+        FROM V_QUERY_ATTRIBUTION
+        WHERE START_TIME >= DATEADD('day', -%s, CURRENT_TIMESTAMP())
+          AND WAREHOUSE_SIZE IS NOT NULL
+          AND EXECUTION_TIME > 0
+          AND {WORKLOADS[workload]}
+        ORDER BY START_TIME
+    """, (days,))
+    queries = []
+    for arrival, compile_ms, execution_ms, queued_ms, warehouse, size in cursor.fetchall():
+        size = normalize_size(size)
+        if size:
+            queries.append({'arrival': float(arrival), 'compile_s': (compile_ms or 0) / 1000,
+                            'execution_ms': execution_ms, 'queued_s': (queued_ms or 0) / 1000,
+                            'warehouse': warehouse, 'size': size})
+    return queries
+
+
+def current_settings(cursor, warehouse):
+    """Size, auto-suspend and max clusters of a warehouse as configured now."""
+    cursor.execute(f"SHOW WAREHOUSES LIKE '{warehouse}'")
+    columns = [column[0].lower() for column in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    if not rows:
+        return None
+    row = rows[0]
+    return {'size': normalize_size(row['size']), 'clusters': int(row.get('max_cluster_count') or 1),
+            'auto_suspend': int(row['auto_suspend'] or 0)}
+
+
+def calibrate_exponent(results_dir=RESULTS_DIR):
+    """Scaling exponent from benchmark cases measured on two or more sizes."""
+    p50s = {}
+    for path in glob.glob(os.path.join(results_dir, "*.json")):
+        with open(path) as f:
+            run = json.load(f)
+        size = normalize_size(run.get('warehouse_size'))
+        if not size or 'results' not in run:
+            continue
+        for result in run['results']:
+            if result.get('status') == 'success' and result['p50'] > 0:
+                p50s.setdefault((run['suite'], result['case'], result['variant']), {})[size] = result['p50']
+
+    exponents = []
+    for by_size in p50s.values():
+        sizes = sorted(by_size, key=CREDITS_PER_HOUR.get)
+        for small, large in zip(sizes, sizes[1:]):
+            ratio = math.log(CREDITS_PER_HOUR[large] / CREDITS_PER_HOUR[small])
+            exponents.append(math.log(by_size[small] / by_size[large]) / ratio)
+    if not exponents:
+        return SCALING_EXPONENT, 0
+    return min(1.0, max(0.0, statistics.median(exponents))), len(exponents)
+
+
+def scaled_seconds(query, size, exponent):
+    """Execution time of a query on `size`, from its time on the recorded size."""
+    execution_ms = query['execution_ms']
+    if execution_ms > MIN_EXECUTION_MS:
+        speedup = (CREDITS_PER_HOUR[size] / CREDITS_PER_HOUR[query['size']]) ** exponent
+        execution_ms = max(MIN_EXECUTION_MS, execution_ms / speedup)
+    return execution_ms / 1000
+
+
+def simulate(queries, size, clusters, auto_suspend, exponent, concurrency=MAX_CONCURRENCY):
+    """Replay the queries on one warehouse configuration."""
+    # Per cluster: heap of running query end times, end of its last query,
+    # and the start of its billed segment (None while suspended)
+    running = [[] for _ in range(clusters)]
+    last_end = [0.0] * clusters
+    segment_start = [None] * clusters
+    billed = busy = 0.0   # busy: seconds with at least one query running
+    resumes = 0
+    latencies = []
+    queued = []
+
+    def idle_timeout(i):
+        return auto_suspend if i == 0 else max(auto_suspend, SCALE_IN_SECONDS)
+
+    def close_segment(i, until):
+        nonlocal billed
+        billed += max(MIN_BILLED_SECONDS, until - segment_start[i])
+        segment_start[i] = None
+
+    for query in queries:
+        t = query['arrival']
+        for i in range(clusters):
+            while running[i] and running[i][0] <= t:
+                heapq.heappop(running[i])
+            if segment_start[i] is not None and not running[i] and t - last_end[i] > idle_timeout(i):
+                close_segment(i, last_end[i] + idle_timeout(i))
+
+        active = [i for i in range(clusters) if segment_start[i] is not None]
+        free = [i for i in active if len(running[i]) < concurrency]
+        if free:
+            cluster, start = free[0], t
+        elif len(active) < clusters:
+            # Resume the warehouse, or start another cluster when all are busy
+            cluster = next(i for i in range(clusters) if segment_start[i] is None)
+            segment_start[cluster] = t
+            start = t + RESUME_SECONDS
+            resumes += 1
+        else:
+            cluster = min(active, key=lambda i: running[i][0])
+            start = heapq.heappop(running[cluster])
+
+        duration = scaled_seconds(query, size, exponent)
+        end = start + duration
+        heapq.heappush(running[cluster], end)
+        busy += max(0.0, end - max(start, last_end[cluster]))
+        last_end[cluster] = max(last_end[cluster], end)
+        queued.append(start - t)
+        latencies.append(query['compile_s'] + (start - t) + duration)
+
+    for i in range(clusters):
+        if segment_start[i] is not None:
+            close_segment(i, last_end[i] + idle_timeout(i))
+
+    span_days = max(1.0, (queries[-1]['arrival'] - queries[0]['arrival']) / 86400) if queries else 1.0
+    credits = billed / 3600 * CREDITS_PER_HOUR[size]
+    return {
+        'size': size,
+        'clusters': clusters,
+        'auto_suspend': auto_suspend,
+        'p50_s': percentile(latencies, 50),
+        'p95_s': percentile(latencies, 95),
+        'p95_queued_s': percentile(queued, 95),
+        'credits_per_day': credits / span_days,
+        'idle_share': max(0.0, 1 - busy / billed) if billed else 0.0,
+        'resumes_per_day': resumes / span_days,
+    }
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile; 0.0 for an empty list."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(len(ordered) * pct / 100)) - 1]
+
+
+def idle_gaps(queries):
+    """Counts of the gaps between consecutive queries, bucketed by length."""
+    buckets = {'< 1 min': 0, '1-5 min': 0, '5-10 min': 0, '> 10 min': 0}
+    busy_until = None
+    for query in queries:
+        end = query['arrival'] + query['compile_s'] + query['queued_s'] + query['execution_ms'] / 1000
+        if busy_until is not None and query['arrival'] > busy_until:
+            gap = query['arrival'] - busy_until
+            key = '< 1 min' if gap < 60 else '1-5 min' if gap < 300 else '5-10 min' if gap < 600 else '> 10 min'
+            buckets[key] += 1
+        busy_until = end if busy_until is None else max(busy_until, end)
+    return buckets
+
+
+def recommend(queries, current, exponent, p95_target):
+    """Baseline, every candidate, and the cheapest candidate meeting the target."""
+    baseline = simulate(queries, current['size'], current['clusters'], current['auto_suspend'], exponent)
+    target = p95_target if p95_target is not None else baseline['p95_s']
+    candidates = [simulate(queries, size, clusters, auto_suspend, exponent)
+                  for size in CREDITS_PER_HOUR
+                  for clusters in CANDIDATE_CLUSTERS
+                  for auto_suspend in CANDIDATE_AUTO_SUSPEND]
+    meeting = [c for c in candidates if c['p95_s'] <= target]
+    best = min(meeting, key=lambda c: (c['credits_per_day'], c['p95_s'])) if meeting else \
+        min(candidates, key=lambda c: (c['p95_s'], c['credits_per_day']))
+    return baseline, candidates, best, target
+
+
+def describe(result):
+    return (f"{result['size']:<8} x{result['clusters']} suspend {result['auto_suspend']:>3}s: "
+            f"p50 {result['p50_s']:.2f}s, p95 {result['p95_s']:.2f}s (queued {result['p95_queued_s']:.2f}s), "
+            f"{result['credits_per_day']:.2f} credits/day, {result['idle_share']:.0%} idle, "
+            f"{result['resumes_per_day']:.0f} resumes/day")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recommend warehouse size, clusters and auto-suspend from query history")
+    parser.add_argument("--days", type=int, default=14, help="History to replay in days (default: 14)")
+    parser.add_argument("--workload", choices=sorted(WORKLOADS), nargs="+", default=sorted(WORKLOADS),
+                        help="Workloads to analyze (default: all)")
+    parser.add_argument("--p95-target", type=float,
+                        help="p95 latency target in seconds (default: 3s for BI, today's p95 for the pipeline)")
+    parser.add_argument("--format", choices=["table", "json"], default="table", help="Output format (default: table)")
+    args = parser.parse_args()
+
+    exponent, samples = calibrate_exponent()
+    report = {'scaling_exponent': exponent, 'calibration_samples': samples, 'workloads': {}}
+
+    conn = get_snowflake_connection()
+    try:
+        cursor = conn.cursor()
+        for workload in args.workload:
+            queries = load_queries(cursor, workload, args.days)
+            if not queries:
+                report['workloads'][workload] = {'queries': 0}
+                continue
+            warehouse = statistics.mode(q['warehouse'] for q in queries)
+            current = current_settings(cursor, warehouse) or {
+                'size': statistics.mode(q['size'] for q in queries), 'clusters': 1, 'auto_suspend': 600}
+            target = args.p95_target if args.p95_target is not None else DEFAULT_P95_TARGETS[workload]
+            baseline, candidates, best, target = recommend(queries, current, exponent, target)
+            report['workloads'][workload] = {
+                'queries': len(queries), 'warehouse': warehouse, 'current': current,
+                'p95_target_s': target, 'idle_gaps': idle_gaps(queries),
+                'baseline': baseline, 'recommended': best,
+                'candidates': sorted(candidates, key=lambda c: c['credits_per_day']),
+            }
+        cursor.close()
+    finally:
+        conn.close()
+
+    if args.format == "json":
+        print(json.dumps(report, indent=2, default=str))
+        return
+
+    print(f"🏭 Warehouse Recommendations (last {args.days} days)")
+    print("=" * 60)
+    source = f"{samples} benchmark comparisons" if samples else "default"
+    print(f"📐 Scaling exponent: {exponent:.2f} ({source})")
+    for workload, result in report['workloads'].items():
+        print(f"\n⚙️  {workload.upper()} WORKLOAD")
+        print("-" * 60)
+        if not result['queries']:
+            print("   No collected queries; run COLLECT_PIPELINE_HISTORY_SP() first")
+            continue
+        gaps = ", ".join(f"{k}: {v}" for k, v in result['idle_gaps'].items())
+        print(f"📊 {result['queries']:,} queries on {result['warehouse']}; idle gaps {gaps}")
+        print(f"📍 Current:     {describe(result['baseline'])}")
+        print(f"✅ Recommended: {describe(result['recommended'])}  (p95 target {result['p95_target_s']:.2f}s)")
+        print("   Cheapest alternatives:")
+        for candidate in result['candidates'][:5]:
+            print(f"   • {describe(candidate)}")
+        best = result['recommended']
+        print(f"   ALTER WAREHOUSE {result['warehouse']} SET WAREHOUSE_SIZE = '{best['size'].upper()}' "
+              f"AUTO_SUSPEND = {best['auto_suspend']} MAX_CLUSTER_COUNT = {best['clusters']};")
+
+
+if __name__ == "__main__":
+    main()
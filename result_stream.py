@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Streaming Result Reader
+Reads query results in fixed-size fetchmany() batches so the test harnesses
+can count rows and keep a small sample without holding the full result in
+memory. Peak resident memory is sampled after every batch and reported per
+query, which keeps the full catalog runnable on small CI runners.
+"""
+
+import os
+import resource
+import sys
+import time
+
+FETCH_BATCH_ROWS = 10000
+SAMPLE_ROWS = 3
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        # No procfs (macOS): fall back to the process high-water mark
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+def stream_query(cursor, sql, sample_size=SAMPLE_ROWS, batch_size=FETCH_BATCH_ROWS):
+    """Execute `sql` and consume its result batch by batch.
+
+    Returns the row count, the first `sample_size` rows, the elapsed time
+    and the peak RSS seen while the result was read.
+    """
+    baseline_mb = current_rss_mb()
+    peak_mb = baseline_mb
+    start_time = time.time()
+    cursor.execute(sql)
+
+    rows = 0
+    sample = []
+    while True:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        rows += len(batch)
+        if len(sample) < sample_size:
+            sample.extend(batch[:sample_size - len(sample)])
+        peak_mb = max(peak_mb, current_rss_mb())
+
+    return {
+        'rows_returned': rows,
+        'sample_data': sample,
+        'query_time': time.time() - start_time,
+        'peak_rss_mb': round(peak_mb, 1),
+        'rss_growth_mb': round(peak_mb - baseline_mb, 1),
+    }
@@ -16,7 +16,13 @@ CREATE SCHEMA IF NOT EXISTS PUBLIC
 -- Use the schema
 USE SCHEMA PUBLIC;
 
--- Create a warehouse for analytics if it doesn't exist
+-- Workload warehouses: each class of traffic gets its own compute so the
+-- hourly profile rebuild and test runs never queue behind (or in front of)
+-- interactive dashboards. connection_strings.WORKLOADS routes the Python
+-- tools; BI users default to ANALYTICS_WH (bi_security_setup.sql).
+-- recommend_warehouse.py suggests sizes from the measured workload.
+
+-- Interactive BI: dashboards, analysts, Tableau / Power BI / Looker
 CREATE WAREHOUSE IF NOT EXISTS ANALYTICS_WH
     WITH WAREHOUSE_SIZE = 'SMALL'
     AUTO_SUSPEND = 300
@@ -24,6 +30,27 @@ CREATE WAREHOUSE IF NOT EXISTS ANALYTICS_WH
     INITIALLY_SUSPENDED = TRUE
     COMMENT = 'Warehouse for TPCH dashboard analytics';
 
+-- Pipeline: profile builds and backfills, dynamic table refreshes, exports
+CREATE WAREHOUSE IF NOT EXISTS PIPELINE_WH
+    WITH WAREHOUSE_SIZE = 'MEDIUM'
+    AUTO_SUSPEND = 60
+    AUTO_RESUME = TRUE
+    INITIALLY_SUSPENDED = TRUE
+    STATEMENT_TIMEOUT_IN_SECONDS = 7200
+    COMMENT = 'Warehouse for TPCH pipeline builds and refreshes';
+
+-- Batch validation: test suites, benchmarks, validators and status checks
+CREATE WAREHOUSE IF NOT EXISTS VALIDATION_WH
+    WITH WAREHOUSE_SIZE = 'XSMALL'
+    AUTO_SUSPEND = 60
+    AUTO_RESUME = TRUE
+    INITIALLY_SUSPENDED = TRUE
+    STATEMENT_TIMEOUT_IN_SECONDS = 1800
+    COMMENT = 'Warehouse for TPCH test suites and validation runs';
+
+-- With Enterprise Edition, let dashboards scale out at peak instead of queueing:
+-- ALTER WAREHOUSE ANALYTICS_WH SET MIN_CLUSTER_COUNT = 1 MAX_CLUSTER_COUNT = 3 SCALING_POLICY = 'STANDARD';
+
 -- Display current context
 SELECT CURRENT_DATABASE() as current_db, 
        CURRENT_SCHEMA() as current_schema,
@@ -1,10 +1,63 @@
 -- 03_aggregations.sql
 -- TPCH KPI Aggregations and Metrics
 -- Creates views with pre-calculated metrics for dashboards
+--
+-- The KPI views are deliberately unordered: a view-level ORDER BY makes every
+-- consumer pay for a global sort, including COUNT(*) probes and BI tools that
+-- re-sort anyway. Order in the consuming query, or read the ranked *_TOP_100
+-- serving views at the end of this file.
 
 USE DATABASE TPCH_DASHBOARDS;
 USE SCHEMA PUBLIC;
 
+-- Shared line-item rollup base
+-- One pass over LINEITEM at (part, supplier, ship mode, ship month) grain that
+-- V_PRODUCT_PERFORMANCE, V_SUPPLIER_PERFORMANCE and V_SHIPPING_MODE_ANALYSIS
+-- all roll up from, instead of each re-scanning and re-joining V_LINEITEM_DETAILS.
+-- IS_DELIVERED carries the ship/receipt-date filter the supplier and shipping
+-- views apply. The *_ORDER_COUNT columns flag the first line of each order per
+-- rollup key, so summing them reproduces COUNT(DISTINCT L_ORDERKEY) exactly.
+-- The TPCH sample data is static, so the table is rebuilt on each deploy;
+-- 12_materialized_aggregations.sql keeps it as a dynamic table instead.
+CREATE OR REPLACE TABLE LINEITEM_ROLLUP_BASE
+    COMMENT = 'Line items pre-aggregated by part, supplier, ship mode and ship month'
+AS
+WITH lines AS (
+    SELECT
+        *,
+        DATE_TRUNC('MONTH', L_SHIPDATE) as SHIP_MONTH,
+        COALESCE(L_SHIPDATE IS NOT NULL AND L_RECEIPTDATE IS NOT NULL, FALSE) as IS_DELIVERED
+    FROM SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.LINEITEM
+),
+flagged AS (
+    SELECT
+        *,
+        ROW_NUMBER() OVER (PARTITION BY L_ORDERKEY, L_PARTKEY ORDER BY L_LINENUMBER) = 1 as FIRST_FOR_PART,
+        ROW_NUMBER() OVER (PARTITION BY L_ORDERKEY, L_SUPPKEY, IS_DELIVERED ORDER BY L_LINENUMBER) = 1 as FIRST_FOR_SUPPLIER,
+        ROW_NUMBER() OVER (PARTITION BY L_ORDERKEY, L_SHIPMODE, IS_DELIVERED ORDER BY L_LINENUMBER) = 1 as FIRST_FOR_SHIPMODE
+    FROM lines
+)
+SELECT
+    L_PARTKEY,
+    L_SUPPKEY,
+    L_SHIPMODE,
+    SHIP_MONTH,
+    IS_DELIVERED,
+    COUNT(*) as LINE_COUNT,
+    COUNT_IF(FIRST_FOR_PART) as PART_ORDER_COUNT,
+    COUNT_IF(FIRST_FOR_SUPPLIER) as SUPPLIER_ORDER_COUNT,
+    COUNT_IF(FIRST_FOR_SHIPMODE) as SHIPMODE_ORDER_COUNT,
+    SUM(L_QUANTITY) as QUANTITY,
+    SUM(L_EXTENDEDPRICE) as GROSS_REVENUE,
+    SUM(L_EXTENDEDPRICE * (1 - L_DISCOUNT)) as NET_REVENUE,
+    SUM(L_EXTENDEDPRICE * (1 - L_DISCOUNT) * (1 + L_TAX)) as REVENUE_WITH_TAX,
+    SUM(L_DISCOUNT) as DISCOUNT_SUM,
+    SUM(DATEDIFF(day, L_SHIPDATE, L_RECEIPTDATE)) as DELIVERY_DAYS_SUM,
+    COUNT_IF(L_COMMITDATE < L_RECEIPTDATE) as LATE_DELIVERIES,
+    COUNT_IF(L_RETURNFLAG = 'R') as RETURN_COUNT
+FROM flagged
+GROUP BY L_PARTKEY, L_SUPPKEY, L_SHIPMODE, SHIP_MONTH, IS_DELIVERED;
+
 -- Monthly revenue by region
 CREATE OR REPLACE VIEW V_MONTHLY_REVENUE_BY_REGION AS
 SELECT 
@@ -15,8 +68,7 @@ SELECT
     AVG(O_TOTALPRICE) as AVG_ORDER_VALUE,
     COUNT(DISTINCT O_CUSTKEY) as CUSTOMER_COUNT
 FROM V_ORDER_DETAILS
-GROUP BY DATE_TRUNC('MONTH', O_ORDERDATE), REGION
-ORDER BY ORDER_MONTH DESC, TOTAL_REVENUE DESC;
+GROUP BY DATE_TRUNC('MONTH', O_ORDERDATE), REGION;
 
 -- Top customers by revenue
 CREATE OR REPLACE VIEW V_TOP_CUSTOMERS AS
@@ -31,42 +83,42 @@ SELECT
     AVG(O_TOTALPRICE) as AVG_ORDER_VALUE,
     MAX(O_ORDERDATE) as LAST_ORDER_DATE
 FROM V_ORDER_DETAILS
-GROUP BY O_CUSTKEY, CUSTOMER_NAME, NATION, REGION, MARKET_SEGMENT
-ORDER BY TOTAL_REVENUE DESC;
+GROUP BY O_CUSTKEY, CUSTOMER_NAME, NATION, REGION, MARKET_SEGMENT;
 
 -- Product performance metrics
 CREATE OR REPLACE VIEW V_PRODUCT_PERFORMANCE AS
 SELECT 
-    L_PARTKEY,
-    PART_NAME,
-    PART_TYPE,
-    PART_BRAND,
-    COUNT(DISTINCT L_ORDERKEY) as ORDER_COUNT,
-    SUM(L_QUANTITY) as TOTAL_QUANTITY_SOLD,
-    SUM(L_EXTENDEDPRICE) as GROSS_REVENUE,
-    SUM(L_EXTENDEDPRICE * (1 - L_DISCOUNT)) as NET_REVENUE,
-    SUM(L_EXTENDEDPRICE * (1 - L_DISCOUNT) * (1 + L_TAX)) as TOTAL_REVENUE_WITH_TAX,
-    AVG(L_DISCOUNT) as AVG_DISCOUNT_RATE
-FROM V_LINEITEM_DETAILS
-GROUP BY L_PARTKEY, PART_NAME, PART_TYPE, PART_BRAND
-ORDER BY NET_REVENUE DESC;
+    b.L_PARTKEY,
+    p.P_NAME as PART_NAME,
+    p.P_TYPE as PART_TYPE,
+    p.P_BRAND as PART_BRAND,
+    SUM(b.PART_ORDER_COUNT) as ORDER_COUNT,
+    SUM(b.QUANTITY) as TOTAL_QUANTITY_SOLD,
+    SUM(b.GROSS_REVENUE) as GROSS_REVENUE,
+    SUM(b.NET_REVENUE) as NET_REVENUE,
+    SUM(b.REVENUE_WITH_TAX) as TOTAL_REVENUE_WITH_TAX,
+    SUM(b.DISCOUNT_SUM) / SUM(b.LINE_COUNT) as AVG_DISCOUNT_RATE
+FROM LINEITEM_ROLLUP_BASE b
+JOIN SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.PART p ON b.L_PARTKEY = p.P_PARTKEY
+GROUP BY b.L_PARTKEY, p.P_NAME, p.P_TYPE, p.P_BRAND;
 
 -- Supplier performance metrics
 CREATE OR REPLACE VIEW V_SUPPLIER_PERFORMANCE AS
 SELECT 
-    L_SUPPKEY,
-    SUPPLIER_NAME,
-    SUPPLIER_NATION,
-    COUNT(DISTINCT L_ORDERKEY) as ORDER_COUNT,
-    SUM(L_QUANTITY) as TOTAL_QUANTITY_SUPPLIED,
-    SUM(L_EXTENDEDPRICE * (1 - L_DISCOUNT)) as NET_REVENUE,
-    AVG(DATEDIFF(day, L_SHIPDATE, L_RECEIPTDATE)) as AVG_DELIVERY_DAYS,
-    SUM(CASE WHEN L_COMMITDATE < L_RECEIPTDATE THEN 1 ELSE 0 END) as LATE_DELIVERIES,
-    COUNT(*) as TOTAL_DELIVERIES
-FROM V_LINEITEM_DETAILS
-WHERE L_SHIPDATE IS NOT NULL AND L_RECEIPTDATE IS NOT NULL
-GROUP BY L_SUPPKEY, SUPPLIER_NAME, SUPPLIER_NATION
-ORDER BY NET_REVENUE DESC;
+    b.L_SUPPKEY,
+    s.S_NAME as SUPPLIER_NAME,
+    sn.N_NAME as SUPPLIER_NATION,
+    SUM(b.SUPPLIER_ORDER_COUNT) as ORDER_COUNT,
+    SUM(b.QUANTITY) as TOTAL_QUANTITY_SUPPLIED,
+    SUM(b.NET_REVENUE) as NET_REVENUE,
+    SUM(b.DELIVERY_DAYS_SUM) / SUM(b.LINE_COUNT) as AVG_DELIVERY_DAYS,
+    SUM(b.LATE_DELIVERIES) as LATE_DELIVERIES,
+    SUM(b.LINE_COUNT) as TOTAL_DELIVERIES
+FROM LINEITEM_ROLLUP_BASE b
+JOIN SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.SUPPLIER s ON b.L_SUPPKEY = s.S_SUPPKEY
+JOIN SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.NATION sn ON s.S_NATIONKEY = sn.N_NATIONKEY
+WHERE b.IS_DELIVERED
+GROUP BY b.L_SUPPKEY, s.S_NAME, sn.N_NAME;
 
 -- Order status summary
 CREATE OR REPLACE VIEW V_ORDER_STATUS_SUMMARY AS
@@ -78,8 +130,7 @@ SELECT
     SUM(O_TOTALPRICE) as TOTAL_REVENUE,
     AVG(O_TOTALPRICE) as AVG_ORDER_VALUE
 FROM V_ORDER_DETAILS
-GROUP BY O_ORDERSTATUS, DATE_TRUNC('YEAR', O_ORDERDATE), REGION
-ORDER BY ORDER_YEAR DESC, TOTAL_REVENUE DESC;
+GROUP BY O_ORDERSTATUS, DATE_TRUNC('YEAR', O_ORDERDATE), REGION;
 
 -- Market segment analysis
 CREATE OR REPLACE VIEW V_MARKET_SEGMENT_ANALYSIS AS
@@ -92,20 +143,40 @@ SELECT
     AVG(O_TOTALPRICE) as AVG_ORDER_VALUE,
     SUM(O_TOTALPRICE) / COUNT(DISTINCT O_CUSTKEY) as REVENUE_PER_CUSTOMER
 FROM V_ORDER_DETAILS
-GROUP BY MARKET_SEGMENT, REGION
-ORDER BY TOTAL_REVENUE DESC;
+GROUP BY MARKET_SEGMENT, REGION;
 
 -- Shipping mode analysis
 CREATE OR REPLACE VIEW V_SHIPPING_MODE_ANALYSIS AS
 SELECT 
     L_SHIPMODE,
-    COUNT(DISTINCT L_ORDERKEY) as ORDER_COUNT,
-    SUM(L_QUANTITY) as TOTAL_QUANTITY,
-    SUM(L_EXTENDEDPRICE * (1 - L_DISCOUNT)) as NET_REVENUE,
-    AVG(DATEDIFF(day, L_SHIPDATE, L_RECEIPTDATE)) as AVG_DELIVERY_DAYS,
-    SUM(CASE WHEN L_RETURNFLAG = 'R' THEN 1 ELSE 0 END) as RETURN_COUNT,
-    COUNT(*) as TOTAL_SHIPMENTS
-FROM V_LINEITEM_DETAILS
-WHERE L_SHIPDATE IS NOT NULL AND L_RECEIPTDATE IS NOT NULL
-GROUP BY L_SHIPMODE
-ORDER BY NET_REVENUE DESC;
+    SUM(SHIPMODE_ORDER_COUNT) as ORDER_COUNT,
+    SUM(QUANTITY) as TOTAL_QUANTITY,
+    SUM(NET_REVENUE) as NET_REVENUE,
+    SUM(DELIVERY_DAYS_SUM) / SUM(LINE_COUNT) as AVG_DELIVERY_DAYS,
+    SUM(RETURN_COUNT) as RETURN_COUNT,
+    SUM(LINE_COUNT) as TOTAL_SHIPMENTS
+FROM LINEITEM_ROLLUP_BASE
+WHERE IS_DELIVERED
+GROUP BY L_SHIPMODE;
+
+
+-- Ranked serving views
+-- Top-N slices of the large KPI views for leaderboards and quick looks. The
+-- LIMIT lets Snowflake keep only the leading rows instead of sorting them all.
+CREATE OR REPLACE VIEW V_TOP_CUSTOMERS_TOP_100 AS
+SELECT *
+FROM V_TOP_CUSTOMERS
+ORDER BY TOTAL_REVENUE DESC
+LIMIT 100;
+
+CREATE OR REPLACE VIEW V_PRODUCT_PERFORMANCE_TOP_100 AS
+SELECT *
+FROM V_PRODUCT_PERFORMANCE
+ORDER BY NET_REVENUE DESC
+LIMIT 100;
+
+CREATE OR REPLACE VIEW V_SUPPLIER_PERFORMANCE_TOP_100 AS
+SELECT *
+FROM V_SUPPLIER_PERFORMANCE
+ORDER BY NET_REVENUE DESC
+LIMIT 100;
\ No newline at end of file
@@ -12,7 +12,7 @@ USE SCHEMA PUBLIC;
 -- This task would refresh a materialized view or table daily at 2 AM UTC
 /*
 CREATE OR REPLACE TASK TASK_DAILY_CUSTOMER_REFRESH
-    WAREHOUSE = ANALYTICS_WH
+    WAREHOUSE = PIPELINE_WH
     SCHEDULE = 'USING CRON 0 2 * * * UTC'
     COMMENT = 'Daily refresh of customer metrics at 2 AM UTC'
 AS
@@ -23,6 +23,7 @@ AS
         CURRENT_TIMESTAMP() as SNAPSHOT_TIME,
         *
     FROM V_TOP_CUSTOMERS
+    ORDER BY TOTAL_REVENUE DESC
     LIMIT 1000;
 */
 
@@ -30,7 +31,7 @@ AS
 -- This task would run every hour to update recent data
 /*
 CREATE OR REPLACE TASK TASK_HOURLY_METRICS_UPDATE
-    WAREHOUSE = ANALYTICS_WH
+    WAREHOUSE = PIPELINE_WH
     SCHEDULE = 'USING CRON 0 * * * * UTC'
     COMMENT = 'Hourly update of real-time metrics'
 AS
@@ -48,7 +49,7 @@ AS
 -- This task would run weekly on Mondays at 8 AM UTC
 /*
 CREATE OR REPLACE TASK TASK_WEEKLY_REPORT_GENERATION
-    WAREHOUSE = ANALYTICS_WH
+    WAREHOUSE = PIPELINE_WH
     SCHEDULE = 'USING CRON 0 8 * * MON UTC'
     COMMENT = 'Weekly report generation every Monday at 8 AM UTC'
 AS
@@ -68,7 +69,7 @@ AS
 -- Parent task that triggers child tasks
 /*
 CREATE OR REPLACE TASK TASK_PARENT_DATA_LOAD
-    WAREHOUSE = ANALYTICS_WH
+    WAREHOUSE = PIPELINE_WH
     SCHEDULE = 'USING CRON 0 0 * * * UTC'
     COMMENT = 'Parent task that loads data daily at midnight'
 AS
@@ -79,7 +80,7 @@ AS
 
 -- Child task that depends on parent
 CREATE OR REPLACE TASK TASK_CHILD_DATA_TRANSFORM
-    WAREHOUSE = ANALYTICS_WH
+    WAREHOUSE = PIPELINE_WH
     AFTER TASK_PARENT_DATA_LOAD
     COMMENT = 'Child task that transforms data after parent completes'
 AS
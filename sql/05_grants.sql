@@ -20,8 +20,10 @@ CREATE ROLE IF NOT EXISTS DASHBOARD_ENGINEER_ROLE
 GRANT USAGE ON DATABASE TPCH_DASHBOARDS TO ROLE DASHBOARD_ANALYST_ROLE;
 GRANT USAGE ON SCHEMA TPCH_DASHBOARDS.PUBLIC TO ROLE DASHBOARD_ANALYST_ROLE;
 
--- Grant usage on warehouse to analyst role
+-- Grant usage on warehouses to analyst role: dashboards, plus the
+-- validation warehouse the test suites run on
 GRANT USAGE ON WAREHOUSE ANALYTICS_WH TO ROLE DASHBOARD_ANALYST_ROLE;
+GRANT USAGE ON WAREHOUSE VALIDATION_WH TO ROLE DASHBOARD_ANALYST_ROLE;
 
 -- Grant SELECT on all views to analyst role
 GRANT SELECT ON ALL VIEWS IN SCHEMA TPCH_DASHBOARDS.PUBLIC TO ROLE DASHBOARD_ANALYST_ROLE;
@@ -38,6 +40,14 @@ GRANT ALL PRIVILEGES ON SCHEMA TPCH_DASHBOARDS.PUBLIC TO ROLE DASHBOARD_ENGINEER
 
 -- Grant operate on warehouse to engineer role
 GRANT OPERATE, USAGE ON WAREHOUSE ANALYTICS_WH TO ROLE DASHBOARD_ENGINEER_ROLE;
+GRANT OPERATE, USAGE ON WAREHOUSE PIPELINE_WH TO ROLE DASHBOARD_ENGINEER_ROLE;
+GRANT OPERATE, USAGE ON WAREHOUSE VALIDATION_WH TO ROLE DASHBOARD_ENGINEER_ROLE;
+
+-- Query history of every user on the workload warehouses, read by
+-- COLLECT_PIPELINE_HISTORY_SP (09_observability.sql)
+GRANT MONITOR ON WAREHOUSE ANALYTICS_WH TO ROLE DASHBOARD_ENGINEER_ROLE;
+GRANT MONITOR ON WAREHOUSE PIPELINE_WH TO ROLE DASHBOARD_ENGINEER_ROLE;
+GRANT MONITOR ON WAREHOUSE VALIDATION_WH TO ROLE DASHBOARD_ENGINEER_ROLE;
 
 -- Grant SELECT, INSERT, UPDATE, DELETE on all tables to engineer role
 GRANT SELECT, INSERT, UPDATE, DELETE ON ALL TABLES IN SCHEMA TPCH_DASHBOARDS.PUBLIC TO ROLE DASHBOARD_ENGINEER_ROLE;
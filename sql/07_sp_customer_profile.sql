@@ -3,8 +3,32 @@
 -- ============================================================================
 -- Python stored procedure to create customer profiles from TPCH data
 -- Uses Snowpark-pandas for data transformation and creates both current and timestamped tables
+--
+-- Full build:       CALL CREATE_CUSTOMER_PROFILE_SP();
+--   Builds every order date into CUSTOMER_PROFILE_STAGE and publishes it.
+-- Partitioned build: CALL CREATE_CUSTOMER_PROFILE_SP('1994-01-01', '1995-01-01');
+--   Replaces one order-date slice [START_DATE, END_DATE) in the target table
+--   (CUSTOMER_PROFILE_STAGE unless TARGET_TABLE is given). A NULL bound leaves
+--   that side of the range open. Nothing is published; the task graph in
+--   08_task_customer_profile.sql runs PUBLISH_CUSTOMER_PROFILE_SP() once every
+--   slice has landed.
+--
+-- WRITE_MODE 'REPLACE' (default) deletes the slice and inserts it in one
+-- transaction, so a manual re-run is safe. The DELETE locks the target until
+-- COMMIT, so concurrent REPLACE slices of one table run one at a time.
+-- 'APPEND' only inserts. Concurrent inserts do not block each other, so the
+-- slice tasks use it on the stage the root task has just dropped, and
+-- backfill_profile.py uses it for chunks that have no rows in the target yet.
 
-CREATE OR REPLACE PROCEDURE CREATE_CUSTOMER_PROFILE_SP()
+-- Earlier deployments had no WRITE_MODE; drop that overload so calls stay unambiguous
+DROP PROCEDURE IF EXISTS CREATE_CUSTOMER_PROFILE_SP(DATE, DATE, VARCHAR);
+
+CREATE OR REPLACE PROCEDURE CREATE_CUSTOMER_PROFILE_SP(
+    START_DATE DATE DEFAULT NULL,
+    END_DATE DATE DEFAULT NULL,
+    TARGET_TABLE VARCHAR DEFAULT NULL,
+    WRITE_MODE VARCHAR DEFAULT 'REPLACE'
+)
 RETURNS VARCHAR
 LANGUAGE PYTHON
 RUNTIME_VERSION = '3.11'
@@ -12,67 +36,199 @@ PACKAGES = ('snowflake-snowpark-python','pandas','pyarrow')
 HANDLER = 'run'
 AS
 $$
-import datetime as dt
 import snowflake.snowpark as sp
 from snowflake.snowpark.functions import col, lit, when
 
-def run(session: sp.Session) -> str:
+SOURCE_SCHEMA = "SNOWFLAKE_SAMPLE_DATA.TPCH_SF1"
+STAGE_TABLE = "CUSTOMER_PROFILE_STAGE"
+
+def build_profile(session: sp.Session, start_date=None, end_date=None) -> sp.DataFrame:
+    # Read TPCH sources with Snowpark DataFrames (server-side processing)
+    lineitem_df = session.table(f"{SOURCE_SCHEMA}.LINEITEM").select(
+        col("L_ORDERKEY"),
+        col("L_QUANTITY"),
+        col("L_EXTENDEDPRICE"),
+        col("L_DISCOUNT"),
+        col("L_RETURNFLAG")
+    )
+
+    orders_df = session.table(f"{SOURCE_SCHEMA}.ORDERS").select(
+        col("O_ORDERKEY"),
+        col("O_CUSTKEY"),
+        col("O_ORDERSTATUS"),
+        col("O_TOTALPRICE"),
+        col("O_ORDERDATE")
+    )
+
+    # Restrict to the requested order-date slice (the join prunes LINEITEM to match)
+    if start_date is not None:
+        orders_df = orders_df.filter(col("O_ORDERDATE") >= lit(start_date))
+    if end_date is not None:
+        orders_df = orders_df.filter(col("O_ORDERDATE") < lit(end_date))
+
+    # Filter out returned items and add calculated fields
+    filtered_lineitem = lineitem_df.filter(col("L_RETURNFLAG") != "A").with_column(
+        "DISCOUNT_AMOUNT",
+        col("L_DISCOUNT") * col("L_QUANTITY") * col("L_EXTENDEDPRICE")
+    )
+
+    # Join lineitem with orders
+    joined_df = filtered_lineitem.join(
+        orders_df,
+        filtered_lineitem["L_ORDERKEY"] == orders_df["O_ORDERKEY"],
+        "inner"
+    )
+
+    # Add more feature engineering
+    return joined_df.with_column(
+        "PRICE_AFTER_DISCOUNT",
+        col("L_EXTENDEDPRICE") - col("DISCOUNT_AMOUNT")
+    ).with_column(
+        "PRICE_PER_QTY",
+        when(col("L_QUANTITY") != 0, col("L_EXTENDEDPRICE") / col("L_QUANTITY")).otherwise(0)
+    )
+
+def range_predicate(start_date, end_date) -> str:
+    clauses = []
+    if start_date is not None:
+        clauses.append(f"O_ORDERDATE >= '{start_date.isoformat()}'")
+    if end_date is not None:
+        clauses.append(f"O_ORDERDATE < '{end_date.isoformat()}'")
+    return " AND ".join(clauses) or "TRUE"
+
+def write_slice(session: sp.Session, start_date, end_date, target_table: str, write_mode: str) -> int:
+    profile_df = build_profile(session, start_date, end_date)
+    predicate = range_predicate(start_date, end_date)
+
+    # Create the target from the profile schema on first use; IF NOT EXISTS keeps
+    # sibling slices that start at the same moment from racing each other
+    profile_df.limit(0).write.mode("ignore").save_as_table(target_table)
+
+    if write_mode == "APPEND":
+        # Insert only: no table lock, so sibling slices load in parallel
+        profile_df.write.mode("append").save_as_table(target_table, column_order="name")
+        return session.sql(f"SELECT COUNT(*) FROM {target_table} WHERE {predicate}").collect()[0][0]
+
+    # Delete + insert in one transaction so a slice can be re-run safely
+    session.sql("BEGIN").collect()
+    try:
+        session.sql(f"DELETE FROM {target_table} WHERE {predicate}").collect()
+        profile_df.write.mode("append").save_as_table(target_table, column_order="name")
+        session.sql("COMMIT").collect()
+    except Exception:
+        session.sql("ROLLBACK").collect()
+        raise
+
+    return session.sql(f"SELECT COUNT(*) FROM {target_table} WHERE {predicate}").collect()[0][0]
+
+def run(session: sp.Session, start_date=None, end_date=None, target_table=None, write_mode="REPLACE") -> str:
+    write_mode = (write_mode or "REPLACE").upper()
+    if write_mode not in ("REPLACE", "APPEND"):
+        raise ValueError(f"WRITE_MODE must be REPLACE or APPEND, not {write_mode}")
+    if start_date is not None or end_date is not None or target_table is not None or write_mode == "APPEND":
+        # Partitioned runs raise instead of returning an error string so the
+        # task graph fails and the publish step never sees a partial stage
+        target = target_table or STAGE_TABLE
+        row_count = write_slice(session, start_date, end_date, target, write_mode)
+        return (f"✅ Success! Wrote {target} slice "
+                f"[{start_date or 'MIN'}, {end_date or 'MAX'}) with {row_count:,} rows")
+
     try:
-        # Read TPCH sources with Snowpark DataFrames (server-side processing)
-        lineitem_df = session.table("SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.LINEITEM").select(
-            col("L_ORDERKEY"),
-            col("L_QUANTITY"), 
-            col("L_EXTENDEDPRICE"),
-            col("L_DISCOUNT"),
-            col("L_RETURNFLAG")
-        )
-        
-        orders_df = session.table("SNOWFLAKE_SAMPLE_DATA.TPCH_SF1.ORDERS").select(
-            col("O_ORDERKEY"),
-            col("O_CUSTKEY"),
-            col("O_ORDERSTATUS"), 
-            col("O_TOTALPRICE"),
-            col("O_ORDERDATE")
-        )
-        
-        # Filter out returned items and add calculated fields
-        filtered_lineitem = lineitem_df.filter(col("L_RETURNFLAG") != "A").with_column(
-            "DISCOUNT_AMOUNT",
-            col("L_DISCOUNT") * col("L_QUANTITY") * col("L_EXTENDEDPRICE")
-        )
-        
-        # Join lineitem with orders
-        joined_df = filtered_lineitem.join(
-            orders_df,
-            filtered_lineitem["L_ORDERKEY"] == orders_df["O_ORDERKEY"],
-            "inner"
-        )
-        
-        # Add more feature engineering
-        profile_df = joined_df.with_column(
-            "PRICE_AFTER_DISCOUNT", 
-            col("L_EXTENDEDPRICE") - col("DISCOUNT_AMOUNT")
-        ).with_column(
-            "PRICE_PER_QTY",
-            when(col("L_QUANTITY") != 0, col("L_EXTENDEDPRICE") / col("L_QUANTITY")).otherwise(0)
-        )
-        
-        # Create table names
-        base_table = "CUSTOMER_LINEITEM_PROFILE"
-        timestamp = dt.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        snapshot_table = f"{base_table}_{timestamp}"
-        
-        # Write current profile (replace existing)
-        profile_df.write.mode("overwrite").save_as_table(base_table)
-        
-        # Write timestamped snapshot
-        profile_df.write.mode("errorifexists").save_as_table(snapshot_table)
-        
-        # Get row count for confirmation
-        row_count = profile_df.count()
-        
-        return f"✅ Success! Created {base_table} and {snapshot_table} with {row_count:,} rows"
-        
+        # Build the whole profile into the stage, then publish it
+        build_profile(session).write.mode("overwrite").save_as_table(STAGE_TABLE)
+        return session.call("PUBLISH_CUSTOMER_PROFILE_SP")
+
     except Exception as e:
         return f"❌ Error: {str(e)}"
-$$;
\ No newline at end of file
+$$;
+
+-- ============================================================================
+-- Publish Step
+-- ============================================================================
+-- Swaps the fully built stage into CUSTOMER_LINEITEM_PROFILE (metadata only)
+-- and records the timestamped snapshot as a zero-copy clone.
+--
+-- Every publish also rewrites the single row of PIPELINE_FRESHNESS. BI cache
+-- triggers (Looker datagroups, Tableau and Power BI refresh checks, the
+-- Python result cache) poll that row instead of scanning the profile.
+
+CREATE TABLE IF NOT EXISTS PIPELINE_FRESHNESS (
+  PIPELINE           VARCHAR,        -- always 'CUSTOMER_PROFILE'; the table holds one row
+  PUBLISHED_AT       TIMESTAMP_TZ,
+  RUN_ID             VARCHAR,        -- task graph run, or MANUAL_<snapshot timestamp>
+  ROW_COUNT          NUMBER,
+  SNAPSHOT_TABLE     VARCHAR,
+  CUBE_REFRESHED_AT  TIMESTAMP_TZ    -- set by REFRESH_PROFILE_KPI_CUBE_SP()
+);
+
+CREATE OR REPLACE PROCEDURE PUBLISH_CUSTOMER_PROFILE_SP()
+RETURNS VARCHAR
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('snowflake-snowpark-python')
+HANDLER = 'run'
+AS
+$$
+import datetime as dt
+import snowflake.snowpark as sp
+
+STAGE_TABLE = "CUSTOMER_PROFILE_STAGE"
+FRESHNESS_TABLE = "PIPELINE_FRESHNESS"
+HEALTH_TABLE = "PIPELINE_HEALTH"
+
+def table_exists(session: sp.Session, name: str) -> bool:
+    return len(session.sql(f"SHOW TABLES LIKE '{name}'").collect()) > 0
+
+def current_run_id(session: sp.Session, timestamp: str) -> str:
+    # Only defined while running inside a task graph
+    try:
+        run_id = session.sql(
+            "SELECT SYSTEM$TASK_RUNTIME_INFO('CURRENT_TASK_GRAPH_RUN_GROUP_ID')"
+        ).collect()[0][0]
+    except Exception:
+        run_id = None
+    return run_id or f"MANUAL_{timestamp}"
+
+def record_freshness(session: sp.Session, run_id: str, row_count: int, snapshot_table: str) -> None:
+    session.sql(f"""
+        MERGE INTO {FRESHNESS_TABLE} f
+        USING (SELECT 'CUSTOMER_PROFILE' as PIPELINE) s ON f.PIPELINE = s.PIPELINE
+        WHEN MATCHED THEN UPDATE SET
+            PUBLISHED_AT = CURRENT_TIMESTAMP(), RUN_ID = ?, ROW_COUNT = ?,
+            SNAPSHOT_TABLE = ?, CUBE_REFRESHED_AT = NULL
+        WHEN NOT MATCHED THEN INSERT (PIPELINE, PUBLISHED_AT, RUN_ID, ROW_COUNT, SNAPSHOT_TABLE)
+            VALUES ('CUSTOMER_PROFILE', CURRENT_TIMESTAMP(), ?, ?, ?)
+    """, params=[run_id, row_count, snapshot_table] * 2).collect()
+
+    # Keep the row-count history in PIPELINE_HEALTH when observability is deployed
+    if table_exists(session, HEALTH_TABLE):
+        session.sql(f"INSERT INTO {HEALTH_TABLE} (TS, ROWCOUNT) SELECT CURRENT_TIMESTAMP(), ?",
+                    params=[row_count]).collect()
+
+def run(session: sp.Session) -> str:
+    # Create table names
+    base_table = "CUSTOMER_LINEITEM_PROFILE"
+    timestamp = dt.datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    snapshot_table = f"{base_table}_{timestamp}"
+
+    if not table_exists(session, STAGE_TABLE):
+        raise ValueError(f"{STAGE_TABLE} does not exist; nothing to publish")
+
+    # Replace current profile; the previous version is left in the stage and
+    # dropped by the next run
+    if table_exists(session, base_table):
+        session.sql(f"ALTER TABLE {STAGE_TABLE} SWAP WITH {base_table}").collect()
+    else:
+        session.sql(f"ALTER TABLE {STAGE_TABLE} RENAME TO {base_table}").collect()
+
+    # Write timestamped snapshot
+    session.sql(f"CREATE TABLE {snapshot_table} CLONE {base_table}").collect()
+
+    # Get row count for confirmation
+    row_count = session.table(base_table).count()
+
+    # Tell BI caches there is new data
+    record_freshness(session, current_run_id(session, timestamp), row_count, snapshot_table)
+
+    return f"✅ Success! Created {base_table} and {snapshot_table} with {row_count:,} rows"
+$$;
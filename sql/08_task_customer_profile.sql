@@ -1,17 +1,135 @@
 -- ============================================================================
 -- Customer Profile Task
 -- ============================================================================
--- Serverless task to refresh customer profiles from TPCH data
+-- Serverless task graph to refresh customer profiles from TPCH data
 -- Tasks are created SUSPENDED by default (safe). Resume when ready.
+--
+--   CUSTOMER_PROFILE_TASK            root, hourly: drops the previous stage
+--     ├─ CUSTOMER_PROFILE_PART_01_TASK  one order-date slice each, in parallel
+--     ├─ ...
+--     └─ CUSTOMER_PROFILE_PART_NN_TASK
+--   CUSTOMER_PROFILE_PUBLISH_TASK    after every slice: swap stage in + snapshot
+--     ├─ CUSTOMER_PROFILE_CUBE_TASK    rebuild the KPI cube (14_profile_kpi_cube.sql)
+--     │    └─ CUSTOMER_PROFILE_WARMUP_TASK  warm the BI cache (16_cache_warmer.sql)
+--     └─ CUSTOMER_PROFILE_DQ_TASK      profile column statistics (18_data_quality.sql)
+--
+-- The slice tasks are generated by BUILD_CUSTOMER_PROFILE_TASK_GRAPH_SP(n);
+-- re-run it with a different count to resize the fan-out.
+--
+-- Re-running this file recreates the publish task, which unlinks the tasks
+-- that run after it. The builder re-attaches the cube and data-quality tasks
+-- (the warm-up task follows the cube task, so it comes along). Any other task
+-- added after CUSTOMER_PROFILE_PUBLISH_TASK must be re-applied from its file.
 
 CREATE OR REPLACE TASK CUSTOMER_PROFILE_TASK
 SCHEDULE = 'USING CRON 0 * * * * UTC'  -- hourly at :00 UTC
 COMMENT  = 'Refresh CUSTOMER_LINEITEM_PROFILE from TPCH demo data (serverless)'
 AS
-CALL CREATE_CUSTOMER_PROFILE_SP();
+DROP TABLE IF EXISTS CUSTOMER_PROFILE_STAGE;
+
+CREATE OR REPLACE TASK CUSTOMER_PROFILE_PUBLISH_TASK
+COMMENT  = 'Publish CUSTOMER_PROFILE_STAGE once every slice has been built'
+AFTER CUSTOMER_PROFILE_TASK
+AS
+CALL PUBLISH_CUSTOMER_PROFILE_SP();
+
+-- ============================================================================
+-- Fan-out Builder
+-- ============================================================================
+-- Splits the source order-date range into PARTITIONS contiguous slices and
+-- (re)creates one child task per slice between the root and publish tasks.
+-- The first and last slices are open-ended so newly arriving dates are never
+-- dropped between rebuilds of the graph.
+
+CREATE OR REPLACE PROCEDURE BUILD_CUSTOMER_PROFILE_TASK_GRAPH_SP(PARTITIONS NUMBER DEFAULT 4)
+RETURNS VARCHAR
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('snowflake-snowpark-python')
+HANDLER = 'run'
+AS
+$$
+import datetime as dt
+import json
+import snowflake.snowpark as sp
+
+SOURCE_SCHEMA = "SNOWFLAKE_SAMPLE_DATA.TPCH_SF1"
+ROOT_TASK = "CUSTOMER_PROFILE_TASK"
+PUBLISH_TASK = "CUSTOMER_PROFILE_PUBLISH_TASK"
+PART_TASK_PREFIX = "CUSTOMER_PROFILE_PART_"
+MAX_PARTITIONS = 99  # a task accepts at most 100 predecessors (slices + root)
+# Created by 14_profile_kpi_cube.sql and 18_data_quality.sql, after the publish task
+PUBLISH_DEPENDENTS = ("CUSTOMER_PROFILE_CUBE_TASK", "CUSTOMER_PROFILE_DQ_TASK")
+
+def slice_bounds(first: dt.date, last: dt.date, partitions: int) -> list:
+    span = (last - first).days + 1
+    cuts = [first + dt.timedelta(days=span * i // partitions) for i in range(1, partitions)]
+    starts = [None] + cuts
+    ends = cuts + [None]
+    return list(zip(starts, ends))
+
+def sql_date(value) -> str:
+    return "NULL" if value is None else f"'{value.isoformat()}'::DATE"
+
+def reattach_dependents(session: sp.Session) -> list:
+    # Recreating the publish task unlinks its children; link back the ones deployed
+    attached = []
+    for task_name in PUBLISH_DEPENDENTS:
+        rows = session.sql(f"SHOW TASKS LIKE '{task_name}'").collect()
+        if not rows:
+            continue
+        predecessors = [name.split(".")[-1].strip('"') for name in json.loads(rows[0]["predecessors"] or "[]")]
+        if PUBLISH_TASK not in predecessors:
+            session.sql(f"ALTER TASK {task_name} ADD AFTER {PUBLISH_TASK}").collect()
+        attached.append(task_name)
+    return attached
+
+def run(session: sp.Session, partitions: int = 4) -> str:
+    partitions = int(partitions)
+    if not 1 <= partitions <= MAX_PARTITIONS:
+        raise ValueError(f"PARTITIONS must be between 1 and {MAX_PARTITIONS}")
+
+    first, last = session.sql(
+        f"SELECT MIN(O_ORDERDATE), MAX(O_ORDERDATE) FROM {SOURCE_SCHEMA}.ORDERS"
+    ).collect()[0]
+
+    # The graph can only be modified while the root is suspended
+    session.sql(f"ALTER TASK {ROOT_TASK} SUSPEND").collect()
+
+    # Drop the previous fan-out; dropping a predecessor also unlinks it from publish
+    for row in session.sql(f"SHOW TASKS LIKE '{PART_TASK_PREFIX}%'").collect():
+        session.sql(f"DROP TASK IF EXISTS {row['name']}").collect()
+
+    part_tasks = []
+    for i, (start, end) in enumerate(slice_bounds(first, last, partitions), 1):
+        task_name = f"{PART_TASK_PREFIX}{i:02d}_TASK"
+        session.sql(f"""
+            CREATE OR REPLACE TASK {task_name}
+            COMMENT = 'Build CUSTOMER_PROFILE_STAGE slice {i}/{partitions}'
+            AFTER {ROOT_TASK}
+            AS
+            CALL CREATE_CUSTOMER_PROFILE_SP({sql_date(start)}, {sql_date(end)}, NULL, 'APPEND')
+        """).collect()
+        part_tasks.append(task_name)
+
+    session.sql(f"ALTER TASK {PUBLISH_TASK} ADD AFTER {', '.join(part_tasks)}").collect()
+    dependents = reattach_dependents(session)
+
+    # Children must be resumed individually; the root stays suspended until
+    # SYSTEM$TASK_DEPENDENTS_ENABLE or ALTER TASK ... RESUME is run by an operator
+    for task_name in part_tasks + [PUBLISH_TASK] + dependents:
+        session.sql(f"ALTER TASK {task_name} RESUME").collect()
+
+    return f"✅ Built {ROOT_TASK} graph with {partitions} slices over {first} → {last}"
+$$;
+
+CALL BUILD_CUSTOMER_PROFILE_TASK_GRAPH_SP(4);
+
+-- To resize the fan-out (e.g. for SF10/SF100 sources):
+-- CALL BUILD_CUSTOMER_PROFILE_TASK_GRAPH_SP(16);
 
 -- To run every 2 hours Paris time:
 -- ALTER TASK CUSTOMER_PROFILE_TASK SET SCHEDULE = 'USING CRON 0 */2 * * * Europe/Paris';
 
--- When ready to activate:
--- ALTER TASK CUSTOMER_PROFILE_TASK RESUME;
\ No newline at end of file
+-- When ready to activate (resumes the root and every task below it):
+-- SELECT SYSTEM$TASK_DEPENDENTS_ENABLE('CUSTOMER_PROFILE_TASK');
@@ -1,22 +1,272 @@
 -- ============================================================================
 -- Pipeline Observability
 -- ============================================================================
--- Simple health artifacts: a table for freshness/rowcount and a view over task history
+-- Simple health artifacts: a table for freshness/rowcount, a persistent task
+-- and query history store, and a view over task history
 
 CREATE OR REPLACE TABLE PIPELINE_HEALTH (
   TS TIMESTAMP_TZ,
   ROWCOUNT NUMBER
 );
 
--- Lightweight history view
+-- ============================================================================
+-- History Store
+-- ============================================================================
+-- INFORMATION_SCHEMA.TASK_HISTORY and QUERY_HISTORY only reach back 7 days and
+-- get slow to query. COLLECT_PIPELINE_HISTORY_SP() appends the runs completed
+-- since the last collected watermark (the newest timestamp already stored)
+-- into these tables, clustered by day, so dashboards can cover months.
+-- Created IF NOT EXISTS: redeploying keeps the collected history.
+--
+-- Queries are read per warehouse with QUERY_HISTORY_BY_WAREHOUSE, which
+-- returns every user's queries (QUERY_HISTORY only returns the caller's own).
+-- The role that owns PIPELINE_HISTORY_TASK needs MONITOR on ANALYTICS_WH,
+-- PIPELINE_WH and VALIDATION_WH (05_grants.sql grants it to
+-- DASHBOARD_ENGINEER_ROLE); the collector fails naming the warehouse otherwise.
+
+CREATE TABLE IF NOT EXISTS TASK_RUN_HISTORY (
+  QUERY_ID             VARCHAR,
+  NAME                 VARCHAR,
+  DATABASE_NAME        VARCHAR,
+  SCHEMA_NAME          VARCHAR,
+  QUERY_TEXT           VARCHAR,
+  CONDITION_TEXT       VARCHAR,
+  STATE                VARCHAR,
+  ERROR_CODE           VARCHAR,
+  ERROR_MESSAGE        VARCHAR,
+  SCHEDULED_TIME       TIMESTAMP_LTZ,
+  QUERY_START_TIME     TIMESTAMP_LTZ,
+  NEXT_SCHEDULED_TIME  TIMESTAMP_LTZ,
+  COMPLETED_TIME       TIMESTAMP_LTZ,
+  ROOT_TASK_ID         VARCHAR,
+  GRAPH_VERSION        NUMBER,
+  RUN_ID               NUMBER,
+  RETURN_VALUE         VARCHAR,
+  SCHEDULED_FROM       VARCHAR,
+  ATTEMPT_NUMBER       NUMBER,
+  GRAPH_RUN_GROUP_ID   VARCHAR
+)
+CLUSTER BY (TO_DATE(SCHEDULED_TIME))
+COMMENT = 'Completed task runs collected from INFORMATION_SCHEMA.TASK_HISTORY';
+
+-- Queries against this database (pipeline, dashboards, BI tools)
+CREATE TABLE IF NOT EXISTS QUERY_RUN_HISTORY (
+  QUERY_ID                         VARCHAR,
+  QUERY_TEXT                       VARCHAR,
+  DATABASE_NAME                    VARCHAR,
+  SCHEMA_NAME                      VARCHAR,
+  QUERY_TYPE                       VARCHAR,
+  QUERY_TAG                        VARCHAR,
+  USER_NAME                        VARCHAR,
+  ROLE_NAME                        VARCHAR,
+  WAREHOUSE_NAME                   VARCHAR,
+  WAREHOUSE_SIZE                   VARCHAR,
+  EXECUTION_STATUS                 VARCHAR,
+  ERROR_CODE                       VARCHAR,
+  START_TIME                       TIMESTAMP_LTZ,
+  END_TIME                         TIMESTAMP_LTZ,
+  TOTAL_ELAPSED_TIME               NUMBER,   -- milliseconds
+  COMPILATION_TIME                 NUMBER,
+  EXECUTION_TIME                   NUMBER,
+  QUEUED_OVERLOAD_TIME             NUMBER,
+  QUEUED_PROVISIONING_TIME         NUMBER,
+  BYTES_SCANNED                    NUMBER,
+  PERCENTAGE_SCANNED_FROM_CACHE    FLOAT,
+  PARTITIONS_SCANNED               NUMBER,
+  PARTITIONS_TOTAL                 NUMBER,
+  BYTES_SPILLED_TO_LOCAL_STORAGE   NUMBER,
+  BYTES_SPILLED_TO_REMOTE_STORAGE  NUMBER,
+  ROWS_PRODUCED                    NUMBER,
+  CREDITS_USED_CLOUD_SERVICES      FLOAT
+)
+CLUSTER BY (TO_DATE(START_TIME))
+COMMENT = 'Completed queries collected from INFORMATION_SCHEMA.QUERY_HISTORY_BY_WAREHOUSE';
+
+CREATE OR REPLACE PROCEDURE COLLECT_PIPELINE_HISTORY_SP(RETAIN_DAYS NUMBER DEFAULT 400)
+RETURNS VARCHAR
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('snowflake-snowpark-python')
+HANDLER = 'run'
+EXECUTE AS CALLER
+AS
+$$
+import datetime as dt
+import snowflake.snowpark as sp
+
+TASK_TABLE = "TASK_RUN_HISTORY"
+QUERY_TABLE = "QUERY_RUN_HISTORY"
+SOURCE_RETENTION_DAYS = 7   # INFORMATION_SCHEMA keeps 7 days of history
+RETENTION_MARGIN = dt.timedelta(minutes=5)  # stay clear of the edge while the calls run
+QUERY_WINDOW = dt.timedelta(hours=1)
+MIN_QUERY_WINDOW = dt.timedelta(minutes=1)  # smallest split of a window that hits RESULT_LIMIT
+RESULT_LIMIT = 10000        # maximum rows per INFORMATION_SCHEMA call
+WAREHOUSES = ("ANALYTICS_WH", "PIPELINE_WH", "VALIDATION_WH")  # one per workload class
+TS_FORMAT = "YYYY-MM-DD HH24:MI:SS.FF6 TZHTZM"
+
+def columns(session: sp.Session, table: str) -> list:
+    return [row["name"] for row in session.sql(f"DESCRIBE TABLE {table}").collect()]
+
+def ts_literal(value: dt.datetime) -> str:
+    return f"TO_TIMESTAMP_LTZ('{value:%Y-%m-%d %H:%M:%S.%f %z}', '{TS_FORMAT}')"
+
+def current_time(session: sp.Session) -> dt.datetime:
+    return session.sql("SELECT CURRENT_TIMESTAMP()::TIMESTAMP_LTZ").collect()[0][0]
+
+def oldest_available(now: dt.datetime) -> dt.datetime:
+    # INFORMATION_SCHEMA rejects range starts older than its retention
+    return now - dt.timedelta(days=SOURCE_RETENTION_DAYS) + RETENTION_MARGIN
+
+def watermark(session: sp.Session, table: str, column: str, now: dt.datetime) -> dt.datetime:
+    # MAX over a clustered timestamp is answered from micro-partition metadata
+    newest = session.sql(f"SELECT MAX({column}) FROM {table}").collect()[0][0]
+    return max(newest, oldest_available(now)) if newest else oldest_available(now)
+
+def in_task(session: sp.Session) -> bool:
+    # Only defined while running inside a task graph
+    try:
+        return session.sql(
+            "SELECT SYSTEM$TASK_RUNTIME_INFO('CURRENT_TASK_GRAPH_RUN_GROUP_ID')"
+        ).collect()[0][0] is not None
+    except Exception:
+        return False
+
+def merge_new(session: sp.Session, table: str, source: str, keys: list, since: dt.datetime, time_column: str) -> int:
+    cols = columns(session, table)
+    on = " AND ".join(f"t.{k} = s.{k}" for k in keys)
+    result = session.sql(f"""
+        MERGE INTO {table} t
+        USING ({source}) s
+        ON {on} AND t.{time_column} >= DATEADD('day', -1, {ts_literal(since)})
+        WHEN NOT MATCHED THEN INSERT ({", ".join(cols)})
+            VALUES ({", ".join("s." + c for c in cols)})
+    """).collect()
+    return result[0][0]
+
+def collect_tasks(session: sp.Session, now: dt.datetime) -> int:
+    since = watermark(session, TASK_TABLE, "COMPLETED_TIME", now)
+    cols = ", ".join(columns(session, TASK_TABLE))
+    # Runs are keyed by schedule, so look back a day for long-running ones,
+    # but no further than TASK_HISTORY still accepts
+    scheduled_start = max(since - dt.timedelta(days=1), oldest_available(now))
+    source = f"""
+        SELECT {cols}
+        FROM TABLE(information_schema.task_history(
+            scheduled_time_range_start => {ts_literal(scheduled_start)},
+            result_limit => {RESULT_LIMIT}))
+        WHERE COMPLETED_TIME IS NOT NULL
+    """
+    return merge_new(session, TASK_TABLE, source, ["NAME", "SCHEDULED_TIME", "ATTEMPT_NUMBER"],
+                     since, "SCHEDULED_TIME")
+
+def query_history(warehouse: str, start: dt.datetime, end: dt.datetime) -> str:
+    return f"""TABLE(information_schema.query_history_by_warehouse(
+        warehouse_name => '{warehouse}',
+        end_time_range_start => {ts_literal(start)},
+        end_time_range_end => {ts_literal(end)},
+        result_limit => {RESULT_LIMIT}))"""
+
+def window_end(session: sp.Session, warehouse: str, start: dt.datetime, end: dt.datetime) -> tuple:
+    # RESULT_LIMIT caps the raw function output, before any filter or dedup,
+    # so halve the window until its raw row count fits
+    while True:
+        rows = session.sql(f"SELECT COUNT(*) FROM {query_history(warehouse, start, end)}").collect()[0][0]
+        if rows < RESULT_LIMIT:
+            return end, False
+        if end - start <= MIN_QUERY_WINDOW:
+            return end, True
+        end = start + max((end - start) / 2, MIN_QUERY_WINDOW)
+
+def collect_queries(session: sp.Session, now: dt.datetime) -> tuple:
+    since = watermark(session, QUERY_TABLE, "END_TIME", now)
+    cols = ", ".join(columns(session, QUERY_TABLE))
+    role = session.sql("SELECT CURRENT_ROLE()").collect()[0][0]
+    collected = 0
+    truncated = 0
+    for warehouse in WAREHOUSES:
+        start = since
+        # Hourly windows, split further when one would exceed RESULT_LIMIT
+        while start < now:
+            try:
+                end, full = window_end(session, warehouse, start, min(start + QUERY_WINDOW, now))
+                source = f"""
+                    SELECT {cols}
+                    FROM {query_history(warehouse, start, end)}
+                    WHERE DATABASE_NAME = CURRENT_DATABASE()
+                      AND EXECUTION_STATUS IN ('SUCCESS', 'FAILED_WITH_ERROR', 'FAILED_WITH_INCIDENT')
+                      AND QUERY_TEXT NOT ILIKE '%information_schema.query_history_by_warehouse%'
+                """
+                collected += merge_new(session, QUERY_TABLE, source, ["QUERY_ID"], start, "END_TIME")
+            except Exception as e:
+                raise RuntimeError(f"Cannot read the query history of {warehouse}; "
+                                   f"GRANT MONITOR ON WAREHOUSE {warehouse} TO ROLE {role} ({e})") from e
+            if full:
+                truncated += 1
+            start = end
+    return collected, truncated
+
+def run(session: sp.Session, retain_days: int = 400) -> str:
+    try:
+        now = current_time(session)
+        task_runs = collect_tasks(session, now)
+        queries, truncated = collect_queries(session, now)
+
+        for table, column in ((TASK_TABLE, "SCHEDULED_TIME"), (QUERY_TABLE, "START_TIME")):
+            session.sql(f"DELETE FROM {table} WHERE {column} < DATEADD('day', -{int(retain_days)}, CURRENT_TIMESTAMP())").collect()
+
+        note = (f" ({truncated} one-minute windows hit the {RESULT_LIMIT:,}-row limit; some queries were skipped)"
+                if truncated else "")
+        return f"✅ Success! Collected {task_runs:,} task runs and {queries:,} queries{note}"
+    except Exception as e:
+        # Inside PIPELINE_HISTORY_TASK, raise so the run is recorded as FAILED
+        if in_task(session):
+            raise
+        return f"❌ Error: {str(e)}"
+$$;
+
+-- Hourly collection; suspended like the other tasks until activated
+CREATE OR REPLACE TASK PIPELINE_HISTORY_TASK
+SCHEDULE = 'USING CRON 30 * * * * UTC'  -- hourly at :30 UTC, between profile runs
+COMMENT  = 'Append new task and query history to TASK_RUN_HISTORY / QUERY_RUN_HISTORY (serverless)'
+AS
+CALL COLLECT_PIPELINE_HISTORY_SP();
+
+-- Seed the store with the last 7 days
+CALL COLLECT_PIPELINE_HISTORY_SP();
+
+-- When ready to activate (activate_pipeline.py does this too):
+-- SELECT SYSTEM$TASK_DEPENDENTS_ENABLE('PIPELINE_HISTORY_TASK');
+
+-- Task history: collected runs, plus the live runs not collected yet
+-- (executing, scheduled, or completed since the last collection). The live
+-- part covers all 7 retained days so nothing is missed while the collector
+-- is suspended or behind; the watermark filter keeps it small otherwise.
 CREATE OR REPLACE VIEW V_TASK_HISTORY AS
 SELECT *
+FROM TASK_RUN_HISTORY
+UNION ALL
+SELECT QUERY_ID, NAME, DATABASE_NAME, SCHEMA_NAME, QUERY_TEXT, CONDITION_TEXT, STATE,
+       ERROR_CODE, ERROR_MESSAGE, SCHEDULED_TIME, QUERY_START_TIME, NEXT_SCHEDULED_TIME,
+       COMPLETED_TIME, ROOT_TASK_ID, GRAPH_VERSION, RUN_ID, RETURN_VALUE, SCHEDULED_FROM,
+       ATTEMPT_NUMBER, GRAPH_RUN_GROUP_ID
 FROM TABLE(information_schema.task_history(
-  scheduled_time_range_start => dateadd('day', -7, current_timestamp()),
-  result_limit => 1000
-));
+  scheduled_time_range_start => dateadd('hour', -167, current_timestamp()),  -- just inside the 7-day retention
+  result_limit => 10000
+))
+WHERE COMPLETED_TIME IS NULL
+   OR COMPLETED_TIME > (SELECT COALESCE(MAX(COMPLETED_TIME), '1970-01-01'::TIMESTAMP_LTZ) FROM TASK_RUN_HISTORY);
 
--- Optional: add a post-run procedure to record counts;
--- or insert manually during ops:
+-- PUBLISH_CUSTOMER_PROFILE_SP() appends a row here on every publish and keeps
+-- the single-row PIPELINE_FRESHNESS table (07_sp_customer_profile.sql) current.
+-- To record a count manually during ops:
 -- INSERT INTO PIPELINE_HEALTH
--- SELECT CURRENT_TIMESTAMP(), COUNT(*) FROM CUSTOMER_LINEITEM_PROFILE;
\ No newline at end of file
+-- SELECT CURRENT_TIMESTAMP(), COUNT(*) FROM CUSTOMER_LINEITEM_PROFILE;
+
+-- Latest publish, as read by BI cache triggers
+-- SELECT PUBLISHED_AT, RUN_ID, ROW_COUNT FROM PIPELINE_FRESHNESS;
+
+-- Failed task runs over the last 90 days (reads the clustered store only)
+-- SELECT NAME, SCHEDULED_TIME, ERROR_MESSAGE
+-- FROM TASK_RUN_HISTORY
+-- WHERE STATE = 'FAILED' AND SCHEDULED_TIME >= DATEADD('day', -90, CURRENT_TIMESTAMP())
+-- ORDER BY SCHEDULED_TIME DESC;
@@ -3,16 +3,82 @@
 -- ============================================================================
 -- Convenience teardown for demos
 
--- Suspend and drop the task
+-- Suspend and drop the task graph (root first, then its dependents)
 ALTER TASK IF EXISTS CUSTOMER_PROFILE_TASK SUSPEND;
+DROP TASK IF EXISTS CUSTOMER_PROFILE_WARMUP_TASK;
+DROP TASK IF EXISTS CUSTOMER_PROFILE_DQ_TASK;
+DROP TASK IF EXISTS CUSTOMER_PROFILE_CUBE_TASK;
+DROP TASK IF EXISTS CUSTOMER_PROFILE_PUBLISH_TASK;
 DROP TASK IF EXISTS CUSTOMER_PROFILE_TASK;
+-- Slice tasks are named CUSTOMER_PROFILE_PART_NN_TASK; list and drop them:
+-- SHOW TASKS LIKE 'CUSTOMER_PROFILE_PART_%';
+-- DROP TASK IF EXISTS CUSTOMER_PROFILE_PART_01_TASK;
 
--- Drop the stored procedure
-DROP PROCEDURE IF EXISTS CREATE_CUSTOMER_PROFILE_SP();
+-- Drop the stored procedures and the build stage
+DROP PROCEDURE IF EXISTS CREATE_CUSTOMER_PROFILE_SP(DATE, DATE, VARCHAR, VARCHAR);
+DROP PROCEDURE IF EXISTS PUBLISH_CUSTOMER_PROFILE_SP();
+DROP PROCEDURE IF EXISTS BUILD_CUSTOMER_PROFILE_TASK_GRAPH_SP(NUMBER);
+DROP TABLE IF EXISTS CUSTOMER_PROFILE_STAGE;
+
+-- Drop the KPI cube
+DROP PROCEDURE IF EXISTS REFRESH_PROFILE_KPI_CUBE_SP();
+DROP TABLE IF EXISTS CUSTOMER_PROFILE_KPI_CUBE;
+
+-- Drop the data-quality profiler (PROFILE_COLUMN_STATS is kept with the history)
+DROP PROCEDURE IF EXISTS PROFILE_DATA_QUALITY_SP(VARCHAR);
+DROP VIEW IF EXISTS V_PROFILE_DQ_DRIFT;
+
+-- Drop the snapshot diff procedure (its log and results are kept)
+DROP PROCEDURE IF EXISTS DIFF_PROFILE_SNAPSHOTS_SP(VARCHAR, VARCHAR, VARCHAR, NUMBER, NUMBER);
+
+-- Drop the cache warmer (CACHE_WARMUP_LOG is kept with the history)
+DROP PROCEDURE IF EXISTS WARM_DASHBOARD_CACHE_SP(NUMBER, FLOAT, NUMBER);
+DROP VIEW IF EXISTS V_FIRST_HIT_LATENCY;
+DROP TABLE IF EXISTS DASHBOARD_WARMUP_QUERIES;
+
+-- Drop query attribution (QUERY_ATTRIBUTION_DAILY is kept with the history)
+DROP PROCEDURE IF EXISTS REFRESH_QUERY_ATTRIBUTION_SP(NUMBER);
+DROP VIEW IF EXISTS V_QUERY_ATTRIBUTION;
+DROP FUNCTION IF EXISTS WAREHOUSE_CREDITS_PER_HOUR(VARCHAR);
 
 -- Drop observability objects
 DROP TABLE IF EXISTS PIPELINE_HEALTH;
+DROP TABLE IF EXISTS PIPELINE_FRESHNESS;
 DROP VIEW IF EXISTS V_TASK_HISTORY;
+-- The TASK_RUN_HISTORY / QUERY_RUN_HISTORY stores are kept
+DROP TASK IF EXISTS QUERY_ATTRIBUTION_TASK;
+DROP TASK IF EXISTS PIPELINE_HISTORY_TASK;
+DROP PROCEDURE IF EXISTS COLLECT_PIPELINE_HISTORY_SP(NUMBER);
+
+-- Drop backfill bookkeeping (the CUSTOMER_PROFILE_HISTORY store is kept)
+DROP VIEW IF EXISTS V_PROFILE_BACKFILL_STATUS;
+DROP TABLE IF EXISTS CUSTOMER_PROFILE_BACKFILL_LOG;
+
+-- Drop materialized aggregation mode (re-run 03_aggregations.sql afterwards
+-- to restore the plain views)
+DROP DYNAMIC TABLE IF EXISTS DT_MONTHLY_REVENUE_BY_REGION;
+DROP DYNAMIC TABLE IF EXISTS DT_TOP_CUSTOMERS;
+DROP DYNAMIC TABLE IF EXISTS DT_PRODUCT_PERFORMANCE;
+DROP DYNAMIC TABLE IF EXISTS DT_SUPPLIER_PERFORMANCE;
+DROP DYNAMIC TABLE IF EXISTS DT_ORDER_STATUS_SUMMARY;
+DROP DYNAMIC TABLE IF EXISTS DT_MARKET_SEGMENT_ANALYSIS;
+DROP DYNAMIC TABLE IF EXISTS DT_SHIPPING_MODE_ANALYSIS;
+DROP DYNAMIC TABLE IF EXISTS DT_LINEITEM_ROLLUP_BASE;
+DROP VIEW IF EXISTS TPCH_ORDER_DETAILS;
+DROP TABLE IF EXISTS TPCH_LINEITEM;
+DROP TABLE IF EXISTS TPCH_ORDERS;
+DROP TABLE IF EXISTS TPCH_CUSTOMER;
+DROP TABLE IF EXISTS TPCH_NATION;
+DROP TABLE IF EXISTS TPCH_REGION;
+DROP TABLE IF EXISTS TPCH_PART;
+DROP TABLE IF EXISTS TPCH_SUPPLIER;
+DROP PROCEDURE IF EXISTS SET_AGGREGATION_TARGET_LAG_SP(VARCHAR);
+
+-- Drop approximate-distinct fast mode
+DROP VIEW IF EXISTS V_MONTHLY_REVENUE_BY_REGION_APPROX;
+DROP VIEW IF EXISTS V_ORDER_STATUS_SUMMARY_APPROX;
+DROP VIEW IF EXISTS V_MARKET_SEGMENT_ANALYSIS_APPROX;
+DROP TABLE IF EXISTS ORDER_DISTINCT_SKETCHES;
 
 -- Keep CUSTOMER_LINEITEM_PROFILE if you want the data; otherwise:
 -- DROP TABLE IF EXISTS CUSTOMER_LINEITEM_PROFILE;
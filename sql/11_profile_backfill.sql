@@ -0,0 +1,36 @@
+-- ============================================================================
+-- Customer Profile Backfill
+-- ============================================================================
+-- Bookkeeping for backfill_profile.py, which replays past order-date ranges
+-- through CREATE_CUSTOMER_PROFILE_SP(START_DATE, END_DATE, TARGET_TABLE, WRITE_MODE).
+--
+-- Each chunk writes its own date slice of the target table (by default the
+-- CUSTOMER_PROFILE_HISTORY store, created by the procedure on first use).
+-- Chunks with no rows in the target yet are insert-only and run in parallel;
+-- chunks that already have rows replace their slice, so a chunk can be re-run
+-- any number of times. This log records which chunks of a
+-- run have finished; re-running the same command skips them.
+
+CREATE TABLE IF NOT EXISTS CUSTOMER_PROFILE_BACKFILL_LOG (
+  RUN_ID        VARCHAR,
+  TARGET_TABLE  VARCHAR,
+  CHUNK_START   DATE,
+  CHUNK_END     DATE,
+  STATUS        VARCHAR,        -- RUNNING | SUCCEEDED | FAILED
+  QUERY_ID      VARCHAR,
+  MESSAGE       VARCHAR,
+  STARTED_AT    TIMESTAMP_TZ,
+  FINISHED_AT   TIMESTAMP_TZ
+);
+
+-- Latest state of every chunk
+CREATE OR REPLACE VIEW V_PROFILE_BACKFILL_STATUS AS
+SELECT *
+FROM CUSTOMER_PROFILE_BACKFILL_LOG
+QUALIFY ROW_NUMBER() OVER (
+  PARTITION BY RUN_ID, CHUNK_START
+  ORDER BY STARTED_AT DESC
+) = 1;
+
+-- Example: replay 1995 in monthly chunks, eight at a time
+--   python backfill_profile.py --start 1995-01-01 --end 1996-01-01 --parallelism 8
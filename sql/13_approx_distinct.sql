@@ -0,0 +1,80 @@
+-- 13_approx_distinct.sql
+-- Approximate-Distinct Fast Mode for the KPI Aggregations (optional)
+-- Exploratory dashboards rarely need exact distinct customer counts, and
+-- COUNT(DISTINCT) is the memory-heavy part of the KPI views. This file keeps
+-- HyperLogLog sketches of customer keys at a fine grain and rebuilds the
+-- distinct-count views on top of them as *_APPROX variants next to the exact
+-- views in 03_aggregations.sql.
+--
+-- Sketches merge with HLL_COMBINE, so any roll-up across months, regions,
+-- segments or statuses reads the small sketch table instead of rescanning
+-- ORDERS. Estimates carry Snowflake's HLL error (about 1.6% on average);
+-- measure it on this data with:
+--   python benchmark_dashboard.py --suite approx_distinct
+--
+-- Order counts stay exact: V_ORDER_DETAILS has one row per order, so they are
+-- plain sums of ORDER_COUNT.
+
+USE DATABASE TPCH_DASHBOARDS;
+USE SCHEMA PUBLIC;
+
+-- Customer sketches by month, region, segment and status
+-- The TPCH sample data is static, so the table is rebuilt on each deploy.
+CREATE OR REPLACE TABLE ORDER_DISTINCT_SKETCHES
+    COMMENT = 'Order totals and HLL customer sketches by month, region, segment and status'
+AS
+SELECT
+    DATE_TRUNC('MONTH', O_ORDERDATE) as ORDER_MONTH,
+    REGION,
+    MARKET_SEGMENT,
+    O_ORDERSTATUS,
+    COUNT(*) as ORDER_COUNT,
+    SUM(O_TOTALPRICE) as TOTAL_REVENUE,
+    HLL_ACCUMULATE(O_CUSTKEY) as CUSTOMER_SKETCH
+FROM V_ORDER_DETAILS
+GROUP BY DATE_TRUNC('MONTH', O_ORDERDATE), REGION, MARKET_SEGMENT, O_ORDERSTATUS;
+
+-- Monthly revenue by region (approximate customer count)
+CREATE OR REPLACE VIEW V_MONTHLY_REVENUE_BY_REGION_APPROX AS
+SELECT
+    ORDER_MONTH,
+    REGION,
+    SUM(ORDER_COUNT) as ORDER_COUNT,
+    SUM(TOTAL_REVENUE) as TOTAL_REVENUE,
+    SUM(TOTAL_REVENUE) / SUM(ORDER_COUNT) as AVG_ORDER_VALUE,
+    HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH)) as CUSTOMER_COUNT
+FROM ORDER_DISTINCT_SKETCHES
+GROUP BY ORDER_MONTH, REGION;
+
+-- Order status summary (served from the sketch table; all columns exact)
+CREATE OR REPLACE VIEW V_ORDER_STATUS_SUMMARY_APPROX AS
+SELECT
+    O_ORDERSTATUS,
+    DATE_TRUNC('YEAR', ORDER_MONTH) as ORDER_YEAR,
+    REGION,
+    SUM(ORDER_COUNT) as ORDER_COUNT,
+    SUM(TOTAL_REVENUE) as TOTAL_REVENUE,
+    SUM(TOTAL_REVENUE) / SUM(ORDER_COUNT) as AVG_ORDER_VALUE
+FROM ORDER_DISTINCT_SKETCHES
+GROUP BY O_ORDERSTATUS, DATE_TRUNC('YEAR', ORDER_MONTH), REGION;
+
+-- Market segment analysis (approximate customer count)
+CREATE OR REPLACE VIEW V_MARKET_SEGMENT_ANALYSIS_APPROX AS
+SELECT
+    MARKET_SEGMENT,
+    REGION,
+    HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH)) as CUSTOMER_COUNT,
+    SUM(ORDER_COUNT) as ORDER_COUNT,
+    SUM(TOTAL_REVENUE) as TOTAL_REVENUE,
+    SUM(TOTAL_REVENUE) / SUM(ORDER_COUNT) as AVG_ORDER_VALUE,
+    SUM(TOTAL_REVENUE) / HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH)) as REVENUE_PER_CUSTOMER
+FROM ORDER_DISTINCT_SKETCHES
+GROUP BY MARKET_SEGMENT, REGION;
+
+-- Example: yearly active customers per region, merged from monthly sketches
+-- SELECT YEAR(ORDER_MONTH) as ORDER_YEAR, REGION,
+--        HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH)) as ACTIVE_CUSTOMERS
+-- FROM ORDER_DISTINCT_SKETCHES
+-- GROUP BY ORDER_YEAR, REGION;
+
+SELECT 'Approximate-distinct views created' as STATUS;
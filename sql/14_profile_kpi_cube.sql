@@ -0,0 +1,123 @@
+-- ============================================================================
+-- Customer Profile KPI Cube
+-- ============================================================================
+-- Dashboards group CUSTOMER_LINEITEM_PROFILE by month, year, region, segment
+-- and order status in many combinations, and each one is a full scan. This
+-- cube pre-aggregates every combination of (month, region, segment, status)
+-- with GROUP BY CUBE in a single scan, so dashboard tiles become lookups
+-- against roughly 12K rows.
+--
+-- A rolled-up dimension is NULL in its cell (none of them is NULL in the
+-- source) and is flagged in GROUPING_ID. Each cell stores additive measures,
+-- exact distinct counts for that cell, and an HLL customer sketch:
+--   * ORDER_COUNT adds up across cells: an order belongs to one month,
+--     customer and status, so yearly or multi-region totals are plain sums
+--   * customers span months and statuses, so combine month cells with
+--     HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH)) instead of summing
+--
+-- CUSTOMER_PROFILE_CUBE_TASK rebuilds the cube after every publish of the
+-- profile task graph (08_task_customer_profile.sql). After a manual full build
+-- (CALL CREATE_CUSTOMER_PROFILE_SP()), refresh it with:
+--   CALL REFRESH_PROFILE_KPI_CUBE_SP();
+
+CREATE OR REPLACE PROCEDURE REFRESH_PROFILE_KPI_CUBE_SP()
+RETURNS VARCHAR
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('snowflake-snowpark-python')
+HANDLER = 'run'
+AS
+$$
+import snowflake.snowpark as sp
+
+PROFILE_TABLE = "CUSTOMER_LINEITEM_PROFILE"
+CUBE_TABLE = "CUSTOMER_PROFILE_KPI_CUBE"
+
+def run(session: sp.Session) -> str:
+    # CREATE OR REPLACE swaps the new cube in atomically; readers never see
+    # a half-built table
+    session.sql(f"""
+        CREATE OR REPLACE TABLE {CUBE_TABLE}
+            COMMENT = 'KPI cube over {PROFILE_TABLE} by month, region, segment and order status'
+        AS
+        WITH profile AS (
+            SELECT
+                DATE_TRUNC('MONTH', p.O_ORDERDATE) as ORDER_MONTH,
+                c.REGION,
+                c.C_MKTSEGMENT as MARKET_SEGMENT,
+                p.O_ORDERSTATUS,
+                p.O_ORDERKEY,
+                p.O_CUSTKEY,
+                p.L_QUANTITY,
+                p.PRICE_AFTER_DISCOUNT,
+                p.PRICE_PER_QTY
+            FROM {PROFILE_TABLE} p
+            JOIN V_CUSTOMER_DETAILS c ON p.O_CUSTKEY = c.C_CUSTKEY
+        )
+        SELECT
+            ORDER_MONTH,
+            REGION,
+            MARKET_SEGMENT,
+            O_ORDERSTATUS,
+            GROUPING(ORDER_MONTH, REGION, MARKET_SEGMENT, O_ORDERSTATUS) as GROUPING_ID,
+            COUNT(*) as LINE_COUNT,
+            COUNT(DISTINCT O_ORDERKEY) as ORDER_COUNT,
+            COUNT(DISTINCT O_CUSTKEY) as CUSTOMER_COUNT,
+            SUM(L_QUANTITY) as TOTAL_QUANTITY,
+            SUM(PRICE_AFTER_DISCOUNT) as TOTAL_REVENUE,
+            SUM(PRICE_PER_QTY) as PRICE_PER_QTY_SUM,
+            HLL_ACCUMULATE(O_CUSTKEY) as CUSTOMER_SKETCH
+        FROM profile
+        GROUP BY CUBE (ORDER_MONTH, REGION, MARKET_SEGMENT, O_ORDERSTATUS)
+    """).collect()
+
+    row_count = session.table(CUBE_TABLE).count()
+
+    # Cached cube results are keyed on this timestamp (see PIPELINE_FRESHNESS)
+    session.sql("UPDATE PIPELINE_FRESHNESS SET CUBE_REFRESHED_AT = CURRENT_TIMESTAMP()").collect()
+
+    return f"✅ Success! Rebuilt {CUBE_TABLE} with {row_count:,} cells"
+$$;
+
+-- ============================================================================
+-- Refresh Task
+-- ============================================================================
+-- Runs after CUSTOMER_PROFILE_PUBLISH_TASK in the profile task graph. The
+-- graph can only be changed while its root is suspended; re-enable it with
+-- SYSTEM$TASK_DEPENDENTS_ENABLE once this file has run.
+
+ALTER TASK IF EXISTS CUSTOMER_PROFILE_TASK SUSPEND;
+
+CREATE OR REPLACE TASK CUSTOMER_PROFILE_CUBE_TASK
+COMMENT  = 'Rebuild CUSTOMER_PROFILE_KPI_CUBE after each profile publish'
+AFTER CUSTOMER_PROFILE_PUBLISH_TASK
+AS
+CALL REFRESH_PROFILE_KPI_CUBE_SP();
+
+ALTER TASK CUSTOMER_PROFILE_CUBE_TASK RESUME;
+
+-- Build the cube from the current profile
+CALL REFRESH_PROFILE_KPI_CUBE_SP();
+
+-- When ready to activate (resumes the root and every task below it):
+-- SELECT SYSTEM$TASK_DEPENDENTS_ENABLE('CUSTOMER_PROFILE_TASK');
+
+-- ============================================================================
+-- Example Lookups
+-- ============================================================================
+-- Grand total (every dimension rolled up)
+-- SELECT ORDER_COUNT, CUSTOMER_COUNT, TOTAL_REVENUE
+-- FROM CUSTOMER_PROFILE_KPI_CUBE WHERE GROUPING_ID = 15;
+--
+-- Revenue by region and segment
+-- SELECT REGION, MARKET_SEGMENT, TOTAL_REVENUE
+-- FROM CUSTOMER_PROFILE_KPI_CUBE
+-- WHERE ORDER_MONTH IS NULL AND O_ORDERSTATUS IS NULL
+--   AND REGION IS NOT NULL AND MARKET_SEGMENT IS NOT NULL;
+--
+-- Yearly active customers, merged from the monthly cells
+-- SELECT YEAR(ORDER_MONTH) as ORDER_YEAR, SUM(ORDER_COUNT) as ORDERS,
+--        HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH)) as ACTIVE_CUSTOMERS
+-- FROM CUSTOMER_PROFILE_KPI_CUBE
+-- WHERE GROUPING_ID = 7  -- month only
+-- GROUP BY ORDER_YEAR;
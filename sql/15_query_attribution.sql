@@ -0,0 +1,154 @@
+-- 15_query_attribution.sql
+-- Cost and Latency Attribution by BI Tool, Dashboard and Role
+-- Every client tags its sessions with a JSON QUERY_TAG:
+--   {"app":"tpch_dashboards","tool":"tableau","dashboard":"<workbook>","suite":"<test suite>"}
+-- set by connection_strings.get_snowflake_connection() for the Python tools,
+-- Tableau initial SQL (config/tableau_connection.tds), Looker JDBC params, and
+-- the service users' default QUERY_TAG (bi_security_setup.sql). Untagged
+-- queries fall back to their BI role.
+--
+-- QUERY_ATTRIBUTION_DAILY rolls QUERY_RUN_HISTORY (09_observability.sql) up
+-- per day, tool, dashboard, suite, role and warehouse. Credits are estimated
+-- as execution time x the warehouse size's hourly rate; this ignores idle
+-- time and concurrency, so use it to compare workloads, not to reconcile the
+-- bill. The most expensive queries per tool are listed by:
+--   python query_cost_report.py --days 7
+
+USE DATABASE TPCH_DASHBOARDS;
+USE SCHEMA PUBLIC;
+
+-- Standard warehouse credits per hour
+CREATE OR REPLACE FUNCTION WAREHOUSE_CREDITS_PER_HOUR(WAREHOUSE_SIZE VARCHAR)
+RETURNS FLOAT
+AS
+$$
+    CASE UPPER(REPLACE(WAREHOUSE_SIZE, '-', ''))
+        WHEN 'XSMALL' THEN 1
+        WHEN 'SMALL' THEN 2
+        WHEN 'MEDIUM' THEN 4
+        WHEN 'LARGE' THEN 8
+        WHEN 'XLARGE' THEN 16
+        WHEN '2XLARGE' THEN 32
+        WHEN 'XXLARGE' THEN 32
+        WHEN '3XLARGE' THEN 64
+        WHEN 'XXXLARGE' THEN 64
+        WHEN '4XLARGE' THEN 128
+        WHEN '5XLARGE' THEN 256
+        WHEN '6XLARGE' THEN 512
+    END
+$$;
+
+-- One row per query with its attribution keys and estimated credits
+CREATE OR REPLACE VIEW V_QUERY_ATTRIBUTION AS
+SELECT
+    QUERY_ID,
+    START_TIME,
+    TO_DATE(START_TIME) as QUERY_DATE,
+    COALESCE(
+        TRY_PARSE_JSON(QUERY_TAG):tool::VARCHAR,
+        CASE ROLE_NAME
+            WHEN 'LOOKER_ROLE' THEN 'looker'
+            WHEN 'POWERBI_ROLE' THEN 'powerbi'
+            WHEN 'TABLEAU_ROLE' THEN 'tableau'
+            WHEN 'BI_ROLE' THEN 'bi'
+        END,
+        'untagged'
+    ) as TOOL,
+    COALESCE(TRY_PARSE_JSON(QUERY_TAG):dashboard::VARCHAR, '(none)') as DASHBOARD,
+    COALESCE(TRY_PARSE_JSON(QUERY_TAG):suite::VARCHAR, '(none)') as SUITE,
+    TRY_PARSE_JSON(QUERY_TAG):workload::VARCHAR as WORKLOAD,
+    ROLE_NAME,
+    WAREHOUSE_NAME,
+    WAREHOUSE_SIZE,
+    QUERY_TYPE,
+    EXECUTION_STATUS,
+    QUERY_TEXT,
+    TOTAL_ELAPSED_TIME,
+    EXECUTION_TIME,
+    QUEUED_OVERLOAD_TIME + QUEUED_PROVISIONING_TIME as QUEUED_TIME,
+    BYTES_SCANNED,
+    EXECUTION_TIME / 3600000 * COALESCE(WAREHOUSE_CREDITS_PER_HOUR(WAREHOUSE_SIZE), 0)
+        + COALESCE(CREDITS_USED_CLOUD_SERVICES, 0) as ESTIMATED_CREDITS
+FROM QUERY_RUN_HISTORY;
+
+CREATE TABLE IF NOT EXISTS QUERY_ATTRIBUTION_DAILY (
+    QUERY_DATE           DATE,
+    TOOL                 VARCHAR,
+    DASHBOARD            VARCHAR,
+    SUITE                VARCHAR,
+    ROLE_NAME            VARCHAR,
+    WAREHOUSE_NAME       VARCHAR,
+    QUERY_COUNT          NUMBER,
+    FAILED_COUNT         NUMBER,
+    TOTAL_ELAPSED_S      FLOAT,
+    P95_ELAPSED_S        FLOAT,
+    EXECUTION_S          FLOAT,
+    QUEUED_S             FLOAT,
+    BYTES_SCANNED        NUMBER,
+    ESTIMATED_CREDITS    FLOAT
+)
+CLUSTER BY (QUERY_DATE)
+COMMENT = 'Daily elapsed time, bytes scanned and estimated credits by tool, dashboard and role';
+
+-- Recomputes the last DAYS days; older days are final once collected
+CREATE OR REPLACE PROCEDURE REFRESH_QUERY_ATTRIBUTION_SP(DAYS NUMBER DEFAULT 2)
+RETURNS VARCHAR
+LANGUAGE SQL
+AS
+$$
+DECLARE
+    since DATE DEFAULT DATEADD('day', -DAYS, CURRENT_DATE());
+    row_count NUMBER;
+BEGIN
+    BEGIN TRANSACTION;
+    DELETE FROM QUERY_ATTRIBUTION_DAILY WHERE QUERY_DATE >= :since;
+    INSERT INTO QUERY_ATTRIBUTION_DAILY
+    SELECT
+        QUERY_DATE,
+        TOOL,
+        DASHBOARD,
+        SUITE,
+        ROLE_NAME,
+        WAREHOUSE_NAME,
+        COUNT(*),
+        COUNT_IF(EXECUTION_STATUS <> 'SUCCESS'),
+        SUM(TOTAL_ELAPSED_TIME) / 1000,
+        APPROX_PERCENTILE(TOTAL_ELAPSED_TIME, 0.95) / 1000,
+        SUM(EXECUTION_TIME) / 1000,
+        SUM(QUEUED_TIME) / 1000,
+        SUM(BYTES_SCANNED),
+        SUM(ESTIMATED_CREDITS)
+    FROM V_QUERY_ATTRIBUTION
+    WHERE QUERY_DATE >= :since
+    GROUP BY QUERY_DATE, TOOL, DASHBOARD, SUITE, ROLE_NAME, WAREHOUSE_NAME;
+    row_count := SQLROWCOUNT;
+    COMMIT;
+    RETURN '✅ Success! Rebuilt ' || row_count || ' attribution rows since ' || since;
+END;
+$$;
+
+-- Refresh after every history collection. The graph can only be changed
+-- while its root is suspended.
+ALTER TASK IF EXISTS PIPELINE_HISTORY_TASK SUSPEND;
+
+CREATE OR REPLACE TASK QUERY_ATTRIBUTION_TASK
+COMMENT  = 'Roll QUERY_RUN_HISTORY up into QUERY_ATTRIBUTION_DAILY after each collection'
+AFTER PIPELINE_HISTORY_TASK
+AS
+CALL REFRESH_QUERY_ATTRIBUTION_SP();
+
+ALTER TASK QUERY_ATTRIBUTION_TASK RESUME;
+
+-- Backfill everything collected so far
+CALL REFRESH_QUERY_ATTRIBUTION_SP(400);
+
+-- When ready to activate (resumes the collector and this task):
+-- SELECT SYSTEM$TASK_DEPENDENTS_ENABLE('PIPELINE_HISTORY_TASK');
+
+-- Example: cost by tool over the last 30 days
+-- SELECT TOOL, SUM(QUERY_COUNT) as QUERIES, SUM(TOTAL_ELAPSED_S) as ELAPSED_S,
+--        SUM(BYTES_SCANNED) / POWER(1024, 3) as GB_SCANNED, SUM(ESTIMATED_CREDITS) as CREDITS
+-- FROM QUERY_ATTRIBUTION_DAILY
+-- WHERE QUERY_DATE >= DATEADD('day', -30, CURRENT_DATE())
+-- GROUP BY TOOL
+-- ORDER BY CREDITS DESC;
@@ -0,0 +1,245 @@
+-- 17_snapshot_diff.sql
+-- Snapshot Diff for CUSTOMER_LINEITEM_PROFILE
+-- Every publish keeps a zero-copy clone CUSTOMER_LINEITEM_PROFILE_<timestamp>
+-- (07_sp_customer_profile.sql). DIFF_PROFILE_SNAPSHOTS_SP compares two of them,
+-- or a snapshot and the current table, without joining the full tables:
+--   1. Each side is aggregated once into key-range buckets (default 1024
+--      ranges of L_ORDERKEY), each with a row count and HASH_AGG over the
+--      columns the two sides share. Only the small bucket lists are joined.
+--   2. Only buckets whose count or hash differ are read again, this time by
+--      key range so micro-partitions are pruned. Keys are aggregated the same
+--      way, plus one hash per column to name the changed columns.
+--   3. Unless too many rows changed, the rows of changed keys are matched by
+--      row hash, and the rows found on one side only are stored.
+--
+-- The profile has no line number, so the default key is the order
+-- (L_ORDERKEY). An order is INSERTED, DELETED or UPDATED, and its changed
+-- lines are listed in PROFILE_DIFF_ROWS. KEY_COLUMNS takes any
+-- comma-separated key. Ranges need a numeric first key column; other keys
+-- fall back to hash buckets, which do not prune.
+--
+-- CALL DIFF_PROFILE_SNAPSHOTS_SP();   -- previous snapshot vs. current table
+-- CALL DIFF_PROFILE_SNAPSHOTS_SP('CUSTOMER_LINEITEM_PROFILE_20240101_100000',
+--                                'CUSTOMER_LINEITEM_PROFILE_20240101_110000');
+-- python diff_profile_snapshots.py --list
+
+USE DATABASE TPCH_DASHBOARDS;
+USE SCHEMA PUBLIC;
+
+CREATE TABLE IF NOT EXISTS PROFILE_DIFF_LOG (
+    DIFF_ID          VARCHAR,
+    DIFFED_AT        TIMESTAMP_LTZ,
+    FROM_TABLE       VARCHAR,
+    TO_TABLE         VARCHAR,
+    KEY_COLUMNS      VARCHAR,
+    BUCKETS          NUMBER,
+    CHANGED_BUCKETS  NUMBER,
+    INSERTED_KEYS    NUMBER,
+    DELETED_KEYS     NUMBER,
+    UPDATED_KEYS     NUMBER,
+    ROWS_BEFORE      NUMBER,
+    ROWS_AFTER       NUMBER,
+    ADDED_COLUMNS    ARRAY,
+    DROPPED_COLUMNS  ARRAY,
+    ROW_DIFFS        NUMBER,         -- NULL when skipped (over MAX_ROW_DIFFS)
+    ELAPSED_S        FLOAT
+)
+COMMENT = 'One row per DIFF_PROFILE_SNAPSHOTS_SP run';
+
+-- One row per changed key
+CREATE TABLE IF NOT EXISTS PROFILE_DIFF_CHANGES (
+    DIFF_ID          VARCHAR,
+    KEY              VARIANT,
+    CHANGE_TYPE      VARCHAR,        -- INSERTED, DELETED, UPDATED
+    ROWS_BEFORE      NUMBER,
+    ROWS_AFTER       NUMBER,
+    CHANGED_COLUMNS  ARRAY           -- UPDATED keys only
+);
+
+-- Rows of changed keys found on one side only
+CREATE TABLE IF NOT EXISTS PROFILE_DIFF_ROWS (
+    DIFF_ID   VARCHAR,
+    KEY       VARIANT,
+    SIDE      VARCHAR,               -- BEFORE (only in FROM_TABLE) or AFTER (only in TO_TABLE)
+    ROW_DATA  VARIANT
+);
+
+CREATE OR REPLACE PROCEDURE DIFF_PROFILE_SNAPSHOTS_SP(
+    FROM_TABLE VARCHAR DEFAULT NULL,
+    TO_TABLE VARCHAR DEFAULT 'CUSTOMER_LINEITEM_PROFILE',
+    KEY_COLUMNS VARCHAR DEFAULT 'L_ORDERKEY',
+    BUCKETS NUMBER DEFAULT 1024,
+    MAX_ROW_DIFFS NUMBER DEFAULT 100000
+)
+RETURNS VARCHAR
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('snowflake-snowpark-python')
+HANDLER = 'run'
+AS
+$$
+import time
+import uuid
+import snowflake.snowpark as sp
+
+PROFILE_TABLE = "CUSTOMER_LINEITEM_PROFILE"
+MAX_RANGES = 256    # longer OR-lists of key ranges are merged across the smallest gaps
+NUMERIC_TYPES = ("NUMBER", "FLOAT")
+
+def table_columns(session: sp.Session, table: str) -> dict:
+    rows = session.sql("""
+        SELECT COLUMN_NAME, DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS
+        WHERE TABLE_SCHEMA = CURRENT_SCHEMA() AND TABLE_NAME = ?
+        ORDER BY ORDINAL_POSITION
+    """, params=[table]).collect()
+    if not rows:
+        raise ValueError(f"Table {table} not found")
+    return {row[0]: row[1] for row in rows}
+
+def previous_snapshot(session: sp.Session, to_table: str) -> str:
+    names = sorted(row["name"] for row in session.sql(f"SHOW TABLES LIKE '{PROFILE_TABLE}_%'").collect()
+                   if row["name"][-6:].isdigit())
+    # The newest snapshot is a clone of the current table
+    older = [name for name in names if name < to_table] if to_table in names else names[:-1]
+    if not older:
+        raise ValueError(f"No snapshot older than {to_table}")
+    return older[-1]
+
+def merge_ranges(buckets: list, lo: int, width: int) -> list:
+    """Contiguous [start, end) key ranges covering the changed buckets."""
+    ranges = []
+    for bucket in sorted(buckets):
+        start, end = lo + bucket * width, lo + (bucket + 1) * width
+        if ranges and ranges[-1][1] == start:
+            ranges[-1][1] = end
+        else:
+            ranges.append([start, end])
+    while len(ranges) > MAX_RANGES:
+        i = min(range(len(ranges) - 1), key=lambda i: ranges[i + 1][0] - ranges[i][1])
+        ranges[i:i + 2] = [[ranges[i][0], ranges[i + 1][1]]]
+    return ranges
+
+def run(session: sp.Session, from_table=None, to_table=PROFILE_TABLE, key_columns="L_ORDERKEY",
+        buckets=1024, max_row_diffs=100000) -> str:
+    try:
+        start = time.time()
+        diff_id = str(uuid.uuid4())
+        to_table = to_table.upper()
+        from_table = (from_table or previous_snapshot(session, to_table)).upper()
+        keys = [key.strip().upper() for key in key_columns.split(",")]
+
+        from_columns, to_columns = table_columns(session, from_table), table_columns(session, to_table)
+        columns = [c for c in to_columns if c in from_columns]
+        missing = [key for key in keys if key not in columns]
+        if missing:
+            raise ValueError(f"Key column(s) {', '.join(missing)} not in both tables")
+        column_list = ", ".join(columns)
+
+        # 1. Bucket hashes: one aggregate scan per side
+        first_key = keys[0]
+        if to_columns[first_key] in NUMERIC_TYPES:
+            lo, hi = session.sql(f"""
+                SELECT LEAST(a.LO, b.LO), GREATEST(a.HI, b.HI)
+                FROM (SELECT MIN({first_key}) as LO, MAX({first_key}) as HI FROM {from_table}) a,
+                     (SELECT MIN({first_key}) as LO, MAX({first_key}) as HI FROM {to_table}) b
+            """).collect()[0]
+            lo, hi = int(lo or 0), int(hi or 0)
+            width = max(1, -(-(hi - lo + 1) // int(buckets)))
+            bucket_expr = f"FLOOR(({first_key} - {lo}) / {width})"
+        else:
+            lo = width = None
+            bucket_expr = f"ABS(HASH({', '.join(keys)})) % {int(buckets)}"
+
+        changed = session.sql(f"""
+            WITH a AS (SELECT {bucket_expr} as BUCKET, COUNT(*) as N, HASH_AGG({column_list}) as H
+                       FROM {from_table} GROUP BY 1),
+                 b AS (SELECT {bucket_expr} as BUCKET, COUNT(*) as N, HASH_AGG({column_list}) as H
+                       FROM {to_table} GROUP BY 1)
+            SELECT COALESCE(a.BUCKET, b.BUCKET) as BUCKET
+            FROM a FULL OUTER JOIN b ON a.BUCKET = b.BUCKET
+            WHERE a.H IS DISTINCT FROM b.H OR a.N IS DISTINCT FROM b.N
+        """).collect()
+        changed_buckets = [int(row[0]) for row in changed]
+
+        # 2. Key hashes, only inside the changed buckets
+        if not changed_buckets:
+            predicate = "FALSE"
+        elif lo is not None:
+            predicate = " OR ".join(f"({first_key} >= {s} AND {first_key} < {e})"
+                                    for s, e in merge_ranges(changed_buckets, lo, width))
+        else:
+            predicate = f"{bucket_expr} IN ({', '.join(map(str, changed_buckets))})"
+
+        key_list = ", ".join(keys)
+        column_hashes = ", ".join(f"HASH_AGG({c}) as H_{i}" for i, c in enumerate(columns))
+        changed_columns = ", ".join(f"IFF(a.H_{i} = b.H_{i}, NULL, '{c}')" for i, c in enumerate(columns))
+        key_object = ", ".join(f"'{k}', COALESCE(a.{k}, b.{k})" for k in keys)
+        key_join = " AND ".join(f"EQUAL_NULL(a.{k}, b.{k})" for k in keys)
+        session.sql(f"""
+            INSERT INTO PROFILE_DIFF_CHANGES
+            WITH a AS (SELECT {key_list}, COUNT(*) as N, HASH_AGG({column_list}) as H, {column_hashes}
+                       FROM {from_table} WHERE {predicate} GROUP BY {key_list}),
+                 b AS (SELECT {key_list}, COUNT(*) as N, HASH_AGG({column_list}) as H, {column_hashes}
+                       FROM {to_table} WHERE {predicate} GROUP BY {key_list})
+            SELECT
+                ?,
+                OBJECT_CONSTRUCT_KEEP_NULL({key_object}),
+                CASE WHEN a.N IS NULL THEN 'INSERTED' WHEN b.N IS NULL THEN 'DELETED' ELSE 'UPDATED' END,
+                a.N,
+                b.N,
+                IFF(a.N IS NULL OR b.N IS NULL, NULL, ARRAY_COMPACT(ARRAY_CONSTRUCT({changed_columns})))
+            FROM a FULL OUTER JOIN b ON {key_join}
+            WHERE a.H IS DISTINCT FROM b.H OR a.N IS DISTINCT FROM b.N
+        """, params=[diff_id]).collect()
+
+        summary = session.sql("""
+            SELECT COUNT_IF(CHANGE_TYPE = 'INSERTED'), COUNT_IF(CHANGE_TYPE = 'DELETED'),
+                   COUNT_IF(CHANGE_TYPE = 'UPDATED'), COALESCE(SUM(ROWS_BEFORE), 0), COALESCE(SUM(ROWS_AFTER), 0)
+            FROM PROFILE_DIFF_CHANGES WHERE DIFF_ID = ?
+        """, params=[diff_id]).collect()[0]
+        inserted, deleted, updated, rows_before, rows_after = (int(value) for value in summary)
+
+        # 3. Changed rows: rows of changed keys without an identical twin on the other side
+        row_diffs = None
+        if rows_before + rows_after <= int(max_row_diffs):
+            row_data = ", ".join(f"'{c}', {c}" for c in columns)
+            numbered = (f"SELECT {key_list}, HASH({column_list}) as RH, "
+                        f"ROW_NUMBER() OVER (PARTITION BY {key_list}, HASH({column_list}) ORDER BY HASH({column_list})) as DUP, "
+                        f"OBJECT_CONSTRUCT_KEEP_NULL({row_data}) as ROW_DATA FROM {{table}} WHERE {predicate}")
+            row_join = " AND ".join(f"EQUAL_NULL(x.{k}, y.{k})" for k in keys)
+            key_object = ", ".join(f"'{k}', x.{k}" for k in keys)
+            for side, this, other in (("BEFORE", from_table, to_table), ("AFTER", to_table, from_table)):
+                session.sql(f"""
+                    INSERT INTO PROFILE_DIFF_ROWS
+                    SELECT ?, OBJECT_CONSTRUCT_KEEP_NULL({key_object}), '{side}', x.ROW_DATA
+                    FROM ({numbered.format(table=this)}) x
+                    LEFT JOIN ({numbered.format(table=other)}) y
+                      ON {row_join} AND x.RH = y.RH AND x.DUP = y.DUP
+                    WHERE y.RH IS NULL
+                """, params=[diff_id]).collect()
+            row_diffs = session.sql("SELECT COUNT(*) FROM PROFILE_DIFF_ROWS WHERE DIFF_ID = ?",
+                                    params=[diff_id]).collect()[0][0]
+
+        added = [c for c in to_columns if c not in from_columns]
+        dropped = [c for c in from_columns if c not in to_columns]
+        session.sql("""
+            INSERT INTO PROFILE_DIFF_LOG
+            SELECT ?, CURRENT_TIMESTAMP(), ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+                   SPLIT(NULLIF(?, ''), ','), SPLIT(NULLIF(?, ''), ','), ?, ?
+        """, params=[diff_id, from_table, to_table, ",".join(keys), int(buckets), len(changed_buckets),
+                     inserted, deleted, updated, rows_before, rows_after,
+                     ",".join(added), ",".join(dropped), row_diffs, time.time() - start]).collect()
+
+        rows_note = f"{row_diffs:,} changed rows" if row_diffs is not None else "row diff skipped"
+        return (f"✅ Success! Diff {diff_id}: {from_table} -> {to_table}, "
+                f"{len(changed_buckets)}/{int(buckets)} buckets changed, {inserted:,} inserted, "
+                f"{deleted:,} deleted, {updated:,} updated keys, {rows_note}")
+    except Exception as e:
+        return f"❌ Error: {str(e)}"
+$$;
+
+-- Changes of the latest diff
+-- SELECT c.CHANGE_TYPE, c.KEY, c.ROWS_BEFORE, c.ROWS_AFTER, c.CHANGED_COLUMNS
+-- FROM PROFILE_DIFF_CHANGES c
+-- JOIN (SELECT DIFF_ID FROM PROFILE_DIFF_LOG ORDER BY DIFFED_AT DESC LIMIT 1) l USING (DIFF_ID)
+-- ORDER BY c.CHANGE_TYPE, c.KEY:L_ORDERKEY;
@@ -0,0 +1,191 @@
+-- 18_data_quality.sql
+-- Single-Pass Data-Quality Profiler
+-- After each publish, PROFILE_DATA_QUALITY_SP computes per-column statistics
+-- of CUSTOMER_LINEITEM_PROFILE with one aggregate scan. The statistics are
+-- row count, null rate, min/max, mean, an approximate distinct count (HLL)
+-- and approximate quantiles (t-digest). Every column is aggregated in the
+-- same SELECT, so profiling all of them costs one scan rather than one per
+-- column and statistic.
+--
+-- PROFILE_COLUMN_STATS keeps the sketch states next to the estimates. They
+-- are mergeable, so statistics over several runs come from combining states,
+-- not rescanning:
+--   HLL_ESTIMATE(HLL_COMBINE(HLL_STATE))
+--   APPROX_PERCENTILE_ESTIMATE(APPROX_PERCENTILE_COMBINE(PERCENTILE_STATE), 0.5)
+--
+-- V_PROFILE_DQ_DRIFT compares each run with the previous one and flags large
+-- moves. Examples are a collapse of PRICE_PER_QTY's median, a spike in
+-- DISCOUNT_AMOUNT's p99, more nulls, or fewer distinct customers.
+--   python check_data_quality.py            # latest run, exit 1 on drift
+
+USE DATABASE TPCH_DASHBOARDS;
+USE SCHEMA PUBLIC;
+
+-- One row per profiled column and run
+CREATE TABLE IF NOT EXISTS PROFILE_COLUMN_STATS (
+    RUN_ID             VARCHAR,      -- PIPELINE_FRESHNESS.RUN_ID of the profiled publish
+    PROFILED_AT        TIMESTAMP_LTZ,
+    TABLE_NAME         VARCHAR,
+    COLUMN_NAME        VARCHAR,
+    DATA_TYPE          VARCHAR,
+    ROW_COUNT          NUMBER,
+    NULL_COUNT         NUMBER,
+    NULL_RATE          FLOAT,
+    MIN_VALUE          VARIANT,
+    MAX_VALUE          VARIANT,
+    MEAN               FLOAT,        -- numeric columns only
+    DISTINCT_ESTIMATE  NUMBER,
+    P01                FLOAT,        -- numeric columns only
+    P50                FLOAT,
+    P99                FLOAT,
+    HLL_STATE          BINARY,       -- HLL_ACCUMULATE state
+    PERCENTILE_STATE   VARIANT       -- APPROX_PERCENTILE_ACCUMULATE state
+)
+CLUSTER BY (TO_DATE(PROFILED_AT))
+COMMENT = 'Per-column statistics and sketches written by PROFILE_DATA_QUALITY_SP';
+
+-- Each run against the previous run of the same column, with drift flags
+CREATE OR REPLACE VIEW V_PROFILE_DQ_DRIFT AS
+WITH runs AS (
+    SELECT
+        RUN_ID, PROFILED_AT, TABLE_NAME, COLUMN_NAME, DATA_TYPE,
+        ROW_COUNT, NULL_RATE, DISTINCT_ESTIMATE, P01, P50, P99, MAX_VALUE,
+        LAG(RUN_ID) OVER (PARTITION BY TABLE_NAME, COLUMN_NAME ORDER BY PROFILED_AT) as PREV_RUN_ID,
+        LAG(ROW_COUNT) OVER (PARTITION BY TABLE_NAME, COLUMN_NAME ORDER BY PROFILED_AT) as PREV_ROW_COUNT,
+        LAG(NULL_RATE) OVER (PARTITION BY TABLE_NAME, COLUMN_NAME ORDER BY PROFILED_AT) as PREV_NULL_RATE,
+        LAG(DISTINCT_ESTIMATE) OVER (PARTITION BY TABLE_NAME, COLUMN_NAME ORDER BY PROFILED_AT) as PREV_DISTINCT_ESTIMATE,
+        LAG(P01) OVER (PARTITION BY TABLE_NAME, COLUMN_NAME ORDER BY PROFILED_AT) as PREV_P01,
+        LAG(P50) OVER (PARTITION BY TABLE_NAME, COLUMN_NAME ORDER BY PROFILED_AT) as PREV_P50,
+        LAG(P99) OVER (PARTITION BY TABLE_NAME, COLUMN_NAME ORDER BY PROFILED_AT) as PREV_P99
+    FROM PROFILE_COLUMN_STATS
+)
+SELECT
+    *,
+    -- Thresholds: null rate +/- 2 points, row count 10%, distinct count 20%,
+    -- p01/p50 25%, p99 50% (relative to the previous run)
+    ARRAY_COMPACT(ARRAY_CONSTRUCT(
+        IFF(ABS(NULL_RATE - PREV_NULL_RATE) > 0.02, 'NULL_RATE', NULL),
+        IFF(ABS(ROW_COUNT - PREV_ROW_COUNT) > 0.10 * PREV_ROW_COUNT, 'ROW_COUNT', NULL),
+        IFF(ABS(DISTINCT_ESTIMATE - PREV_DISTINCT_ESTIMATE) > 0.20 * PREV_DISTINCT_ESTIMATE, 'DISTINCT', NULL),
+        IFF(ABS(P01 - PREV_P01) > 0.25 * ABS(PREV_P01), 'P01', NULL),
+        IFF(ABS(P50 - PREV_P50) > 0.25 * ABS(PREV_P50), 'P50', NULL),
+        IFF(ABS(P99 - PREV_P99) > 0.50 * ABS(PREV_P99), 'P99', NULL)
+    )) as DRIFT
+FROM runs;
+
+CREATE OR REPLACE PROCEDURE PROFILE_DATA_QUALITY_SP(TABLE_NAME VARCHAR DEFAULT 'CUSTOMER_LINEITEM_PROFILE')
+RETURNS VARCHAR
+LANGUAGE PYTHON
+RUNTIME_VERSION = '3.11'
+PACKAGES = ('snowflake-snowpark-python')
+HANDLER = 'run'
+AS
+$$
+import datetime as dt
+import time
+import snowflake.snowpark as sp
+
+PROFILE_TABLE = "CUSTOMER_LINEITEM_PROFILE"
+STATS_TABLE = "PROFILE_COLUMN_STATS"
+SCAN_TABLE = "PROFILE_DQ_SCAN"
+NUMERIC_TYPES = ("NUMBER", "FLOAT")
+
+def profile_run_id(session: sp.Session, table: str) -> str:
+    if table == PROFILE_TABLE:
+        try:
+            row = session.sql("SELECT RUN_ID FROM PIPELINE_FRESHNESS WHERE PIPELINE = 'CUSTOMER_PROFILE'").collect()
+            if row:
+                return row[0][0]
+        except Exception:
+            pass  # 07_sp_customer_profile.sql not redeployed yet
+    return f"MANUAL_{dt.datetime.utcnow():%Y%m%d_%H%M%S}"
+
+def run(session: sp.Session, table_name: str = PROFILE_TABLE) -> str:
+    try:
+        start = time.time()
+        table = table_name.upper()
+        columns = session.sql("""
+            SELECT COLUMN_NAME, DATA_TYPE FROM INFORMATION_SCHEMA.COLUMNS
+            WHERE TABLE_SCHEMA = CURRENT_SCHEMA() AND TABLE_NAME = ?
+            ORDER BY ORDINAL_POSITION
+        """, params=[table]).collect()
+        if not columns:
+            raise ValueError(f"Table {table} not found")
+        run_id = profile_run_id(session, table)
+
+        # The one scan: every statistic of every column in a single aggregate row
+        aggregates = ["COUNT(*) as ROW_COUNT"]
+        for i, (name, data_type) in enumerate(columns):
+            aggregates += [f"COUNT_IF({name} IS NULL) as NULLS_{i}",
+                           f"TO_VARIANT(MIN({name})) as MIN_{i}",
+                           f"TO_VARIANT(MAX({name})) as MAX_{i}",
+                           f"HLL_ACCUMULATE({name}) as HLL_{i}"]
+            if data_type in NUMERIC_TYPES:
+                aggregates += [f"AVG({name})::FLOAT as MEAN_{i}",
+                               f"APPROX_PERCENTILE_ACCUMULATE({name}) as TDIGEST_{i}"]
+        session.sql(f"CREATE OR REPLACE TEMPORARY TABLE {SCAN_TABLE} AS "
+                    f"SELECT {', '.join(aggregates)} FROM {table}").collect()
+
+        # Unpivot the single row into one row per column
+        selects = []
+        for i, (name, data_type) in enumerate(columns):
+            if data_type in NUMERIC_TYPES:
+                numeric = (f"MEAN_{i}, " + ", ".join(f"APPROX_PERCENTILE_ESTIMATE(TDIGEST_{i}, {q})" for q in (0.01, 0.5, 0.99))
+                           + f", TDIGEST_{i}")
+            else:
+                numeric = "NULL, NULL, NULL, NULL, NULL"
+            selects.append(f"""
+                SELECT '{name}', '{data_type}', ROW_COUNT, NULLS_{i}, NULLS_{i} / NULLIF(ROW_COUNT, 0),
+                       MIN_{i}, MAX_{i}, HLL_ESTIMATE(HLL_{i}), HLL_{i}, {numeric}
+                FROM {SCAN_TABLE}""")
+
+        # Re-profiling a run replaces its rows
+        session.sql(f"DELETE FROM {STATS_TABLE} WHERE RUN_ID = ? AND TABLE_NAME = ?", params=[run_id, table]).collect()
+        session.sql(f"""
+            INSERT INTO {STATS_TABLE} (RUN_ID, PROFILED_AT, TABLE_NAME, COLUMN_NAME, DATA_TYPE, ROW_COUNT,
+                                       NULL_COUNT, NULL_RATE, MIN_VALUE, MAX_VALUE, DISTINCT_ESTIMATE,
+                                       HLL_STATE, MEAN, P01, P50, P99, PERCENTILE_STATE)
+            SELECT ?, CURRENT_TIMESTAMP(), ?, s.*
+            FROM ({' UNION ALL '.join(selects)}) s
+        """, params=[run_id, table]).collect()
+
+        drifted = session.sql("""
+            SELECT COLUMN_NAME, ARRAY_TO_STRING(DRIFT, '/') FROM V_PROFILE_DQ_DRIFT
+            WHERE RUN_ID = ? AND TABLE_NAME = ? AND ARRAY_SIZE(DRIFT) > 0
+            ORDER BY COLUMN_NAME
+        """, params=[run_id, table]).collect()
+
+        summary = f"profiled {len(columns)} columns of {table} (run {run_id}) in {time.time() - start:.1f}s"
+        if drifted:
+            return f"⚠️ Drift: {', '.join(f'{name} ({stats})' for name, stats in drifted)}; {summary}"
+        return f"✅ Success! No drift; {summary}"
+    except Exception as e:
+        return f"❌ Error: {str(e)}"
+$$;
+
+-- Profile every publish, next to the KPI cube refresh. The graph can only be
+-- changed while its root is suspended. Re-running 08_task_customer_profile.sql
+-- recreates the publish task; its builder links this task back after it.
+ALTER TASK IF EXISTS CUSTOMER_PROFILE_TASK SUSPEND;
+
+CREATE OR REPLACE TASK CUSTOMER_PROFILE_DQ_TASK
+COMMENT  = 'Profile CUSTOMER_LINEITEM_PROFILE columns and flag drift after each publish'
+AFTER CUSTOMER_PROFILE_PUBLISH_TASK
+AS
+CALL PROFILE_DATA_QUALITY_SP();
+
+ALTER TASK CUSTOMER_PROFILE_DQ_TASK RESUME;
+
+-- Profile the current table once
+CALL PROFILE_DATA_QUALITY_SP();
+
+-- When ready to activate (resumes the root and every task below it):
+-- SELECT SYSTEM$TASK_DEPENDENTS_ENABLE('CUSTOMER_PROFILE_TASK');
+
+-- Median PRICE_PER_QTY and distinct customers over the last 24 runs, merged from the sketches
+-- SELECT APPROX_PERCENTILE_ESTIMATE(APPROX_PERCENTILE_COMBINE(PERCENTILE_STATE), 0.5) as MEDIAN_PRICE_PER_QTY
+-- FROM (SELECT PERCENTILE_STATE FROM PROFILE_COLUMN_STATS WHERE COLUMN_NAME = 'PRICE_PER_QTY'
+--       ORDER BY PROFILED_AT DESC LIMIT 24);
+-- SELECT HLL_ESTIMATE(HLL_COMBINE(HLL_STATE)) as CUSTOMERS
+-- FROM (SELECT HLL_STATE FROM PROFILE_COLUMN_STATS WHERE COLUMN_NAME = 'O_CUSTKEY'
+--       ORDER BY PROFILED_AT DESC LIMIT 24);
@@ -22,20 +22,20 @@ CREATE ROLE IF NOT EXISTS BI_ROLE;
 -- =============================================================================
 
 -- Looker permissions
-GRANT USAGE ON WAREHOUSE COMPUTE_WH TO ROLE LOOKER_ROLE;
-GRANT OPERATE ON WAREHOUSE COMPUTE_WH TO ROLE LOOKER_ROLE; -- Auto-resume capability
+GRANT USAGE ON WAREHOUSE ANALYTICS_WH TO ROLE LOOKER_ROLE;
+GRANT OPERATE ON WAREHOUSE ANALYTICS_WH TO ROLE LOOKER_ROLE; -- Auto-resume capability
 
 -- Power BI permissions
-GRANT USAGE ON WAREHOUSE COMPUTE_WH TO ROLE POWERBI_ROLE;
-GRANT OPERATE ON WAREHOUSE COMPUTE_WH TO ROLE POWERBI_ROLE;
+GRANT USAGE ON WAREHOUSE ANALYTICS_WH TO ROLE POWERBI_ROLE;
+GRANT OPERATE ON WAREHOUSE ANALYTICS_WH TO ROLE POWERBI_ROLE;
 
 -- Tableau permissions
-GRANT USAGE ON WAREHOUSE COMPUTE_WH TO ROLE TABLEAU_ROLE;
-GRANT OPERATE ON WAREHOUSE COMPUTE_WH TO ROLE TABLEAU_ROLE;
+GRANT USAGE ON WAREHOUSE ANALYTICS_WH TO ROLE TABLEAU_ROLE;
+GRANT OPERATE ON WAREHOUSE ANALYTICS_WH TO ROLE TABLEAU_ROLE;
 
 -- General BI permissions
-GRANT USAGE ON WAREHOUSE COMPUTE_WH TO ROLE BI_ROLE;
-GRANT OPERATE ON WAREHOUSE COMPUTE_WH TO ROLE BI_ROLE;
+GRANT USAGE ON WAREHOUSE ANALYTICS_WH TO ROLE BI_ROLE;
+GRANT OPERATE ON WAREHOUSE ANALYTICS_WH TO ROLE BI_ROLE;
 
 -- =============================================================================
 -- 3. GRANT DATABASE AND SCHEMA ACCESS
@@ -93,7 +93,7 @@ GRANT SELECT ON FUTURE VIEWS IN SCHEMA TPCH_DASHBOARDS.PUBLIC TO ROLE BI_ROLE;
 CREATE USER IF NOT EXISTS LOOKER_USER
   PASSWORD = 'LookerSecure2024!'
   DEFAULT_ROLE = LOOKER_ROLE
-  DEFAULT_WAREHOUSE = COMPUTE_WH
+  DEFAULT_WAREHOUSE = ANALYTICS_WH
   DEFAULT_NAMESPACE = TPCH_DASHBOARDS.PUBLIC
   COMMENT = 'Dedicated user for Looker BI connections';
 
@@ -101,7 +101,7 @@ CREATE USER IF NOT EXISTS LOOKER_USER
 CREATE USER IF NOT EXISTS POWERBI_USER
   PASSWORD = 'PowerBISecure2024!'
   DEFAULT_ROLE = POWERBI_ROLE
-  DEFAULT_WAREHOUSE = COMPUTE_WH
+  DEFAULT_WAREHOUSE = ANALYTICS_WH
   DEFAULT_NAMESPACE = TPCH_DASHBOARDS.PUBLIC
   COMMENT = 'Dedicated user for Power BI connections';
 
@@ -109,7 +109,7 @@ CREATE USER IF NOT EXISTS POWERBI_USER
 CREATE USER IF NOT EXISTS TABLEAU_USER
   PASSWORD = 'TableauSecure2024!'
   DEFAULT_ROLE = TABLEAU_ROLE
-  DEFAULT_WAREHOUSE = COMPUTE_WH
+  DEFAULT_WAREHOUSE = ANALYTICS_WH
   DEFAULT_NAMESPACE = TPCH_DASHBOARDS.PUBLIC
   COMMENT = 'Dedicated user for Tableau connections';
 
@@ -117,10 +117,26 @@ CREATE USER IF NOT EXISTS TABLEAU_USER
 CREATE USER IF NOT EXISTS BI_USER
   PASSWORD = 'BIToolsSecure2024!'
   DEFAULT_ROLE = BI_ROLE
-  DEFAULT_WAREHOUSE = COMPUTE_WH
+  DEFAULT_WAREHOUSE = ANALYTICS_WH
   DEFAULT_NAMESPACE = TPCH_DASHBOARDS.PUBLIC
   COMMENT = 'General user for all BI tool connections';
 
+-- Default QUERY_TAG per tool, so every session is attributed even when the
+-- tool cannot set session parameters (Power BI). Tools that can (Tableau
+-- initial SQL, Looker JDBC params) override it with a dashboard-level tag.
+-- See sql/15_query_attribution.sql.
+ALTER USER LOOKER_USER SET QUERY_TAG = '{"app":"tpch_dashboards","tool":"looker"}';
+ALTER USER POWERBI_USER SET QUERY_TAG = '{"app":"tpch_dashboards","tool":"powerbi"}';
+ALTER USER TABLEAU_USER SET QUERY_TAG = '{"app":"tpch_dashboards","tool":"tableau"}';
+ALTER USER BI_USER SET QUERY_TAG = '{"app":"tpch_dashboards","tool":"bi"}';
+
+-- Interactive BI runs on ANALYTICS_WH, away from the pipeline and test
+-- warehouses (01_schema.sql); this also moves users created before the split
+ALTER USER LOOKER_USER SET DEFAULT_WAREHOUSE = ANALYTICS_WH;
+ALTER USER POWERBI_USER SET DEFAULT_WAREHOUSE = ANALYTICS_WH;
+ALTER USER TABLEAU_USER SET DEFAULT_WAREHOUSE = ANALYTICS_WH;
+ALTER USER BI_USER SET DEFAULT_WAREHOUSE = ANALYTICS_WH;
+
 -- =============================================================================
 -- 6. ASSIGN ROLES TO USERS
 -- =============================================================================
@@ -188,7 +204,7 @@ Connection Details:
 - Server: JHYWOUK-WA83239.snowflakecomputing.com
 - Database: TPCH_DASHBOARDS
 - Schema: PUBLIC
-- Warehouse: COMPUTE_WH
+- Warehouse: ANALYTICS_WH
 - Users: LOOKER_USER, POWERBI_USER, TABLEAU_USER, or BI_USER
 - Passwords: As set above (change them!)
 
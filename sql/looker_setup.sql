@@ -10,8 +10,8 @@ CREATE ROLE IF NOT EXISTS LOOKER_ROLE
   COMMENT = 'Role for Looker BI tool access to analytics data';
 
 -- Grant warehouse access with auto-resume capability
-GRANT USAGE ON WAREHOUSE COMPUTE_WH TO ROLE LOOKER_ROLE;
-GRANT OPERATE ON WAREHOUSE COMPUTE_WH TO ROLE LOOKER_ROLE;
+GRANT USAGE ON WAREHOUSE ANALYTICS_WH TO ROLE LOOKER_ROLE;
+GRANT OPERATE ON WAREHOUSE ANALYTICS_WH TO ROLE LOOKER_ROLE;
 
 -- Grant database and schema access
 GRANT USAGE ON DATABASE TPCH_DASHBOARDS TO ROLE LOOKER_ROLE;
@@ -33,7 +33,7 @@ GRANT SELECT ON FUTURE VIEWS IN SCHEMA TPCH_DASHBOARDS.PUBLIC TO ROLE LOOKER_ROL
 CREATE USER IF NOT EXISTS LOOKER_USER
   PASSWORD = 'LookerSecure2024!'
   DEFAULT_ROLE = LOOKER_ROLE
-  DEFAULT_WAREHOUSE = COMPUTE_WH
+  DEFAULT_WAREHOUSE = ANALYTICS_WH
   DEFAULT_NAMESPACE = TPCH_DASHBOARDS.PUBLIC
   MUST_CHANGE_PASSWORD = TRUE
   COMMENT = 'Service user for Looker BI tool connections';
@@ -41,6 +41,12 @@ CREATE USER IF NOT EXISTS LOOKER_USER
 -- Grant role to user
 GRANT ROLE LOOKER_ROLE TO USER LOOKER_USER;
 
+-- Attribute Looker sessions in query history (sql/15_query_attribution.sql)
+ALTER USER LOOKER_USER SET QUERY_TAG = '{"app":"tpch_dashboards","tool":"looker"}';
+
+-- Looker runs on the interactive BI warehouse (01_schema.sql)
+ALTER USER LOOKER_USER SET DEFAULT_WAREHOUSE = ANALYTICS_WH;
+
 -- Also grant to main user for flexibility
 GRANT ROLE LOOKER_ROLE TO USER ALGORYTHMOS;
 
@@ -133,7 +139,7 @@ ALTER SESSION SET STATEMENT_TIMEOUT_IN_SECONDS = 3600;
 
 -- Optimize warehouse for BI workloads
 -- (Run as ACCOUNTADMIN if needed)
--- ALTER WAREHOUSE COMPUTE_WH SET 
+-- ALTER WAREHOUSE ANALYTICS_WH SET 
 --   AUTO_SUSPEND = 60
 --   AUTO_RESUME = TRUE
 --   INITIALLY_SUSPENDED = FALSE;
@@ -150,7 +156,7 @@ SHOW USERS LIKE 'LOOKER_USER';
 
 -- Test data access as Looker user
 USE ROLE LOOKER_ROLE;
-USE WAREHOUSE COMPUTE_WH;
+USE WAREHOUSE ANALYTICS_WH;
 USE DATABASE TPCH_DASHBOARDS;
 USE SCHEMA PUBLIC;
 
@@ -183,7 +189,7 @@ Connection Details for Looker Studio & Looker Cloud:
 Server: JHYWOUK-WA83239.snowflakecomputing.com
 Database: TPCH_DASHBOARDS
 Schema: PUBLIC
-Warehouse: COMPUTE_WH
+Warehouse: ANALYTICS_WH
 Username: LOOKER_USER (or ALGORYTHMOS)
 Password: LookerSecure2024! (change this!)
 Role: LOOKER_ROLE
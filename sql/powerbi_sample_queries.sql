@@ -134,4 +134,131 @@ SELECT
     COUNT(DISTINCT O_ORDERKEY) as order_count,
     SUM(PRICE_AFTER_DISCOUNT) as total_revenue
 FROM CUSTOMER_LINEITEM_PROFILE
-GROUP BY O_ORDERSTATUS;
\ No newline at end of file
+GROUP BY O_ORDERSTATUS;
+
+-- 11. Executive Summary KPIs (fast mode, approximate distinct counts)
+-- HyperLogLog estimates, typically within ~2% of query 1, for exploratory pages
+SELECT 
+    APPROX_COUNT_DISTINCT(O_CUSTKEY) as total_customers,
+    APPROX_COUNT_DISTINCT(O_ORDERKEY) as total_orders,
+    SUM(PRICE_AFTER_DISCOUNT) as total_revenue,
+    AVG(PRICE_AFTER_DISCOUNT) as avg_order_value,
+    SUM(L_QUANTITY) as total_quantity_sold
+FROM CUSTOMER_LINEITEM_PROFILE;
+
+-- 12. Monthly Revenue Trend (fast mode, approximate distinct counts)
+SELECT 
+    DATE_TRUNC('MONTH', O_ORDERDATE) as order_month,
+    APPROX_COUNT_DISTINCT(O_ORDERKEY) as monthly_orders,
+    SUM(PRICE_AFTER_DISCOUNT) as monthly_revenue,
+    APPROX_COUNT_DISTINCT(O_CUSTKEY) as monthly_customers
+FROM CUSTOMER_LINEITEM_PROFILE
+GROUP BY DATE_TRUNC('MONTH', O_ORDERDATE)
+ORDER BY order_month;
+
+-- 13. Regional Customer Reach (fast mode, merged HLL sketches from 13_approx_distinct.sql)
+SELECT 
+    YEAR(ORDER_MONTH) as order_year,
+    REGION as region,
+    HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH)) as active_customers,
+    SUM(ORDER_COUNT) as orders,
+    SUM(TOTAL_REVENUE) as revenue
+FROM ORDER_DISTINCT_SKETCHES
+GROUP BY YEAR(ORDER_MONTH), REGION
+ORDER BY order_year, region;
+
+-- ============================================================================
+-- Executive tiles from the KPI cube (14_profile_kpi_cube.sql)
+-- Each tile is a lookup against CUSTOMER_PROFILE_KPI_CUBE instead of a scan of
+-- CUSTOMER_LINEITEM_PROFILE. GROUPING_ID flags the rolled-up dimensions:
+-- 8 = month, 4 = region, 2 = segment, 1 = order status.
+-- ============================================================================
+
+-- 14. Tile: Executive Summary KPIs (same figures as query 1)
+SELECT 
+    CUSTOMER_COUNT as total_customers,
+    ORDER_COUNT as total_orders,
+    TOTAL_REVENUE as total_revenue,
+    TOTAL_REVENUE / LINE_COUNT as avg_order_value,
+    TOTAL_QUANTITY as total_quantity_sold
+FROM CUSTOMER_PROFILE_KPI_CUBE
+WHERE GROUPING_ID = 15;
+
+-- 15. Tile: Monthly Revenue Trend (same figures as query 2)
+SELECT 
+    ORDER_MONTH as order_month,
+    ORDER_COUNT as monthly_orders,
+    TOTAL_REVENUE as monthly_revenue,
+    CUSTOMER_COUNT as monthly_customers
+FROM CUSTOMER_PROFILE_KPI_CUBE
+WHERE GROUPING_ID = 7
+ORDER BY order_month;
+
+-- 16. Tile: Order Status Performance (same figures as query 3)
+SELECT 
+    O_ORDERSTATUS as order_status,
+    CUSTOMER_COUNT as customers,
+    ORDER_COUNT as orders,
+    TOTAL_REVENUE as revenue,
+    PRICE_PER_QTY_SUM / LINE_COUNT as avg_price_per_qty,
+    TOTAL_QUANTITY as total_quantity
+FROM CUSTOMER_PROFILE_KPI_CUBE
+WHERE GROUPING_ID = 14
+ORDER BY revenue DESC;
+
+-- 17. Tile: Yearly Performance Comparison (query 5; customers merged from monthly sketches)
+SELECT 
+    YEAR(ORDER_MONTH) as order_year,
+    HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH)) as annual_customers,
+    SUM(ORDER_COUNT) as annual_orders,
+    SUM(TOTAL_REVENUE) as annual_revenue,
+    SUM(TOTAL_QUANTITY) as annual_quantity
+FROM CUSTOMER_PROFILE_KPI_CUBE
+WHERE GROUPING_ID = 7
+GROUP BY YEAR(ORDER_MONTH)
+ORDER BY order_year;
+
+-- 18. Tile: Revenue by Region
+SELECT REGION as region, CUSTOMER_COUNT as customers, ORDER_COUNT as orders, TOTAL_REVENUE as revenue
+FROM CUSTOMER_PROFILE_KPI_CUBE
+WHERE GROUPING_ID = 11
+ORDER BY revenue DESC;
+
+-- 19. Tile: Revenue by Market Segment
+SELECT MARKET_SEGMENT as market_segment, CUSTOMER_COUNT as customers, ORDER_COUNT as orders, TOTAL_REVENUE as revenue
+FROM CUSTOMER_PROFILE_KPI_CUBE
+WHERE GROUPING_ID = 13
+ORDER BY revenue DESC;
+
+-- 20. Tile: Region x Segment Matrix
+SELECT REGION as region, MARKET_SEGMENT as market_segment, TOTAL_REVENUE as revenue, CUSTOMER_COUNT as customers
+FROM CUSTOMER_PROFILE_KPI_CUBE
+WHERE GROUPING_ID = 9
+ORDER BY region, market_segment;
+
+-- 21. Tile: Monthly Revenue by Region
+SELECT ORDER_MONTH as order_month, REGION as region, TOTAL_REVENUE as revenue, ORDER_COUNT as orders
+FROM CUSTOMER_PROFILE_KPI_CUBE
+WHERE GROUPING_ID = 3
+ORDER BY order_month, region;
+
+-- 22. Tile: Order Status by Year (orders add up; customers merged from monthly sketches)
+SELECT 
+    YEAR(ORDER_MONTH) as order_year,
+    O_ORDERSTATUS as order_status,
+    SUM(ORDER_COUNT) as orders,
+    HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH)) as customers,
+    SUM(TOTAL_REVENUE) as revenue
+FROM CUSTOMER_PROFILE_KPI_CUBE
+WHERE GROUPING_ID = 6
+GROUP BY YEAR(ORDER_MONTH), O_ORDERSTATUS
+ORDER BY order_year, order_status;
+
+-- 23. Tile: Segment Revenue per Customer
+SELECT 
+    MARKET_SEGMENT as market_segment,
+    TOTAL_REVENUE / CUSTOMER_COUNT as revenue_per_customer,
+    ORDER_COUNT / CUSTOMER_COUNT as orders_per_customer
+FROM CUSTOMER_PROFILE_KPI_CUBE
+WHERE GROUPING_ID = 13
+ORDER BY revenue_per_customer DESC;
\ No newline at end of file
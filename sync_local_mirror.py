@@ -0,0 +1,360 @@
+#!/usr/bin/env python3
+"""
+Local Columnar Mirror
+Keeps a local Parquet + DuckDB copy of CUSTOMER_LINEITEM_PROFILE and the KPI
+views from 03_aggregations.sql, so analysts and offline test suites can run
+the BI query catalogs without a warehouse.
+
+Syncs are incremental: the PIPELINE_FRESHNESS run ID tells whether anything
+was published since the last sync, and only order months at or after the
+synced O_ORDERDATE watermark (minus a lookback for late slices) are pulled
+again. The profile has no row key, so each pulled month replaces its local
+partition as a whole, which also makes re-running a sync harmless. Pulled
+data lands in an incoming directory first and the state file records it
+before partitions are swapped in, so an interrupted sync resumes where it
+stopped. Closed months are compacted into one Parquet file per year.
+
+Usage:
+    python sync_local_mirror.py                 # incremental sync
+    python sync_local_mirror.py --full          # rebuild the mirror
+    python sync_local_mirror.py --catalog       # run the BI query catalogs locally
+    python sync_local_mirror.py --query "SELECT COUNT(*) FROM CUSTOMER_LINEITEM_PROFILE"
+"""
+
+import argparse
+import datetime as dt
+import glob
+import json
+import os
+import shutil
+import time
+import uuid
+
+import duckdb
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from export_parquet import PartitionedWriter, widen_integers
+
+MIRROR_DIR = os.getenv('SNOW_LOCAL_MIRROR_DIR', 'local_mirror')
+PROFILE_TABLE = "CUSTOMER_LINEITEM_PROFILE"
+MONTH_COLUMN = "ORDER_MONTH"
+LOOKBACK_MONTHS = 1
+# Months this far behind the watermark are no longer re-pulled and get compacted
+COMPACT_AFTER_MONTHS = 3
+
+MIRRORED_VIEWS = [
+    "V_MONTHLY_REVENUE_BY_REGION",
+    "V_TOP_CUSTOMERS",
+    "V_PRODUCT_PERFORMANCE",
+    "V_SUPPLIER_PERFORMANCE",
+    "V_ORDER_STATUS_SUMMARY",
+    "V_MARKET_SEGMENT_ANALYSIS",
+    "V_SHIPPING_MODE_ANALYSIS",
+    "V_TOP_CUSTOMERS_TOP_100",
+    "V_PRODUCT_PERFORMANCE_TOP_100",
+    "V_SUPPLIER_PERFORMANCE_TOP_100",
+]
+
+
+def month_start(day, months_back=0):
+    """First day of the month `months_back` months before `day`."""
+    index = day.year * 12 + day.month - 1 - months_back
+    return dt.date(index // 12, index % 12 + 1, 1)
+
+
+class LocalMirror:
+    """Layout, state and DuckDB catalog of the local mirror."""
+
+    def __init__(self, root=MIRROR_DIR):
+        self.root = root
+        self.profile_dir = os.path.join(root, PROFILE_TABLE.lower())
+        self.months_dir = os.path.join(self.profile_dir, "months")
+        self.years_dir = os.path.join(self.profile_dir, "years")
+        self.incoming_dir = os.path.join(root, "_incoming")
+        self.views_dir = os.path.join(root, "views")
+        self.state_path = os.path.join(root, "state.json")
+        self.database_path = os.path.join(root, "mirror.duckdb")
+        os.makedirs(root, exist_ok=True)
+
+    def load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def save_state(self, state):
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.state_path)
+
+    def local_months(self):
+        return sorted(name.split("=", 1)[1] for name in os.listdir(self.months_dir)) if os.path.isdir(self.months_dir) else []
+
+    def reset(self):
+        for path in (self.profile_dir, self.incoming_dir, self.views_dir):
+            shutil.rmtree(path, ignore_errors=True)
+        for path in (self.state_path, self.database_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def connect(self, read_only=False):
+        return duckdb.connect(self.database_path, read_only=read_only)
+
+    def register_views(self):
+        """Point DuckDB views named like the Snowflake objects at the Parquet files."""
+        con = self.connect()
+        try:
+            files = glob.glob(os.path.join(self.profile_dir, "**", "*.parquet"), recursive=True)
+            if files:
+                pattern = os.path.join(self.profile_dir, "**", "*.parquet")
+                con.execute(f"""
+                    CREATE OR REPLACE VIEW {PROFILE_TABLE} AS
+                    SELECT * FROM read_parquet('{pattern}', hive_partitioning = false, union_by_name = true)
+                """)
+            for view in MIRRORED_VIEWS:
+                path = os.path.join(self.views_dir, f"{view}.parquet")
+                if os.path.exists(path):
+                    con.execute(f"CREATE OR REPLACE VIEW {view} AS SELECT * FROM read_parquet('{path}')")
+        finally:
+            con.close()
+
+
+def remote_run_id(cursor):
+    """Last published run ID, or None when PIPELINE_FRESHNESS is not deployed."""
+    try:
+        cursor.execute("SELECT RUN_ID FROM PIPELINE_FRESHNESS WHERE PIPELINE = 'CUSTOMER_PROFILE'")
+        row = cursor.fetchone()
+        return row[0] if row else None
+    except Exception:
+        return None
+
+
+def pull_profile(cursor, mirror, since):
+    """Stream profile rows from `since` into a fresh incoming directory.
+
+    Returns (batch directory, months written, max O_ORDERDATE, rows).
+    """
+    batch_dir = os.path.join(mirror.incoming_dir, uuid.uuid4().hex)
+    where = f"WHERE O_ORDERDATE >= '{since}'" if since else ""
+    cursor.execute(f"""
+        SELECT *, TO_CHAR(O_ORDERDATE, 'YYYY-MM') as {MONTH_COLUMN}
+        FROM {PROFILE_TABLE} {where}
+    """)
+
+    writer = PartitionedWriter(batch_dir, MONTH_COLUMN)
+    rows = 0
+    watermark = None
+    try:
+        for batch in cursor.fetch_arrow_batches():
+            writer.write(batch)
+            rows += batch.num_rows
+            latest = pc.max(batch.column("O_ORDERDATE")).as_py()
+            if latest is not None and (watermark is None or latest > watermark):
+                watermark = latest
+            print(f"\r📥 {rows:,} rows pulled", end="", flush=True)
+    finally:
+        writer.close()
+    print()
+    return batch_dir, sorted(writer.rows), watermark, rows
+
+
+def promote(mirror, pending):
+    """Swap pulled months into the mirror; safe to repeat after an interruption."""
+    os.makedirs(mirror.months_dir, exist_ok=True)
+    since = pending['since']
+    for month in mirror.local_months():
+        # Months in the pulled range that came back empty were removed upstream
+        if (since is None or month >= since[:7]) and month not in pending['months']:
+            shutil.rmtree(os.path.join(mirror.months_dir, f"{MONTH_COLUMN}={month}"))
+
+    for month in pending['months']:
+        source = os.path.join(pending['batch_dir'], f"{MONTH_COLUMN}={month}")
+        target = os.path.join(mirror.months_dir, f"{MONTH_COLUMN}={month}")
+        if not os.path.isdir(source):
+            continue  # already promoted before the interruption
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(source, target)
+
+    shutil.rmtree(pending['batch_dir'], ignore_errors=True)
+
+
+def compact(mirror, watermark, lookback_months=LOOKBACK_MONTHS):
+    """Merge month partitions that will not be pulled again into per-year files."""
+    if watermark is None:
+        return 0
+    months_back = max(COMPACT_AFTER_MONTHS, lookback_months + 1)
+    cutoff = month_start(dt.date.fromisoformat(watermark), months_back).isoformat()[:7]
+    by_year = {}
+    for month in mirror.local_months():
+        if month < cutoff:
+            by_year.setdefault(month[:4], []).append(month)
+
+    os.makedirs(mirror.years_dir, exist_ok=True)
+    con = duckdb.connect()
+    try:
+        for year, months in sorted(by_year.items()):
+            year_path = os.path.join(mirror.years_dir, f"ORDER_YEAR={year}.parquet")
+            sources = [os.path.join(mirror.months_dir, f"{MONTH_COLUMN}={month}", "*.parquet") for month in months]
+            if os.path.exists(year_path):
+                sources.append(year_path)
+            tmp_path = f"{year_path}.tmp"
+            # DuckDB streams the merge, so memory stays flat for large years
+            con.execute(f"""
+                COPY (SELECT * FROM read_parquet({sources!r}, union_by_name = true) ORDER BY O_ORDERDATE)
+                TO '{tmp_path}' (FORMAT PARQUET, COMPRESSION ZSTD)
+            """)
+            os.replace(tmp_path, year_path)
+            for month in months:
+                shutil.rmtree(os.path.join(mirror.months_dir, f"{MONTH_COLUMN}={month}"))
+    finally:
+        con.close()
+    return sum(len(months) for months in by_year.values())
+
+
+def sync_views(cursor, mirror):
+    """Refresh the small KPI views in full."""
+    os.makedirs(mirror.views_dir, exist_ok=True)
+    for view in MIRRORED_VIEWS:
+        try:
+            cursor.execute(f"SELECT * FROM {view}")
+            table = widen_integers(cursor.fetch_arrow_all())
+        except Exception as e:
+            print(f"   ⚠️  {view}: {e}")
+            continue
+        path = os.path.join(mirror.views_dir, f"{view}.parquet")
+        pq.write_table(table, f"{path}.tmp")
+        os.replace(f"{path}.tmp", path)
+        print(f"   ✅ {view}: {table.num_rows:,} rows")
+
+
+def sync(conn, mirror, full=False, lookback_months=LOOKBACK_MONTHS):
+    """Bring the mirror up to date with the last publish."""
+    if full:
+        mirror.reset()
+        os.makedirs(mirror.root, exist_ok=True)
+    state = mirror.load_state()
+
+    # Finish an interrupted sync before looking for new data
+    pending = state.get('pending')
+    if pending and os.path.isdir(pending['batch_dir']):
+        print("🔁 Resuming interrupted sync")
+        promote(mirror, pending)
+        state.update(run_id=pending['run_id'], watermark=pending['watermark'], synced_at=pending['started_at'])
+    state.pop('pending', None)
+    # Anything else left in incoming is a pull that never finished
+    shutil.rmtree(mirror.incoming_dir, ignore_errors=True)
+    mirror.save_state(state)
+
+    cursor = conn.cursor()
+    run_id = remote_run_id(cursor)
+    if run_id is not None and run_id == state.get('run_id'):
+        print(f"✅ Mirror already at run {run_id}")
+        cursor.close()
+        return state
+
+    watermark = state.get('watermark')
+    since = month_start(dt.date.fromisoformat(watermark), lookback_months).isoformat() if watermark else None
+    print(f"📥 Pulling {PROFILE_TABLE} from {since or 'the beginning'}")
+    start_time = time.time()
+    batch_dir, months, latest, rows = pull_profile(cursor, mirror, since)
+
+    state['pending'] = {
+        'batch_dir': batch_dir,
+        'since': since,
+        'months': months,
+        'run_id': run_id,
+        'watermark': latest.isoformat() if latest else watermark,
+        'started_at': dt.datetime.now(dt.timezone.utc).isoformat(),
+    }
+    mirror.save_state(state)
+    promote(mirror, state['pending'])
+    pending = state.pop('pending')
+    state.update(run_id=pending['run_id'], watermark=pending['watermark'], synced_at=pending['started_at'])
+    mirror.save_state(state)
+    print(f"✅ {rows:,} rows in {len(months)} months ({time.time() - start_time:.1f}s), watermark {state['watermark']}")
+
+    print("📊 Refreshing KPI views")
+    sync_views(cursor, mirror)
+    cursor.close()
+
+    compacted = compact(mirror, state['watermark'], lookback_months)
+    if compacted:
+        print(f"🗜️  Compacted {compacted} closed months into yearly files")
+    return state
+
+
+def run_catalog(mirror):
+    """Run every BI catalog query against the mirror and time it."""
+    from bi_query_catalog import CATALOGS, load_sql_catalog
+
+    catalogs = dict(CATALOGS, powerbi_samples=load_sql_catalog())
+    con = mirror.connect(read_only=True)
+    results = []
+    try:
+        for catalog, queries in catalogs.items():
+            print(f"\n📚 {catalog}")
+            for name, sql in queries.items():
+                start_time = time.time()
+                try:
+                    rows = con.execute(sql).fetchall()
+                    elapsed = time.time() - start_time
+                    print(f"   ✅ {name}: {len(rows):,} rows ({elapsed:.3f}s)")
+                    results.append({'catalog': catalog, 'query': name, 'status': 'success', 'query_time': elapsed})
+                except duckdb.Error as e:
+                    # Objects that are not mirrored (sketch tables, detail views) fail here
+                    print(f"   ⏭️  {name}: {str(e).splitlines()[0]}")
+                    results.append({'catalog': catalog, 'query': name, 'status': 'skipped', 'error': str(e)})
+    finally:
+        con.close()
+    ran = [r for r in results if r['status'] == 'success']
+    print(f"\n⚡ {len(ran)}/{len(results)} queries ran locally, "
+          f"slowest {max((r['query_time'] for r in ran), default=0):.3f}s")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync and query a local Parquet/DuckDB mirror of the dashboard tables")
+    parser.add_argument("--full", action="store_true", help="Discard the mirror and pull everything again")
+    parser.add_argument("--lookback-months", type=int, default=LOOKBACK_MONTHS,
+                        help=f"Months before the watermark to pull again (default: {LOOKBACK_MONTHS})")
+    parser.add_argument("--catalog", action="store_true", help="Run the BI query catalogs against the mirror (no sync)")
+    parser.add_argument("--query", help="Run one SQL statement against the mirror (no sync)")
+    parser.add_argument("--dir", default=MIRROR_DIR, help=f"Mirror directory (default: {MIRROR_DIR})")
+    args = parser.parse_args()
+
+    mirror = LocalMirror(args.dir)
+    if args.query:
+        con = mirror.connect(read_only=True)
+        try:
+            result = con.execute(args.query)
+            print([column[0] for column in result.description])
+            for row in result.fetchall():
+                print(row)
+        finally:
+            con.close()
+        return True
+    if args.catalog:
+        return all(r['status'] != 'failed' for r in run_catalog(mirror))
+
+    from connection_strings import get_snowflake_connection
+
+    print("🪞 Local Mirror Sync")
+    print("=" * 60)
+    conn = get_snowflake_connection()
+    try:
+        sync(conn, mirror, full=args.full, lookback_months=args.lookback_months)
+    except Exception as e:
+        print(f"❌ Sync failed: {e}")
+        return False
+    finally:
+        conn.close()
+    mirror.register_views()
+    print(f"\n💾 Mirror ready at {mirror.database_path}")
+    return True
+
+
+if __name__ == "__main__":
+    main()
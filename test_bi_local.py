@@ -11,6 +11,10 @@ import json
 import time
 from datetime import datetime
 
+from bi_query_catalog import LOOKER_QUERIES, POWERBI_QUERIES, TABLEAU_QUERIES
+from connection_strings import build_query_tag, workload_warehouse
+from result_stream import stream_query
+
 class BIConnectionTester:
     def __init__(self):
         self.connection = None
@@ -29,9 +33,10 @@ class BIConnectionTester:
                 user='ALGORYTHMOS',
                 password=password,
                 role='DASHBOARD_ANALYST_ROLE',
-                warehouse='COMPUTE_WH',
+                warehouse=workload_warehouse('validation'),
                 database='TPCH_DASHBOARDS',
-                schema='PUBLIC'
+                schema='PUBLIC',
+                session_parameters={'QUERY_TAG': build_query_tag('python', suite='test_bi_local')}
             )
             self.cursor = self.connection.cursor()
             print("✅ Connected successfully!")
@@ -40,6 +45,11 @@ class BIConnectionTester:
             print(f"❌ Connection failed: {e}")
             return False
     
+    def tag_session(self, tool, dashboard=None):
+        """Attribute the next queries to a BI tool's dashboard, as run by this suite."""
+        tag = build_query_tag(tool, dashboard=dashboard, suite='test_bi_local')
+        self.cursor.execute("ALTER SESSION SET QUERY_TAG = %s", (tag,))
+    
     def test_data_availability(self):
         """Test all data sources are available."""
         print("\n📊 Testing Data Availability...")
@@ -92,55 +102,19 @@ class BIConnectionTester:
         print("\n🎨 Testing Tableau Queries...")
         print("-" * 50)
         
-        queries = {
-            "Monthly Revenue Trend": """
-                SELECT 
-                    DATE_TRUNC('MONTH', O_ORDERDATE) as month,
-                    SUM(PRICE_AFTER_DISCOUNT) as revenue,
-                    COUNT(DISTINCT O_CUSTKEY) as customers
-                FROM CUSTOMER_LINEITEM_PROFILE
-                GROUP BY month
-                ORDER BY month DESC
-                LIMIT 12
-            """,
-            "Top Customers": """
-                SELECT 
-                    O_CUSTKEY as customer_id,
-                    COUNT(DISTINCT O_ORDERKEY) as orders,
-                    SUM(PRICE_AFTER_DISCOUNT) as revenue
-                FROM CUSTOMER_LINEITEM_PROFILE
-                GROUP BY customer_id
-                ORDER BY revenue DESC
-                LIMIT 10
-            """,
-            "Order Status Summary": """
-                SELECT 
-                    O_ORDERSTATUS,
-                    COUNT(DISTINCT O_CUSTKEY) as customers,
-                    COUNT(DISTINCT O_ORDERKEY) as orders,
-                    SUM(PRICE_AFTER_DISCOUNT) as revenue
-                FROM CUSTOMER_LINEITEM_PROFILE
-                GROUP BY O_ORDERSTATUS
-            """
-        }
+        queries = TABLEAU_QUERIES
         
         tableau_results = {}
         
         for query_name, query in queries.items():
             try:
-                start_time = time.time()
-                self.cursor.execute(query)
-                results = self.cursor.fetchall()
-                query_time = time.time() - start_time
-                
-                tableau_results[query_name] = {
-                    'rows_returned': len(results),
-                    'query_time': query_time,
-                    'status': 'success',
-                    'sample_data': results[:3] if results else []
-                }
+                self.tag_session('tableau', query_name)
+                result = stream_query(self.cursor, query, sample_size=3)
+                result['status'] = 'success'
+                tableau_results[query_name] = result
                 
-                print(f"✅ {query_name}: {len(results)} rows ({query_time:.2f}s)")
+                print(f"✅ {query_name}: {result['rows_returned']} rows ({result['query_time']:.2f}s, "
+                      f"peak RSS {result['peak_rss_mb']:.0f} MB)")
                 
             except Exception as e:
                 tableau_results[query_name] = {
@@ -159,62 +133,19 @@ class BIConnectionTester:
         print("\n📊 Testing Power BI Queries...")
         print("-" * 50)
         
-        queries = {
-            "Executive KPIs": """
-                SELECT 
-                    COUNT(DISTINCT O_CUSTKEY) as total_customers,
-                    COUNT(DISTINCT O_ORDERKEY) as total_orders,
-                    SUM(PRICE_AFTER_DISCOUNT) as total_revenue,
-                    AVG(PRICE_AFTER_DISCOUNT) as avg_order_value
-                FROM CUSTOMER_LINEITEM_PROFILE
-            """,
-            "Yearly Performance": """
-                SELECT 
-                    YEAR(O_ORDERDATE) as order_year,
-                    COUNT(DISTINCT O_CUSTKEY) as customers,
-                    SUM(PRICE_AFTER_DISCOUNT) as revenue
-                FROM CUSTOMER_LINEITEM_PROFILE
-                GROUP BY order_year
-                ORDER BY order_year
-            """,
-            "Customer Segments": """
-                SELECT 
-                    CASE 
-                        WHEN order_count >= 10 THEN 'High Frequency'
-                        WHEN order_count >= 5 THEN 'Medium Frequency'
-                        ELSE 'Low Frequency'
-                    END as customer_segment,
-                    COUNT(*) as customer_count,
-                    SUM(total_revenue) as segment_revenue
-                FROM (
-                    SELECT 
-                        O_CUSTKEY,
-                        COUNT(DISTINCT O_ORDERKEY) as order_count,
-                        SUM(PRICE_AFTER_DISCOUNT) as total_revenue
-                    FROM CUSTOMER_LINEITEM_PROFILE
-                    GROUP BY O_CUSTKEY
-                ) customer_summary
-                GROUP BY customer_segment
-            """
-        }
+        queries = POWERBI_QUERIES
         
         powerbi_results = {}
         
         for query_name, query in queries.items():
             try:
-                start_time = time.time()
-                self.cursor.execute(query)
-                results = self.cursor.fetchall()
-                query_time = time.time() - start_time
-                
-                powerbi_results[query_name] = {
-                    'rows_returned': len(results),
-                    'query_time': query_time,
-                    'status': 'success',
-                    'sample_data': results[:3] if results else []
-                }
+                self.tag_session('powerbi', query_name)
+                result = stream_query(self.cursor, query, sample_size=3)
+                result['status'] = 'success'
+                powerbi_results[query_name] = result
                 
-                print(f"✅ {query_name}: {len(results)} rows ({query_time:.2f}s)")
+                print(f"✅ {query_name}: {result['rows_returned']} rows ({result['query_time']:.2f}s, "
+                      f"peak RSS {result['peak_rss_mb']:.0f} MB)")
                 
             except Exception as e:
                 powerbi_results[query_name] = {
@@ -233,60 +164,19 @@ class BIConnectionTester:
         print("\n🔍 Testing Looker Queries...")
         print("-" * 50)
         
-        queries = {
-            "Customer Analysis": """
-                SELECT 
-                    O_CUSTKEY as customer_key,
-                    COUNT(DISTINCT O_ORDERKEY) as orders,
-                    SUM(PRICE_AFTER_DISCOUNT) as revenue,
-                    AVG(PRICE_PER_QTY) as avg_price_per_qty,
-                    MIN(O_ORDERDATE) as first_order,
-                    MAX(O_ORDERDATE) as last_order
-                FROM CUSTOMER_LINEITEM_PROFILE
-                GROUP BY customer_key
-                ORDER BY revenue DESC
-                LIMIT 5
-            """,
-            "Monthly Metrics": """
-                SELECT 
-                    DATE_TRUNC('MONTH', O_ORDERDATE) as month,
-                    O_ORDERSTATUS as order_status,
-                    COUNT(DISTINCT O_CUSTKEY) as customers,
-                    SUM(PRICE_AFTER_DISCOUNT) as revenue
-                FROM CUSTOMER_LINEITEM_PROFILE
-                GROUP BY month, order_status
-                ORDER BY month DESC, revenue DESC
-                LIMIT 10
-            """,
-            "Performance Summary": """
-                SELECT 
-                    'Performance Metrics' as metric_type,
-                    COUNT(*) as total_line_items,
-                    COUNT(DISTINCT O_ORDERKEY) as unique_orders,
-                    COUNT(DISTINCT O_CUSTKEY) as unique_customers,
-                    MIN(O_ORDERDATE) as earliest_date,
-                    MAX(O_ORDERDATE) as latest_date
-                FROM CUSTOMER_LINEITEM_PROFILE
-            """
-        }
+        queries = LOOKER_QUERIES
         
         looker_results = {}
         
         for query_name, query in queries.items():
             try:
-                start_time = time.time()
-                self.cursor.execute(query)
-                results = self.cursor.fetchall()
-                query_time = time.time() - start_time
+                self.tag_session('looker', query_name)
+                result = stream_query(self.cursor, query, sample_size=2)
+                result['status'] = 'success'
+                looker_results[query_name] = result
                 
-                looker_results[query_name] = {
-                    'rows_returned': len(results),
-                    'query_time': query_time,
-                    'status': 'success',
-                    'sample_data': results[:2] if results else []
-                }
-                
-                print(f"✅ {query_name}: {len(results)} rows ({query_time:.2f}s)")
+                print(f"✅ {query_name}: {result['rows_returned']} rows ({result['query_time']:.2f}s, "
+                      f"peak RSS {result['peak_rss_mb']:.0f} MB)")
                 
             except Exception as e:
                 looker_results[query_name] = {
@@ -384,27 +274,27 @@ class BIConnectionTester:
         }
         
         perf_results = {}
+        self.tag_session('python')
         
         for benchmark_name, query in benchmarks.items():
             try:
                 # Warm up query
-                self.cursor.execute(query)
-                self.cursor.fetchall()
+                stream_query(self.cursor, query, sample_size=0)
                 
                 # Actual benchmark
-                start_time = time.time()
-                self.cursor.execute(query)
-                results = self.cursor.fetchall()
-                query_time = time.time() - start_time
+                result = stream_query(self.cursor, query, sample_size=0)
+                query_time = result['query_time']
                 
                 perf_results[benchmark_name] = {
                     'query_time': query_time,
-                    'rows_returned': len(results),
+                    'rows_returned': result['rows_returned'],
+                    'peak_rss_mb': result['peak_rss_mb'],
                     'status': 'success'
                 }
                 
                 performance_rating = "🚀" if query_time < 1.0 else "⚡" if query_time < 3.0 else "🐌"
-                print(f"{performance_rating} {benchmark_name}: {query_time:.2f}s ({len(results)} rows)")
+                print(f"{performance_rating} {benchmark_name}: {query_time:.2f}s ({result['rows_returned']} rows, "
+                      f"peak RSS {result['peak_rss_mb']:.0f} MB)")
                 
             except Exception as e:
                 perf_results[benchmark_name] = {
@@ -476,6 +366,12 @@ class BIConnectionTester:
                           if r['status'] == 'success') / len(self.test_results['performance'])
             print(f"⚡ Average Query Time: {avg_time:.2f} seconds")
         
+        # Memory summary (rows are streamed, so this stays flat as results grow)
+        peaks = [r['peak_rss_mb'] for key in ('tableau_queries', 'powerbi_queries', 'looker_queries', 'performance')
+                 for r in self.test_results.get(key, {}).values() if 'peak_rss_mb' in r]
+        if peaks:
+            print(f"🧠 Peak RSS: {max(peaks):.0f} MB")
+        
         print("\n🚀 Your enterprise Snowflake BI platform is ready!")
         print("Connect your BI tools and start building amazing dashboards! ✨")
     
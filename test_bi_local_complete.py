@@ -12,6 +12,9 @@ import time
 from datetime import datetime
 import sys
 
+from connection_strings import build_query_tag, workload_warehouse
+from result_stream import stream_query
+
 class BITestSuite:
     def __init__(self):
         self.connection = None
@@ -32,9 +35,10 @@ class BITestSuite:
                 user='ALGORYTHMOS',
                 password=password,
                 role='DASHBOARD_ANALYST_ROLE',
-                warehouse='COMPUTE_WH',
+                warehouse=workload_warehouse('validation'),
                 database='TPCH_DASHBOARDS',
-                schema='PUBLIC'
+                schema='PUBLIC',
+                session_parameters={'QUERY_TAG': build_query_tag('python', suite='test_bi_local_complete')}
             )
             self.cursor = self.connection.cursor()
             self.test_results['connection'] = True
@@ -154,19 +158,20 @@ class BITestSuite:
         
         for test in performance_tests:
             try:
-                start_time = time.time()
-                self.cursor.execute(test['query'])
-                results = self.cursor.fetchall()
-                query_time = time.time() - start_time
+                result = stream_query(self.cursor, test['query'])
+                query_time = result['query_time']
                 
                 self.test_results['performance'][test['name']] = {
                     'query_time': query_time,
-                    'rows_returned': len(results),
+                    'rows_returned': result['rows_returned'],
+                    'sample_data': result['sample_data'],
+                    'peak_rss_mb': result['peak_rss_mb'],
                     'status': 'success'
                 }
                 
                 status = "✅" if query_time < 5.0 else "⚠️"
-                print(f"   {status} {test['name']}: {query_time:.3f}s ({len(results)} rows)")
+                print(f"   {status} {test['name']}: {query_time:.3f}s ({result['rows_returned']} rows, "
+                      f"peak RSS {result['peak_rss_mb']:.0f} MB)")
                 
             except Exception as e:
                 self.test_results['performance'][test['name']] = {
@@ -279,18 +284,16 @@ class BITestSuite:
         
         for query_test in dashboard_queries:
             try:
-                start_time = time.time()
-                self.cursor.execute(query_test['query'])
-                results = self.cursor.fetchall()
-                query_time = time.time() - start_time
+                result = stream_query(self.cursor, query_test['query'], sample_size=1)
                 
-                print(f"   ✅ {query_test['name']}: {query_time:.3f}s ({len(results)} rows)")
+                print(f"   ✅ {query_test['name']}: {result['query_time']:.3f}s ({result['rows_returned']} rows, "
+                      f"peak RSS {result['peak_rss_mb']:.0f} MB)")
                 print(f"      Use case: {query_test['use_case']}")
                 
                 # Show sample result
-                if results and len(results) > 0:
+                if result['sample_data']:
                     if query_test['name'] == 'Executive KPIs':
-                        customers, orders, revenue, avg_order = results[0]
+                        customers, orders, revenue, avg_order = result['sample_data'][0]
                         print(f"      Sample: {customers:,} customers, {orders:,} orders, ${revenue:,.0f} revenue")
                 
             except Exception as e:
@@ -308,7 +311,7 @@ Tableau Connection:
 Server: JHYWOUK-WA83239.snowflakecomputing.com
 Database: TPCH_DASHBOARDS
 Schema: PUBLIC
-Warehouse: COMPUTE_WH
+Warehouse: ANALYTICS_WH
 Username: ALGORYTHMOS
 Role: DASHBOARD_ANALYST_ROLE
             """.strip(),
@@ -317,7 +320,7 @@ Role: DASHBOARD_ANALYST_ROLE
 Power BI Connection:
 Get Data → Snowflake
 Server: JHYWOUK-WA83239.snowflakecomputing.com
-Warehouse: COMPUTE_WH
+Warehouse: ANALYTICS_WH
 Database: TPCH_DASHBOARDS
 Authentication: Database (Username/Password)
 Username: ALGORYTHMOS
@@ -329,14 +332,14 @@ Dialect: Snowflake
 Host: JHYWOUK-WA83239.snowflakecomputing.com
 Database: TPCH_DASHBOARDS
 Schema: PUBLIC  
-Warehouse: COMPUTE_WH
+Warehouse: ANALYTICS_WH
 Username: ALGORYTHMOS
 Role: DASHBOARD_ANALYST_ROLE
             """.strip(),
             
             'jdbc': f"""
 JDBC Connection String:
-jdbc:snowflake://JHYWOUK-WA83239.snowflakecomputing.com/?warehouse=COMPUTE_WH&db=TPCH_DASHBOARDS&schema=PUBLIC&role=DASHBOARD_ANALYST_ROLE
+jdbc:snowflake://JHYWOUK-WA83239.snowflakecomputing.com/?warehouse=ANALYTICS_WH&db=TPCH_DASHBOARDS&schema=PUBLIC&role=DASHBOARD_ANALYST_ROLE
 Username: ALGORYTHMOS
             """.strip()
         }
@@ -416,6 +419,9 @@ Username: ALGORYTHMOS
         avg_time = sum(p.get('query_time', 0) for p in self.test_results['performance'].values()) / max(performance_tests, 1)
         
         print(f"⚡ Performance: {fast_queries}/{performance_tests} fast queries (avg: {avg_time:.3f}s)")
+        peaks = [p['peak_rss_mb'] for p in self.test_results['performance'].values() if 'peak_rss_mb' in p]
+        if peaks:
+            print(f"🧠 Peak RSS: {max(peaks):.0f} MB (results streamed in batches)")
         
         # Files summary
         total_files = len(self.test_results['files'])
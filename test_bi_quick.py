@@ -8,6 +8,8 @@ import snowflake.connector
 import getpass
 import json
 
+from connection_strings import workload_warehouse
+
 def test_individual_connections():
     """Test connections for each BI tool with their specific configurations."""
     
@@ -24,7 +26,7 @@ def test_individual_connections():
             user='ALGORYTHMOS',
             password=password,
             role='DASHBOARD_ANALYST_ROLE',
-            warehouse='COMPUTE_WH',
+            warehouse=workload_warehouse('validation'),
             database='TPCH_DASHBOARDS',
             schema='PUBLIC'
         )
@@ -60,7 +62,7 @@ def test_individual_connections():
             user='ALGORYTHMOS', 
             password=password,
             role='DASHBOARD_ANALYST_ROLE',
-            warehouse='COMPUTE_WH',
+            warehouse=workload_warehouse('validation'),
             database='TPCH_DASHBOARDS',
             schema='PUBLIC',
             client_session_keep_alive=True,  # Looker-style setting
@@ -103,7 +105,7 @@ def test_individual_connections():
             user='ALGORYTHMOS',
             password=password,
             role='DASHBOARD_ANALYST_ROLE', 
-            warehouse='COMPUTE_WH',
+            warehouse=workload_warehouse('validation'),
             database='TPCH_DASHBOARDS',
             schema='PUBLIC'
         )
@@ -180,7 +182,7 @@ def test_individual_connections():
             user='ALGORYTHMOS',
             password=password,
             role='DASHBOARD_ANALYST_ROLE',
-            warehouse='COMPUTE_WH',
+            warehouse=workload_warehouse('validation'),
             database='TPCH_DASHBOARDS', 
             schema='PUBLIC'
         )
@@ -9,6 +9,8 @@ import getpass
 import json
 from datetime import datetime
 
+from connection_strings import workload_warehouse
+
 def test_powerbi_connection():
     """Test Snowflake connection and generate Power BI sample queries."""
     
@@ -25,7 +27,7 @@ def test_powerbi_connection():
             user='ALGORYTHMOS',
             password=password,
             role='DASHBOARD_ANALYST_ROLE',
-            warehouse='COMPUTE_WH',
+            warehouse=workload_warehouse('validation'),
             database='TPCH_DASHBOARDS',
             schema='PUBLIC'
         )
@@ -161,7 +163,7 @@ def test_powerbi_connection():
             "server": "JHYWOUK-WA83239.snowflakecomputing.com",
             "database": "TPCH_DASHBOARDS",
             "schema": "PUBLIC",
-            "warehouse": "COMPUTE_WH",
+            "warehouse": "ANALYTICS_WH",
             "username": "ALGORYTHMOS",
             "role": "DASHBOARD_ANALYST_ROLE",
             "total_records": f"{total_rows:,}",
@@ -180,7 +182,7 @@ def test_powerbi_connection():
         print("1. Open Power BI Desktop")
         print("2. Get Data → More → Database → Snowflake")
         print("3. Enter server: JHYWOUK-WA83239.snowflakecomputing.com")
-        print("4. Enter warehouse: COMPUTE_WH")
+        print("4. Enter warehouse: ANALYTICS_WH")
         print("5. Authenticate with your credentials")
         print("6. Select TPCH_DASHBOARDS database")
         print("7. Choose tables/views for your dashboard")
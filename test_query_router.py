@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Query Router Tests
+Offline checks of query_router.route(); no Snowflake connection needed.
+
+Usage:
+    python -m pytest test_query_router.py
+"""
+
+from query_router import route
+
+PROFILE = "CUSTOMER_LINEITEM_PROFILE"
+ORDERS = "V_ORDER_DETAILS"
+
+
+def test_year_filter_does_not_sum_monthly_customer_counts():
+    decision = route(f"SELECT COUNT(DISTINCT O_CUSTKEY) FROM {PROFILE} WHERE YEAR(O_ORDERDATE) = 1995")
+    assert not decision['routed']
+    assert "would merge several rollup rows" in decision['reason']
+
+
+def test_year_truncation_filter_does_not_pin_month():
+    decision = route(f"SELECT COUNT(DISTINCT O_CUSTKEY) FROM {PROFILE} "
+                     f"WHERE DATE_TRUNC('YEAR', O_ORDERDATE) = '1995-01-01'")
+    assert not decision['routed']
+
+
+def test_year_filter_routes_to_hll_when_approximate_allowed():
+    decision = route(f"SELECT COUNT(DISTINCT O_CUSTKEY) FROM {PROFILE} WHERE YEAR(O_ORDERDATE) = 1995",
+                     allow_approx=True)
+    assert decision['routed'] and decision['approximate']
+    assert "HLL_ESTIMATE(HLL_COMBINE(CUSTOMER_SKETCH))" in decision['sql']
+    assert "SUM(CUSTOMER_COUNT)" not in decision['sql']
+
+
+def test_month_filter_pins_month_for_exact_customer_count():
+    decision = route(f"SELECT COUNT(DISTINCT O_CUSTKEY) FROM {PROFILE} "
+                     f"WHERE DATE_TRUNC('MONTH', O_ORDERDATE) = '1995-03-01'")
+    assert decision['routed'] and not decision['approximate']
+    assert "SUM(CUSTOMER_COUNT)" in decision['sql']
+    assert "ORDER_MONTH = '1995-03-01'" in decision['sql']
+
+
+def test_year_filter_keeps_additive_measures_exact():
+    decision = route(f"SELECT SUM(PRICE_AFTER_DISCOUNT) FROM {PROFILE} WHERE YEAR(O_ORDERDATE) = 1995")
+    assert decision['routed'] and not decision['approximate']
+    assert "SUM(TOTAL_REVENUE)" in decision['sql']
+
+
+def test_monthly_revenue_by_region_routes_to_dynamic_table():
+    decision = route(f"SELECT REGION, DATE_TRUNC('MONTH', O_ORDERDATE) as ORDER_MONTH, SUM(O_TOTALPRICE) "
+                     f"FROM {ORDERS} GROUP BY 1, 2")
+    assert decision['routed'] and decision['target'] == 'DT_MONTHLY_REVENUE_BY_REGION'
+    assert "SUM(TOTAL_REVENUE)" in decision['sql']
+    assert "GROUP BY REGION, ORDER_MONTH" in decision['sql']
+
+
+def test_monthly_revenue_by_region_rolls_months_into_years():
+    decision = route(f"SELECT REGION, YEAR(O_ORDERDATE) as ORDER_YEAR, COUNT(*) FROM {ORDERS} "
+                     f"WHERE O_ORDERDATE >= '1995-01-01' GROUP BY 1, 2")
+    assert decision['target'] == 'DT_MONTHLY_REVENUE_BY_REGION'
+    assert "SUM(ORDER_COUNT)" in decision['sql']
+    assert "ORDER_MONTH >= '1995-01-01'" in decision['sql']
+
+
+def test_monthly_revenue_by_region_customers_per_month_and_region_are_exact():
+    decision = route(f"SELECT REGION, DATE_TRUNC('MONTH', O_ORDERDATE), COUNT(DISTINCT O_CUSTKEY) "
+                     f"FROM {ORDERS} GROUP BY 1, 2")
+    assert decision['target'] == 'DT_MONTHLY_REVENUE_BY_REGION' and not decision['approximate']
+    assert "SUM(CUSTOMER_COUNT)" in decision['sql']
+
+
+def test_monthly_revenue_by_region_yearly_customers_are_not_summed():
+    decision = route(f"SELECT REGION, COUNT(DISTINCT O_CUSTKEY) FROM {ORDERS} "
+                     f"WHERE YEAR(O_ORDERDATE) = 1995 GROUP BY 1")
+    assert decision['target'] != 'DT_MONTHLY_REVENUE_BY_REGION' or decision['approximate']
+    assert "SUM(CUSTOMER_COUNT)" not in decision['sql']
+
+
+def test_unaligned_date_filter_is_not_routed_to_monthly_table():
+    decision = route(f"SELECT REGION, SUM(O_TOTALPRICE) FROM {ORDERS} "
+                     f"WHERE O_ORDERDATE >= '1995-03-15' GROUP BY 1")
+    assert decision['target'] != 'DT_MONTHLY_REVENUE_BY_REGION'
@@ -10,6 +10,8 @@ from dotenv import load_dotenv
 import os
 import sys
 
+from connection_strings import workload_warehouse
+
 def test_secure_connection():
     """Test Snowflake connection with secure password input."""
     load_dotenv()
@@ -17,7 +19,7 @@ def test_secure_connection():
     account = os.getenv('SNOW_ACCOUNT', 'JHYWOUK-WA83239')
     user = os.getenv('SNOW_USER', 'ALGORYTHMOS')
     role = os.getenv('SNOW_ROLE', 'ACCOUNTADMIN')
-    warehouse = os.getenv('SNOW_WAREHOUSE', 'COMPUTE_WH')
+    warehouse = workload_warehouse('validation')  # SNOW_VALIDATION_WAREHOUSE overrides
     
     print("🔐 Secure Snowflake Connection Test")
     print("=" * 50)
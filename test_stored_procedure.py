@@ -8,6 +8,8 @@ from dotenv import load_dotenv
 import os
 import getpass
 
+from connection_strings import workload_warehouse
+
 def test_stored_procedure():
     """Test the CREATE_CUSTOMER_PROFILE_SP stored procedure."""
     load_dotenv()
@@ -15,7 +17,7 @@ def test_stored_procedure():
     account = os.getenv('SNOW_ACCOUNT', 'JHYWOUK-WA83239')
     user = os.getenv('SNOW_USER', 'ALGORYTHMOS')
     role = os.getenv('SNOW_ROLE', 'ACCOUNTADMIN')
-    warehouse = os.getenv('SNOW_WAREHOUSE', 'COMPUTE_WH')
+    warehouse = workload_warehouse('pipeline')  # SNOW_PIPELINE_WAREHOUSE overrides
     database = os.getenv('SNOW_DATABASE', 'TPCH_DASHBOARDS')
     schema = os.getenv('SNOW_SCHEMA', 'PUBLIC')
     
@@ -9,6 +9,8 @@ import getpass
 import json
 from datetime import datetime
 
+from connection_strings import workload_warehouse
+
 def test_tableau_connection():
     """Test Snowflake connection for Tableau and validate data sources."""
     
@@ -25,7 +27,7 @@ def test_tableau_connection():
             user='ALGORYTHMOS',
             password=password,
             role='DASHBOARD_ANALYST_ROLE',
-            warehouse='COMPUTE_WH',
+            warehouse=workload_warehouse('validation'),
             database='TPCH_DASHBOARDS',
             schema='PUBLIC'
         )
@@ -147,7 +149,7 @@ def test_tableau_connection():
         print("Server: JHYWOUK-WA83239.snowflakecomputing.com")
         print("Database: TPCH_DASHBOARDS")
         print("Schema: PUBLIC")
-        print("Warehouse: COMPUTE_WH")
+        print("Warehouse: ANALYTICS_WH")
         print("Username: ALGORYTHMOS")
         print("Role: DASHBOARD_ANALYST_ROLE")
         print()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Dashboard Cache Warmer
+Seeds, runs and measures the post-publish cache warm-up of
+sql/16_cache_warmer.sql. CUSTOMER_PROFILE_WARMUP_TASK calls
+WARM_DASHBOARD_CACHE_SP after every KPI cube refresh; this script loads the
+BI test catalogs as fallback warm-up queries, runs a warm-up by hand with a
+custom budget, and compares first-hit latency after warmed and cold publishes.
+
+Usage:
+    python warm_dashboard_cache.py --seed
+    python warm_dashboard_cache.py --run --max-seconds 60 --max-credits 0.02
+    python warm_dashboard_cache.py --report
+"""
+
+import argparse
+
+from bi_query_catalog import CATALOGS, load_sql_catalog
+from connection_strings import get_snowflake_connection
+
+
+def catalog_queries():
+    """(source, name, sql) for every query of the BI test catalogs."""
+    queries = [(f"catalog:{tool}", name, sql.strip())
+               for tool, catalog in CATALOGS.items() for name, sql in catalog.items()]
+    queries += [("catalog:powerbi_samples", name, sql.strip()) for name, sql in load_sql_catalog().items()]
+    return queries
+
+
+def seed(cursor):
+    """Replace the catalog rows of DASHBOARD_WARMUP_QUERIES."""
+    queries = catalog_queries()
+    cursor.execute("DELETE FROM DASHBOARD_WARMUP_QUERIES WHERE SOURCE LIKE 'catalog:%'")
+    cursor.executemany(
+        "INSERT INTO DASHBOARD_WARMUP_QUERIES (SOURCE, NAME, QUERY_TEXT) VALUES (%s, %s, %s)",
+        queries,
+    )
+    print(f"✅ Seeded {len(queries)} catalog queries")
+
+
+def run_warmup(cursor, max_seconds, max_credits, max_queries):
+    cursor.execute("CALL WARM_DASHBOARD_CACHE_SP(%s, %s, %s)", (max_seconds, max_credits, max_queries))
+    print(cursor.fetchone()[0])
+
+
+def report(cursor):
+    """Print first-hit latency per publish and the warmed vs. cold medians."""
+    cursor.execute("""
+        SELECT PUBLISHED_AT, WARMED, WARMED_QUERIES, WARMUP_S, FIRST_HIT_S, FIRST_5_AVG_S
+        FROM V_FIRST_HIT_LATENCY
+        ORDER BY PUBLISHED_AT DESC
+        LIMIT 20
+    """)
+    print("📅 Recent publishes")
+    print("-" * 60)
+    for published_at, warmed, warmed_queries, warmup_s, first_hit_s, first_5_s in cursor.fetchall():
+        label = f"🔥 warmed {warmed_queries} in {warmup_s:.0f}s" if warmed else "🧊 cold"
+        first_hit = f"first hit {first_hit_s:.2f}s, first 5 avg {first_5_s:.2f}s" if first_hit_s is not None else "no dashboard queries"
+        print(f"   {published_at:%Y-%m-%d %H:%M}  {label:<24} {first_hit}")
+
+    cursor.execute("""
+        SELECT WARMED, COUNT(*), MEDIAN(FIRST_HIT_S), MEDIAN(FIRST_5_AVG_S)
+        FROM V_FIRST_HIT_LATENCY
+        WHERE FIRST_HIT_AT IS NOT NULL
+        GROUP BY WARMED
+    """)
+    medians = {warmed: (publishes, first_hit, first_5) for warmed, publishes, first_hit, first_5 in cursor.fetchall()}
+    print("\n📊 First-hit latency (last 30 days)")
+    print("-" * 60)
+    for warmed, label in ((True, "Warmed"), (False, "Cold")):
+        if warmed in medians:
+            publishes, first_hit, first_5 = medians[warmed]
+            print(f"   {label:<7} {publishes:>3} publishes  median first hit {first_hit:.2f}s, first 5 avg {first_5:.2f}s")
+        else:
+            print(f"   {label:<7}   0 publishes")
+    if True in medians and False in medians and medians[False][1]:
+        saved = 1 - medians[True][1] / medians[False][1]
+        print(f"\n💡 Warm-up cuts median first-hit latency by {saved:.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the BI warehouse cache after a profile publish")
+    parser.add_argument("--seed", action="store_true", help="Load the BI test catalogs as warm-up queries")
+    parser.add_argument("--run", action="store_true", help="Run a warm-up now")
+    parser.add_argument("--report", action="store_true", help="Compare first-hit latency after warmed and cold publishes (default)")
+    parser.add_argument("--max-seconds", type=int, default=120, help="Warm-up time budget (default: 120)")
+    parser.add_argument("--max-credits", type=float, default=0.05, help="Warm-up credit budget (default: 0.05)")
+    parser.add_argument("--max-queries", type=int, default=25, help="Queries to replay at most (default: 25)")
+    args = parser.parse_args()
+    if not (args.seed or args.run or args.report):
+        args.report = True
+
+    print("🔥 Dashboard Cache Warmer")
+    print("=" * 60)
+
+    conn = get_snowflake_connection()
+    try:
+        cursor = conn.cursor()
+        if args.seed:
+            seed(cursor)
+        if args.run:
+            run_warmup(cursor, args.max_seconds, args.max_credits, args.max_queries)
+        if args.report:
+            report(cursor)
+        cursor.close()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()